@@ -0,0 +1,230 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from helpers.logger import setup_logger
+from helpers.metrics import MetricsRegistry, get_metrics
+
+
+class LatencyTracker:
+    """
+    Keeps a sliding window of observed latencies and derives timeouts and hedging delays from
+    its percentiles. Until enough samples are seen the configured defaults are used unchanged.
+    """
+
+    def __init__(self, window=200, min_samples=10):
+        """
+        Args:
+            window (int): Number of most recent latencies the percentiles are computed from.
+            min_samples (int): Samples required before any adaptive value is returned.
+        """
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        # The window in sorted order, built on the first percentile lookup after a record()
+        self._sorted = None
+        # (loop, future, q) of callers waiting for the hedge delay to become known
+        self._delay_waiters = []
+        self.censored = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def record(self, seconds, censored=False):
+        """
+        Records one observed latency.
+
+        Args:
+            seconds (float): The latency, in seconds.
+            censored (bool): The call failed, timed out or was cancelled after this long, so its real
+                             latency is at least that. Such samples still count towards the tail,
+                             leaving them out would hide exactly the slow calls.
+        """
+        with self._lock:
+            self._samples.append(seconds)
+            self._sorted = None
+            self.censored += censored
+            waiters = []
+            if self._delay_waiters and len(self._samples) >= self.min_samples:
+                waiters, self._delay_waiters = self._delay_waiters, []
+        for loop, future, q in waiters:
+            loop.call_soon_threadsafe(self._resolve_delay, future, q)
+
+    @contextmanager
+    def measure(self):
+        """Records how long the block took, as a censored sample when it raised or was cancelled."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.record(time.perf_counter() - start, censored=True)
+            raise
+        self.record(time.perf_counter() - start)
+
+    def percentile(self, q):
+        """
+        Args:
+            q (float): Percentile between 0 and 100.
+
+        Returns:
+            float: The q-th percentile of the window in seconds, or None with too few samples.
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            if self._sorted is None:
+                self._sorted = sorted(self._samples)
+            values = self._sorted
+        return MetricsRegistry._quantile(values, q / 100)
+
+    def timeout(self, default, floor, multiplier=3.0, q=99):
+        """
+        Derives a timeout from the observed tail latency.
+
+        Args:
+            default (float): Fixed timeout, used until enough samples exist and never exceeded.
+            floor (float): Lowest timeout ever returned, so a fast streak cannot starve slow calls.
+            multiplier (float): Headroom applied to the percentile.
+            q (float): Percentile the timeout is based on.
+
+        Returns:
+            float: The timeout, in the unit of default and floor (seconds).
+        """
+        observed = self.percentile(q)
+        if observed is None:
+            return default
+        return min(default, max(floor, observed * multiplier))
+
+    def hedge_delay(self, q=95):
+        """Returns how long to wait before hedging (the observed p95), or None with too few samples."""
+        return self.percentile(q)
+
+    def hedge_delay_when_known(self, q=95):
+        """
+        Returns the hedge delay, or while there are too few samples a future of the running loop
+        that resolves to it as soon as enough are recorded, from any thread.
+        """
+        delay = self.hedge_delay(q)
+        if delay is not None:
+            return delay
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            self._delay_waiters.append((loop, future, q))
+        # A record() right before the registration would not have seen this waiter
+        if len(self) >= self.min_samples:
+            loop.call_soon(self._resolve_delay, future, q)
+        return future
+
+    def _resolve_delay(self, future, q):
+        if not future.done():
+            future.set_result(self.hedge_delay(q))
+
+
+class HedgeBudget:
+    """
+    Caps hedged attempts to a fraction of all primary requests, plus a small burst allowance.
+    Attempts that were abandoned but keep running, such as requests in worker threads, count
+    against the burst until they finish.
+    """
+
+    def __init__(self, ratio=0.1, burst=2):
+        """
+        Args:
+            ratio (float): Extra attempts allowed per primary request, 0.1 means at most 10% more load.
+            burst (int): Hedges allowed on top of the ratio, so early stragglers can be hedged too,
+                         and the most abandoned attempts that may still be running at a time.
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self.requests = 0
+        self.hedges = 0
+        self.abandoned = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def try_acquire(self):
+        """Reserves one hedged attempt, returns False when the budget is exhausted."""
+        with self._lock:
+            if self.hedges >= self.burst + self.ratio * self.requests or self.abandoned >= self.burst:
+                return False
+            self.hedges += 1
+            return True
+
+    def abandon(self, work):
+        """
+        Charges an attempt that lost but cannot be interrupted to the budget until its work is done.
+
+        Args:
+            work (asyncio.Future): Completes once the abandoned work really stopped.
+        """
+        with self._lock:
+            self.abandoned += 1
+        work.add_done_callback(self._release)
+
+    def _release(self, work):
+        with self._lock:
+            self.abandoned -= 1
+
+
+async def hedged(attempt, delay, budget, operation, is_success=lambda result: True, backup_attempt=None):
+    """
+    Runs attempt(), and starts a second attempt if the first has not finished after delay seconds
+    and the budget allows it. The first successful result wins and the other attempt is cancelled.
+
+    Args:
+        attempt (callable): Returns a new awaitable for one attempt on every call.
+        delay (float or asyncio.Future): Seconds to wait before hedging, counted from the start of the
+                                         first attempt. A future, see LatencyTracker.hedge_delay_when_known(),
+                                         is awaited alongside the first attempt. None disables hedging.
+        budget (HedgeBudget): Budget the hedged attempt is charged to.
+        operation (str): Name used for the 'hedge' metrics and log messages.
+        is_success (callable): Tells whether a result counts as a win.
+        backup_attempt (callable): Returns the awaitable of the hedged attempt, defaults to attempt.
+
+    Returns:
+        The winning result, or the primary attempt's result when no attempt succeeded.
+    """
+    budget.record_request()
+    primary = asyncio.create_task(attempt())
+    if delay is None:
+        return await primary
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    if isinstance(delay, asyncio.Future):
+        done, _ = await asyncio.wait({primary, delay}, return_when=asyncio.FIRST_COMPLETED)
+        if primary in done:
+            delay.cancel()
+            return await primary
+        delay = delay.result()
+    done, _ = await asyncio.wait({primary}, timeout=max(0.0, start + delay - loop.time()))
+    if done:
+        return await primary
+    if not budget.try_acquire():
+        return await primary
+
+    metrics = get_metrics()
+    metrics.increment('hedge', f"{operation}_launched")
+    setup_logger(__name__).info(f"{operation} exceeded {delay:.2f}s, starting a hedged attempt")
+    backup = asyncio.create_task((backup_attempt or attempt)())
+    pending = {primary, backup}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer the primary when both finish in the same iteration
+            for task in sorted(done, key=lambda task: task is not primary):
+                if task.exception() is None and is_success(task.result()):
+                    if task is backup:
+                        metrics.increment('hedge', f"{operation}_won")
+                    return task.result()
+        return primary.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
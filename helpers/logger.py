@@ -1,7 +1,150 @@
+import atexit
 import logging
 import os
+import queue
 import sys
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+# Shared state of the queued logging mode, see enable_queued_logging()
+_log_queue = None
+_queue_listener = None
+_queue_filter_settings = {}
+_queued_loggers = []
+_shared_handlers = []
+_queue_lock = threading.Lock()
+_atexit_registered = False
+_shut_down = False
+
+# Pass as extra= on per-city progress lines, the only records SamplingFilter thins out
+PER_CITY = {'per_city': True}
+
+
+def _create_handlers(log_file=None):
+    """Creates the console and file handlers with the application-wide format."""
+    if log_file is None:
+        timestamp = datetime.now().strftime("%d-%m-%Y_%H-%M-%S")
+        log_file = f"temp/test_runs/test_run_{timestamp}.log"
+
+    c_handler = logging.StreamHandler(sys.stdout)
+    f_handler = logging.FileHandler(log_file, encoding='utf-8')
+
+    # Set log level for handlers
+    c_handler.setLevel(logging.INFO)
+    f_handler.setLevel(logging.INFO)
+
+    # Create formatters with correct timestamp format
+    datetime_format = '%Y-%m-%d %H:%M:%S'
+    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    c_handler.setFormatter(logging.Formatter(log_format, datefmt=datetime_format))
+    f_handler.setFormatter(logging.Formatter(log_format, datefmt=datetime_format))
+    return c_handler, f_handler
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Thins out the high-volume per-city INFO (and lower) records of one logger, those logged with
+    extra=PER_CITY. Other records, warnings and errors always pass.
+
+    Args:
+        sample_rate (float): Fraction of records to keep, e.g. 0.1 keeps every tenth record.
+        max_per_second (int): Optional cap on the records kept per second.
+    """
+
+    def __init__(self, sample_rate=1.0, max_per_second=None):
+        super().__init__()
+        self.keep_every = max(1, round(1 / sample_rate)) if sample_rate > 0 else None
+        self.max_per_second = max_per_second
+        self._seen = 0
+        self._window_start = 0.0
+        self._window_count = 0
+        self.dropped = 0
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or not getattr(record, 'per_city', False):
+            return True
+
+        self._seen += 1
+        keep = self.keep_every is not None and (self._seen - 1) % self.keep_every == 0
+        if keep and self.max_per_second is not None:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            keep = self._window_count < self.max_per_second
+            self._window_count += keep
+        if not keep:
+            self.dropped += 1
+        return keep
+
+
+def enable_queued_logging(log_file=None, sample_rate=1.0, max_per_second=None):
+    """
+    Switches setup_logger() to non-blocking logging. Loggers created afterwards only put records
+    on a shared queue; one background QueueListener thread writes them to the console and to a
+    single shared log file, so log I/O no longer runs on the event loop.
+
+    The mode is also enabled automatically when the LOG_QUEUE environment variable is set.
+
+    Args:
+        log_file (str): Shared log file. Defaults to a timestamped file in temp/test_runs.
+        sample_rate (float): Fraction of per-city INFO records kept per logger, see SamplingFilter.
+        max_per_second (int): Optional cap on the per-city INFO records kept per logger and second.
+    """
+    global _log_queue, _queue_listener, _atexit_registered
+    with _queue_lock:
+        if _queue_listener is not None or _shut_down:
+            return
+        os.makedirs("temp/test_runs", exist_ok=True)
+        _log_queue = queue.SimpleQueue()
+        _queue_listener = QueueListener(_log_queue, *_create_handlers(log_file), respect_handler_level=True)
+        _queue_filter_settings.update(sample_rate=sample_rate, max_per_second=max_per_second)
+        _queue_listener.start()
+        if not _atexit_registered:
+            atexit.register(_shutdown_queued_logging)
+            _atexit_registered = True
+
+
+def stop_queued_logging():
+    """
+    Flushes the queue and stops the background listener. Loggers that used the queue keep their
+    sampling filter and write to the shared console and file handlers directly from then on, so
+    records logged after the stop are not lost.
+    """
+    global _log_queue, _queue_listener
+    with _queue_lock:
+        if _queue_listener is None:
+            return
+        _queue_listener.stop()
+        for handler in _queue_listener.handlers:
+            handler.flush()
+        _shared_handlers.extend(_queue_listener.handlers)
+        for logger, q_handler in _queued_loggers:
+            logger.removeHandler(q_handler)
+            for log_filter in q_handler.filters:
+                logger.addFilter(log_filter)
+            for handler in _queue_listener.handlers:
+                logger.addHandler(handler)
+        _queued_loggers.clear()
+        _queue_listener = None
+        _log_queue = None
+        _queue_filter_settings.clear()
+
+
+def _shutdown_queued_logging():
+    """
+    Exit hook: stops queued logging for good and closes the shared handlers, also those moved to
+    the loggers by an earlier stop. LOG_QUEUE cannot switch the mode on again afterwards.
+    """
+    global _shut_down
+    stop_queued_logging()
+    with _queue_lock:
+        _shut_down = True
+        for handler in _shared_handlers:
+            handler.close()
+        _shared_handlers.clear()
 
 
 def setup_logger(name=None):
@@ -9,6 +152,9 @@ def setup_logger(name=None):
     # Create temp directory if it doesn't exist
     os.makedirs("temp/test_runs", exist_ok=True)
 
+    if _queue_listener is None and not _shut_down and os.environ.get("LOG_QUEUE"):
+        enable_queued_logging(sample_rate=float(os.environ.get("LOG_SAMPLE_RATE", "1.0")))
+
     # Get the logger by name or root logger
     logger = logging.getLogger(name) if name else logging.getLogger()
 
@@ -16,28 +162,17 @@ def setup_logger(name=None):
     if not logger.handlers:
         logger.setLevel(logging.INFO)
 
-        # Create handlers
-        c_handler = logging.StreamHandler(sys.stdout)
-        timestamp = datetime.now().strftime("%d-%m-%Y_%H-%M-%S")
-        log_file = f"temp/test_runs/test_run_{timestamp}.log"
-        f_handler = logging.FileHandler(log_file, encoding='utf-8')
-
-        # Set log level for handlers
-        c_handler.setLevel(logging.INFO)
-        f_handler.setLevel(logging.INFO)
-
-        # Create formatters with correct timestamp format
-        datetime_format = '%Y-%m-%d %H:%M:%S'
-        log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        c_format = logging.Formatter(log_format, datefmt=datetime_format)
-        f_format = logging.Formatter(log_format, datefmt=datetime_format)
-
-        c_handler.setFormatter(c_format)
-        f_handler.setFormatter(f_format)
-
-        # Add handlers to logger
-        logger.addHandler(c_handler)
-        logger.addHandler(f_handler)
+        if _queue_listener is not None:
+            # Queued mode: the only work left on the caller's thread is putting the record on the queue
+            q_handler = QueueHandler(_log_queue)
+            q_handler.addFilter(SamplingFilter(**_queue_filter_settings))
+            logger.addHandler(q_handler)
+            _queued_loggers.append((logger, q_handler))
+        else:
+            # Create handlers and add them to logger
+            c_handler, f_handler = _create_handlers()
+            logger.addHandler(c_handler)
+            logger.addHandler(f_handler)
 
         # Disable propagation for non-root loggers to prevent duplicate logs
         if name:
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import defaultdict
+
+from helpers.logger import setup_logger
+from helpers.metrics import get_metrics
+
+
+# Frames under these directories belong to the interpreter or to installed packages
+_LIBRARY_PREFIXES = tuple(os.path.realpath(path) for path in {sys.prefix, sys.base_prefix, sys.exec_prefix})
+
+
+def _blocking_location(stack):
+    """Returns the innermost frame of our own code in a captured stack, else the innermost frame."""
+    if not stack:
+        return "unknown (not captured)"
+    frame = next((frame for frame in reversed(stack)
+                  if not os.path.realpath(frame.filename).startswith(_LIBRARY_PREFIXES)), stack[-1])
+    return f"{frame.filename}:{frame.lineno} in {frame.name}"
+
+
+class LoopMonitor:
+    """
+    Watchdog for the asyncio event loop. A heartbeat coroutine measures how late the loop wakes it
+    up (the loop lag), and a watchdog thread captures the loop thread's stack while a heartbeat is
+    overdue, so the code that blocked the loop is known once it lets go again.
+    """
+
+    def __init__(self, threshold=0.1, interval=0.05, max_offenders=5):
+        """
+        Args:
+            threshold (float): Lag in seconds above which the loop counts as blocked.
+            interval (float): Seconds between two heartbeats.
+            max_offenders (int): Number of blocking locations listed in the summary.
+        """
+        self.logger = setup_logger(__name__)
+        self.threshold = threshold
+        self.interval = interval
+        self.max_offenders = max_offenders
+
+        self.lags = []
+        self.stalls = []
+        # (heartbeat number, time that heartbeat is due), always replaced as a whole by the loop
+        # thread, so the watchdog thread reads a consistent pair without a lock
+        self._heartbeat_state = (0, None)
+        self._captured = {}
+        self._loop_thread_id = None
+        self._heartbeat_task = None
+        self._watchdog = None
+        self._stop_watchdog = threading.Event()
+
+    async def start(self):
+        """Starts the heartbeat on the running loop and the watchdog thread."""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat_state = (0, time.perf_counter() + self.interval)
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        # Let the heartbeat start its first sleep before the caller can block the loop
+        await asyncio.sleep(0)
+
+    async def stop(self):
+        """
+        Stops monitoring and logs the run summary.
+
+        Returns:
+            dict: The summary, see summary().
+        """
+        self._heartbeat_task.cancel()
+        try:
+            await self._heartbeat_task
+        except asyncio.CancelledError:
+            pass
+        self._stop_watchdog.set()
+        self._watchdog.join()
+        # A stall right before stop() never gets its heartbeat resumed, account for it here
+        beat, expected = self._heartbeat_state
+        overdue = time.perf_counter() - expected
+        if overdue > self.threshold:
+            self._record(beat, overdue)
+
+        summary = self.summary()
+        self.logger.info(f"Event loop: {summary['stalls']} stalls, {summary['blocked_total']:.3f}s blocked in total, "
+                         f"max lag {summary['max_lag']:.3f}s over {summary['samples']} heartbeats.")
+        for offender in summary['worst_offenders']:
+            self.logger.info(f"Blocking location {offender['location']}: {offender['count']} stalls, "
+                             f"{offender['blocked_total']:.3f}s in total")
+        return summary
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            beat, expected = self._heartbeat_state
+            # The next beat and its due time are published together, the watchdog never sees a mix
+            self._heartbeat_state = (beat + 1, now + self.interval)
+            self._record(beat, max(0.0, now - expected))
+
+    def _record(self, beat, lag):
+        """Records the lag of a heartbeat, as a stall with its captured stack above the threshold."""
+        stack = self._captured.pop(beat, None)
+        self.lags.append(lag)
+        get_metrics().observe('loop_lag', lag)
+        if lag > self.threshold:
+            self.stalls.append({'duration': lag, 'stack': stack})
+            self.logger.warning(f"Event loop blocked for {lag:.3f}s at {_blocking_location(stack)}\n"
+                                f"{''.join(stack.format()) if stack else ''}")
+
+    def _watch(self):
+        while not self._stop_watchdog.wait(self.threshold / 2):
+            beat, expected = self._heartbeat_state
+            if beat in self._captured or time.perf_counter() - expected < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._captured[beat] = traceback.extract_stack(frame)
+                # The loop may have moved on meanwhile, the stack would then belong to no stall
+                if self._heartbeat_state[0] != beat:
+                    self._captured.pop(beat, None)
+
+    def summary(self):
+        """
+        Summarises the run.
+
+        Returns:
+            dict: Heartbeat 'samples', 'max_lag' and 'mean_lag', the number of 'stalls', their
+                  'blocked_total' duration, and the 'worst_offenders' grouped by the
+                  innermost frame of project code in the captured stack, longest total first.
+        """
+        offenders = defaultdict(lambda: {'count': 0, 'blocked_total': 0.0, 'stack': None})
+        for stall in self.stalls:
+            offender = offenders[_blocking_location(stall['stack'])]
+            offender['count'] += 1
+            offender['blocked_total'] += stall['duration']
+            if offender['stack'] is None and stall['stack']:
+                offender['stack'] = ''.join(stall['stack'].format())
+
+        worst = sorted(({'location': location, **values} for location, values in offenders.items()),
+                       key=lambda offender: offender['blocked_total'], reverse=True)
+        return {
+            'samples': len(self.lags),
+            'max_lag': max(self.lags, default=0.0),
+            'mean_lag': sum(self.lags) / len(self.lags) if self.lags else 0.0,
+            'stalls': len(self.stalls),
+            'blocked_total': sum(stall['duration'] for stall in self.stalls),
+            'worst_offenders': worst[:self.max_offenders],
+        }
@@ -0,0 +1,157 @@
+import bisect
+import html
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+
+class MetricsRegistry:
+    """
+    Collects per-stage timings and success/failure counters for one run, and exports them
+    as JSON, Prometheus text format or an HTML table.
+    """
+    QUANTILES = (0.5, 0.95, 0.99)
+    # Upper bounds, in seconds, of the Prometheus histogram buckets: the client defaults plus
+    # 30s and 60s, since a scrape with retries can run that long
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.counters = defaultdict(int)
+
+    def reset(self):
+        """Drops every recorded timing and counter."""
+        with self._lock:
+            self.timings.clear()
+            self.counters.clear()
+
+    def observe(self, stage, seconds):
+        """Records one duration, in seconds, for a stage."""
+        with self._lock:
+            self.timings[stage].append(seconds)
+
+    def increment(self, operation, outcome='success', amount=1):
+        """Counts an operation outcome, e.g. increment('scrape', 'failure')."""
+        with self._lock:
+            self.counters[(operation, outcome)] += amount
+
+    @contextmanager
+    def timer(self, stage):
+        """Times the enclosed block as one observation of the stage, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    @staticmethod
+    def _quantile(sorted_values, q):
+        rank = q * (len(sorted_values) - 1)
+        lower, upper = math.floor(rank), math.ceil(rank)
+        return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+    def summary(self):
+        """
+        Summarizes the recorded data.
+
+        Returns:
+            dict: 'stages' mapped to count/sum/mean/max/p50/p95/p99 per stage (in seconds),
+                  and 'counters' mapped to operation -> outcome -> count.
+        """
+        with self._lock:
+            timings = {stage: sorted(values) for stage, values in self.timings.items()}
+            counters = dict(self.counters)
+
+        stages = {}
+        for stage, values in sorted(timings.items()):
+            if not values:
+                continue
+            total = math.fsum(values)
+            stages[stage] = {'count': len(values), 'sum': total, 'mean': total / len(values), 'max': values[-1]}
+            stages[stage].update({f"p{round(q * 100)}": self._quantile(values, q) for q in self.QUANTILES})
+
+        counter_summary = defaultdict(dict)
+        for (operation, outcome), count in sorted(counters.items()):
+            counter_summary[operation][outcome] = count
+        return {'stages': stages, 'counters': dict(counter_summary)}
+
+    def to_prometheus(self, prefix='weather'):
+        """
+        Renders the metrics in the Prometheus text exposition format. Stage durations are a
+        histogram, so buckets from several runs or instances can be aggregated into quantiles.
+        """
+        with self._lock:
+            timings = {stage: sorted(values) for stage, values in self.timings.items()}
+        summary = self.summary()
+        lines = [f"# HELP {prefix}_stage_duration_seconds Duration of each pipeline stage.",
+                 f"# TYPE {prefix}_stage_duration_seconds histogram"]
+        for stage, stats in summary['stages'].items():
+            values = timings[stage]
+            for bound in self.BUCKETS:
+                lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} '
+                             f'{bisect.bisect_right(values, bound)}')
+            lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {len(values)}')
+            lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{stage}"}} {stats["sum"]:.6f}')
+            lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        lines += [f"# HELP {prefix}_operations_total Operation outcomes.",
+                  f"# TYPE {prefix}_operations_total counter"]
+        for operation, outcomes in summary['counters'].items():
+            for outcome, count in outcomes.items():
+                lines.append(f'{prefix}_operations_total{{operation="{operation}",outcome="{outcome}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def to_html(self):
+        """Renders the stage latencies and the operation counters as HTML tables for the report."""
+        summary = self.summary()
+        rows = ''.join(
+            f"<tr><td>{html.escape(stage)}</td><td>{stats['count']}</td><td>{stats['p50']:.3f}</td>"
+            f"<td>{stats['p95']:.3f}</td><td>{stats['p99']:.3f}</td><td>{stats['max']:.3f}</td></tr>\n"
+            for stage, stats in summary['stages'].items())
+        counter_rows = ''.join(
+            f"<tr><td>{html.escape(operation)}</td><td>{html.escape(outcome)}</td><td>{count}</td></tr>\n"
+            for operation, outcomes in summary['counters'].items() for outcome, count in outcomes.items())
+        return ('<table class="metrics-table">\n<thead><tr><th>stage</th><th>count</th><th>p50 (s)</th>'
+                f'<th>p95 (s)</th><th>p99 (s)</th><th>max (s)</th></tr></thead>\n<tbody>\n{rows}</tbody>\n</table>\n'
+                '<table class="metrics-table">\n<thead><tr><th>operation</th><th>outcome</th><th>count</th></tr>'
+                f'</thead>\n<tbody>\n{counter_rows}</tbody>\n</table>\n')
+
+    def export(self, directory="temp", basename="metrics"):
+        """
+        Writes '<basename>.json' and '<basename>.prom' into the directory.
+
+        Returns:
+            tuple of str: Paths of the JSON and Prometheus files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"{basename}.json")
+        prom_path = os.path.join(directory, f"{basename}.prom")
+        with open(json_path, "w", encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+        with open(prom_path, "w", encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        return json_path, prom_path
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics():
+    """Returns the process-wide metrics registry shared by all components."""
+    return _registry
+
+
+def timed(stage):
+    """Decorator recording every call of a synchronous function as one observation of the stage."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _registry.timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
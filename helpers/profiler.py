@@ -0,0 +1,133 @@
+import asyncio
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+from helpers.logger import setup_logger
+
+
+class RunProfiler:
+    """
+    Profiles one application run: deterministic CPU profile (cProfile), sampled call stacks in
+    collapsed format for flame graphs, timing of every asyncio task, and tracemalloc snapshots
+    taken at stage boundaries. Nothing of this is installed unless start() is called.
+    """
+
+    def __init__(self, output_dir="temp", sample_interval=0.005, top_n=20):
+        """
+        Args:
+            output_dir (str): Directory the profile files are written to.
+            sample_interval (float): Seconds between two stack samples of the profiled thread.
+            top_n (int): Number of allocation sites listed per stage in the memory summary.
+        """
+        self.logger = setup_logger(__name__)
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.top_n = top_n
+        self.prefix = os.path.join(output_dir, f"profile_{datetime.now().strftime('%d-%m-%Y_%H-%M-%S')}")
+
+        self._cpu_profile = cProfile.Profile()
+        self._stacks = Counter()
+        self._tasks = []
+        self._snapshots = []
+        self._thread_id = None
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+
+    def start(self):
+        """Starts CPU profiling, stack sampling and allocation tracing of the calling thread."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._thread_id = threading.get_ident()
+        tracemalloc.start(25)
+        self.stage("start")
+        self._sampler = threading.Thread(target=self._sample_stacks, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+        self._cpu_profile.enable()
+        self.logger.info(f"Profiling enabled, results will be written to {self.prefix}*")
+
+    def instrument_loop(self, loop=None):
+        """Installs a task factory on the event loop that records the lifetime of every task."""
+        loop = loop or asyncio.get_running_loop()
+
+        def task_factory(loop, coro, **kwargs):
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+            created = time.perf_counter()
+            name = getattr(coro, '__qualname__', type(coro).__name__)
+
+            def record(finished_task):
+                self._tasks.append({'task': name, 'name': finished_task.get_name(),
+                                    'duration': time.perf_counter() - created,
+                                    'cancelled': finished_task.cancelled()})
+            task.add_done_callback(record)
+            return task
+
+        loop.set_task_factory(task_factory)
+
+    def stage(self, name):
+        """Marks a stage boundary with a tracemalloc snapshot."""
+        if tracemalloc.is_tracing():
+            self._snapshots.append((name, time.perf_counter(), tracemalloc.take_snapshot()))
+
+    def _sample_stacks(self):
+        while not self._stop_sampling.wait(self.sample_interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self._stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        """
+        Stops profiling and writes the results.
+
+        Returns:
+            dict: Paths of the 'cpu' (.prof), 'collapsed' (flame graph input), 'tasks' (JSON)
+                  and 'memory' (top-N allocation summary) files.
+        """
+        self._cpu_profile.disable()
+        self._stop_sampling.set()
+        if self._sampler:
+            self._sampler.join()
+        self.stage("end")
+        tracemalloc.stop()
+
+        paths = {
+            'cpu': f"{self.prefix}.prof",
+            'collapsed': f"{self.prefix}.collapsed",
+            'tasks': f"{self.prefix}_tasks.json",
+            'memory': f"{self.prefix}_memory.txt",
+        }
+        self._cpu_profile.dump_stats(paths['cpu'])
+        with open(paths['collapsed'], "w", encoding='utf-8') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(paths['tasks'], "w", encoding='utf-8') as f:
+            json.dump(sorted(self._tasks, key=lambda task: task['duration'], reverse=True), f, indent=2)
+        with open(paths['memory'], "w", encoding='utf-8') as f:
+            f.write(self._memory_summary())
+
+        self.logger.info(f"Profile written: {', '.join(paths.values())}")
+        return paths
+
+    def _memory_summary(self):
+        """Lists the top allocation sites grown in each stage, and the largest ones at the end."""
+        lines = []
+        for (_, start, before), (name, end, after) in zip(self._snapshots, self._snapshots[1:]):
+            lines.append(f"== Stage ending at '{name}' ({end - start:.3f}s) ==")
+            for stat in after.compare_to(before, 'lineno')[:self.top_n]:
+                lines.append(str(stat))
+            lines.append("")
+        if self._snapshots:
+            lines.append("== Largest allocation sites at the end of the run ==")
+            for stat in self._snapshots[-1][2].statistics('lineno')[:self.top_n]:
+                lines.append(str(stat))
+        return "\n".join(lines) + "\n"
@@ -1,34 +1,63 @@
+import argparse
 import asyncio
+import os
+import time
 from utilities.data_analyzer import AppOrchestrator
 from utilities.report_generator import ReportGeneration
+from utilities.trend_analyzer import TrendAnalysis
 from utilities.db_helpers import DatabaseHelper
 from helpers.logger import setup_logger
+from helpers.metrics import get_metrics
+from helpers.profiler import RunProfiler
 
-async def main_async():
-    """Asynchronous main function to run the complete weather analysis pipeline."""
+async def main_async(cities=None, max_concurrency=None, profiler=None):
+    """
+    Asynchronous main function to run the complete weather analysis pipeline.
+
+    Args:
+        cities (list of str): Cities to collect, defaults to the 20 cities below.
+        max_concurrency (int): Maximum number of simultaneous browser sessions, unbounded by default.
+        profiler (RunProfiler): Started profiler to report task timings and stage boundaries to.
+    """
     main_logger = setup_logger("main_app")
+    if profiler:
+        profiler.instrument_loop()
+    # A no-op when profiling is disabled
+    stage = profiler.stage if profiler else (lambda name: None)
 
     # Define a 20 cities list of cities to run the app with as arguments
-    cities_to_test = ["tel aviv", "haifa", "london", "paris", "new york", "tokyo", "sydney", "rome", "berlin", "madrid",
-                      "barcelona", "tehran", "istanbul", "cairo", "moscow", "beijing", "seoul", "bangkok", "delhi",
-                      "mumbai"]
+    cities_to_test = cities or ["tel aviv", "haifa", "london", "paris", "new york", "tokyo", "sydney", "rome", "berlin",
+                                "madrid", "barcelona", "tehran", "istanbul", "cairo", "moscow", "beijing", "seoul",
+                                "bangkok", "delhi", "mumbai"]
 
     main_logger.info(f"Starting the ASYNC weather data collection process with cities {cities_to_test}.")
 
-    orchestrator = AppOrchestrator(cities=cities_to_test)
+    orchestrator = AppOrchestrator(cities=cities_to_test, max_concurrency=max_concurrency)
     db_helper = DatabaseHelper()  # Initialize db_helper to be used in finally block
     db_helper.clear_table()
     try:
         # 1. Await the asynchronous data collection
         await orchestrator.run_data_collection_async()
+        stage("collection")
 
         # 2. Fetch all data for reporting (this part is synchronous)
-        all_data = db_helper.get_all_weather_data()
+        all_data = db_helper.get_all_readings()
+        stage("fetch")
 
         # 3. Generate the final report
         if all_data:
             report_gen = ReportGeneration(all_data)
-            report_gen.generate_html_report(threshold=3.0)  # Adjust threshold as needed
+            # Discrepancy drift per city over the last week of readings kept in the history table
+            trends = TrendAnalysis(db_helper.get_weather_history(since=int(time.time()) - 7 * 24 * 3600))
+            extra_sections = [("Discrepancy Trends (24h rolling window)", trends.to_html())]
+            if os.environ.get("REPORT_METRICS"):
+                # Off by default: run timings change on every run and would defeat the report cache
+                extra_sections.append(("Run Metrics", get_metrics().to_html()))
+            # Only changed sections and cities are re-rendered, and a trend table that changed on its own
+            # only rewrites the end of the report
+            report_gen.generate_cached_html_report(threshold=3.0,  # Adjust threshold as needed
+                                                   extra_sections=extra_sections)
+            stage("report")
         else:
             main_logger.warning("No data was collected, report will not be generated.")
 
@@ -39,7 +68,24 @@ async def main_async():
         if db_helper:
             db_helper.close()
 
+        # 5. Export the per-stage timings and counters of this run
+        json_path, prom_path = get_metrics().export("temp")
+        main_logger.info(f"Run metrics written to {json_path} and {prom_path}")
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect weather data and generate the discrepancy report.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write CPU, asyncio task and memory profiles to temp/ (or set PROFILE=1).")
+    args = parser.parse_args()
+
     # asyncio.run() to execute the async main function
-    asyncio.run(main_async())
+    if args.profile or os.environ.get("PROFILE"):
+        run_profiler = RunProfiler()
+        run_profiler.start()
+        try:
+            asyncio.run(main_async(profiler=run_profiler))
+        finally:
+            run_profiler.stop()
+    else:
+        asyncio.run(main_async())
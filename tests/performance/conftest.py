@@ -0,0 +1,95 @@
+import json
+import os
+import random
+import sqlite3
+import time
+import warnings
+
+import pytest
+
+# Committed per-benchmark baselines, refreshed with BENCHMARK_UPDATE_BASELINE=1
+BASELINE_FILE = os.environ.get("BENCHMARK_BASELINE_FILE",
+                               os.path.join(os.path.dirname(__file__), "benchmark_baseline.json"))
+# Allowed slowdown against the baseline before a benchmark fails, in percent
+MAX_REGRESSION_PCT = float(os.environ.get("BENCHMARK_MAX_REGRESSION_PCT", "25"))
+
+
+class MissingBaselineWarning(Warning):
+    """A gated benchmark ran without a committed baseline, so no regression could be detected."""
+
+
+def _reference_workload():
+    """A fixed mix of Python, sorting and SQLite work that every baseline is expressed relative to."""
+    rng = random.Random(1)
+    values = sorted(rng.random() for _ in range(100_000))
+    conn = sqlite3.connect(":memory:")
+    with conn:
+        conn.execute("CREATE TABLE t (city TEXT, value REAL)")
+        conn.executemany("INSERT INTO t VALUES (?, ?)", ((f"city_{i}", v) for i, v in enumerate(values[:20_000])))
+    conn.execute("SELECT city, value FROM t ORDER BY value DESC").fetchall()
+    conn.close()
+
+
+@pytest.fixture(scope="session")
+def reference_seconds():
+    """
+    Times the reference workload on this machine, best of five. Baselines are stored as multiples
+    of it, so the committed file gates slower and faster machines alike.
+    """
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        _reference_workload()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+@pytest.fixture(scope="session")
+def benchmark_baseline():
+    """
+    Loads the stored baselines once per session. In update mode the measured values are
+    collected instead and written back to the baseline file when the session ends.
+    """
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding='utf-8') as f:
+            baseline = json.load(f)
+    update = bool(os.environ.get("BENCHMARK_UPDATE_BASELINE"))
+    measured = {}
+
+    yield {'values': baseline, 'update': update, 'measured': measured}
+
+    if update and measured:
+        baseline.update(measured)
+        with open(BASELINE_FILE, "w", encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+@pytest.fixture
+def regression_gate(request, benchmark_baseline, reference_seconds):
+    """
+    Returns a check that compares a finished benchmark with its committed baseline and fails the
+    test when the chosen statistic regressed by more than BENCHMARK_MAX_REGRESSION_PCT percent.
+    Both are compared as multiples of the reference workload timed in the same session. A missing
+    baseline does not fail the test, it is reported as a MissingBaselineWarning.
+    """
+    def check(benchmark, metric='mean'):
+        if benchmark.stats is None:
+            return  # benchmarks disabled, nothing was measured
+        key = f"{request.node.name}:{metric}"
+        relative = getattr(benchmark.stats.stats, metric) / reference_seconds
+        reference = benchmark_baseline['values'].get(key)
+        benchmark.extra_info[f"relative_{metric}"] = relative
+        benchmark.extra_info[f"baseline_relative_{metric}"] = reference
+
+        if benchmark_baseline['update']:
+            benchmark_baseline['measured'][key] = relative
+            return
+        if reference is None:
+            warnings.warn(f"No baseline for {key} in {BASELINE_FILE}, the regression gate was not applied. "
+                          f"Record one with BENCHMARK_UPDATE_BASELINE=1.", MissingBaselineWarning)
+            return
+        limit = reference * (1 + MAX_REGRESSION_PCT / 100)
+        assert relative <= limit, (f"{request.node.name} regressed: {metric} is {relative:.2f}x the reference "
+                                   f"workload, the baseline is {reference:.2f}x, more than {MAX_REGRESSION_PCT}% slower")
+    return check
@@ -0,0 +1,155 @@
+"""
+Local stand-ins for the two external services, so the full pipeline can be benchmarked offline.
+
+FakeOpenWeatherMap answers the OpenWeatherMap current weather endpoint, FakeTimeAndDate serves
+pages with the same structure (search box, result list, '#qlook' container) that WebScraper
+navigates on timeanddate.com. Both inject a configurable latency and error rate.
+"""
+import json
+import random
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+
+def fake_temperature(city, source):
+    """Deterministic temperature per city and source, with a few degrees between the sources."""
+    seed = zlib.crc32(city.lower().encode('utf-8'))
+    base = seed % 40 - 5
+    return base if source == 'web' else base + (seed >> 8) % 5 - 2
+
+
+class StandInService(ABC):
+    """
+    Runs a threaded HTTP server on a free local port, injecting latency and server errors.
+    Subclasses answer the requests in handle().
+    """
+    # Successful responses under this path are sent with a long Cache-Control max-age
+    CACHEABLE_PREFIX = '/static/'
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=0):
+        """
+        Args:
+            latency (float): Seconds every request is delayed by.
+            error_rate (float): Fraction of requests answered with HTTP 500.
+            seed (int): Seed of the error injection, for repeatable runs.
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.requests = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _should_fail(self):
+        with self._random_lock:
+            self.requests += 1
+            return self._random.random() < self.error_rate
+
+    @abstractmethod
+    def handle(self, path, query):
+        """Returns (status, content type, body) for one GET request."""
+
+    def start(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if service.latency:
+                    time.sleep(service.latency)
+                url = urlparse(self.path)
+                if service._should_fail():
+                    status, content_type, body = 500, 'text/plain', 'Injected failure'
+                else:
+                    status, content_type, body = service.handle(unquote(url.path), parse_qs(url.query))
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+                self.send_header('Content-Length', str(len(payload)))
+                if status == 200 and url.path.startswith(service.CACHEABLE_PREFIX):
+                    self.send_header('Cache-Control', 'public, max-age=86400')
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class FakeOpenWeatherMap(StandInService):
+    """Serves /data/2.5/weather like the OpenWeatherMap API, 404 for cities starting with 'invalid'."""
+    PATH = '/data/2.5/weather'
+
+    @property
+    def api_url(self):
+        return f"{self.base_url}{self.PATH}"
+
+    def handle(self, path, query):
+        city = query.get('q', [''])[0]
+        if path != self.PATH or not city or city.lower().startswith('invalid'):
+            return 404, 'application/json', json.dumps({"cod": "404", "message": "city not found"})
+        temperature = fake_temperature(city, 'api')
+        body = {"name": city.title(), "main": {"temp": temperature + 0.37, "feels_like": temperature - 1.12}}
+        return 200, 'application/json', json.dumps(body)
+
+
+class FakeTimeAndDate(StandInService):
+    """Serves a search page, a result list and per-city weather pages shaped like timeanddate.com."""
+    # Static assets every page links to, like the site-wide scripts and styles of the real site
+    ASSETS = {
+        '/static/site.css': ('text/css', '#qlook { font-family: sans-serif; }' + ' ' * 20000),
+        '/static/site.js': ('application/javascript', 'window.siteReady = true;' + ' ' * 50000),
+    }
+    HEAD = '<head><link rel="stylesheet" href="/static/site.css"><script src="/static/site.js"></script></head>'
+    INDEX_PAGE = ('<html>' + HEAD + '<body><form action="/weather/search" method="get">'
+                  '<input type="text" name="query" placeholder="Search for city or place…">'
+                  '</form></body></html>')
+
+    @property
+    def weather_url(self):
+        return f"{self.base_url}/weather/"
+
+    def handle(self, path, query):
+        if path in self.ASSETS:
+            return (200, *self.ASSETS[path])
+        if path == '/weather/':
+            return 200, 'text/html', self.INDEX_PAGE
+        if path == '/weather/search':
+            city = query.get('query', [''])[0]
+            links = '' if city.lower().startswith('invalid') else (
+                f'<tr><td><a href="/weather/{quote(city)}">{city.title()}</a></td></tr>')
+            return 200, 'text/html', f'<html>{self.HEAD}<body><div class="tb-scroll"><table>{links}</table></div></body></html>'
+        if path.startswith('/weather/'):
+            city = path[len('/weather/'):]
+            temperature = fake_temperature(city, 'web')
+            return 200, 'text/html', (
+                f'<html>{self.HEAD}<body><div id="qlook"><div class="h2">{temperature}&nbsp;°C</div>'
+                f'<p>Feels Like: {temperature - 2}&nbsp;°C<br>Forecast: {temperature + 1} / {temperature - 4}&nbsp;°C</p>'
+                '</div></body></html>')
+        return 404, 'text/html', '<html><body>Not found</body></html>'
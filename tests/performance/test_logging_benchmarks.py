@@ -0,0 +1,40 @@
+import itertools
+
+import pytest
+
+from helpers.logger import PER_CITY, enable_queued_logging, setup_logger, stop_queued_logging
+
+# Roughly the INFO lines the scraper, API client and DB helper write for one city
+LINES_PER_CITY = 6
+_logger_ids = itertools.count()
+
+
+def _log_one_city(logger):
+    for step in range(LINES_PER_CITY):
+        logger.info(f"Step {step} completed for Tel Aviv", extra=PER_CITY)
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """Runs the benchmark from a temporary directory, so the log files do not pile up in temp/."""
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    stop_queued_logging()
+
+
+@pytest.mark.performance
+def test_benchmark_direct_logging_per_city(benchmark, log_dir):
+    """Benchmarks the per-city cost of the synchronous stream and file handlers."""
+    logger = setup_logger(f"bench_direct_{next(_logger_ids)}")
+    benchmark(_log_one_city, logger)
+    for handler in logger.handlers:
+        handler.close()
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("sample_rate", [1.0, 0.1])
+def test_benchmark_queued_logging_per_city(benchmark, log_dir, sample_rate):
+    """Benchmarks the per-city cost seen by the caller when records are only enqueued."""
+    enable_queued_logging(log_file=str(log_dir / "queued.log"), sample_rate=sample_rate)
+    logger = setup_logger(f"bench_queued_{next(_logger_ids)}")
+    benchmark(_log_one_city, logger)
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import resource
+import threading
+
+import pytest
+from playwright.sync_api import sync_playwright
+
+from helpers.metrics import get_metrics
+from main import main_async
+from tests.performance.stand_in_services import FakeOpenWeatherMap, FakeTimeAndDate, fake_temperature
+from utilities.api_helpers import ApiHelper
+from utilities.web_scraper import WebScraper
+
+# Stand-in behaviour, overridable from the environment for heavier or flakier sweeps
+STAND_IN_LATENCY = float(os.environ.get("OFFLINE_BENCH_LATENCY", "0.02"))
+STAND_IN_ERROR_RATE = float(os.environ.get("OFFLINE_BENCH_ERROR_RATE", "0.02"))
+
+
+def _chromium_available():
+    try:
+        with sync_playwright() as p:
+            return os.path.exists(p.chromium.executable_path)
+    except Exception:
+        return False
+
+
+class PeakRssSampler:
+    """Samples the resident set size of this process in a background thread and keeps the peak."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def _current_rss():
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self._current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._current_rss())
+
+
+@pytest.fixture(scope="module")
+def stand_ins():
+    """Starts the fake API and the fake weather site once for the whole module."""
+    with FakeOpenWeatherMap(latency=STAND_IN_LATENCY, error_rate=STAND_IN_ERROR_RATE) as api, \
+            FakeTimeAndDate(latency=STAND_IN_LATENCY, error_rate=STAND_IN_ERROR_RATE, seed=1) as web:
+        yield api, web
+
+
+@pytest.fixture
+def offline_pipeline(stand_ins, monkeypatch, tmp_path):
+    """Points the pipeline at the stand-ins and runs it from a temporary directory."""
+    api, web = stand_ins
+    monkeypatch.setattr(ApiHelper, "BASE_URL", api.api_url)
+    monkeypatch.setattr(WebScraper, "BASE_URL", web.weather_url)
+    # The database, report, cache and metrics files are all relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return api, web
+
+
+@pytest.mark.performance
+def test_fake_openweathermap_serves_api_helper(offline_pipeline):
+    """Checks the API stand-in against the real ApiHelper, no browser needed."""
+    api_helper = ApiHelper()
+    api, _ = offline_pipeline
+    error_rate, api.error_rate = api.error_rate, 0.0
+    try:
+        data = api_helper.get_current_api_weather("tel aviv")
+        assert data["temperature_api"] == pytest.approx(fake_temperature("tel aviv", "api") + 0.37)
+        assert api_helper.get_current_api_weather("invalid city") == {"temperature_api": None,
+                                                                      "feels_like_api": None}
+    finally:
+        api.error_rate = error_rate
+
+
+@pytest.mark.performance
+@pytest.mark.skipif(not _chromium_available(), reason="Playwright Chromium is not installed")
+@pytest.mark.parametrize("concurrency", [5, 25])
+@pytest.mark.parametrize("city_count", [1, 10, 100, pytest.param(1000, marks=pytest.mark.slow)])
+def test_benchmark_offline_pipeline(benchmark, offline_pipeline, city_count, concurrency):
+    """
+    Benchmarks the full main_async pipeline against the local stand-ins and records
+    cities per second, the p95 per-city latency and the peak RSS in the benchmark's extra info.
+    """
+    cities = [f"city {i:04d}" for i in range(city_count)]
+    sampler = PeakRssSampler()
+
+    def run_pipeline():
+        get_metrics().reset()
+        with sampler:
+            asyncio.run(main_async(cities=cities, max_concurrency=concurrency))
+
+    benchmark.pedantic(run_pipeline, rounds=1, iterations=1)
+
+    summary = get_metrics().summary()
+    collected = summary['counters'].get('city', {}).get('success', 0)
+    elapsed = benchmark.stats.stats.mean
+    benchmark.extra_info.update({
+        "cities": city_count,
+        "concurrency": concurrency,
+        "cities_collected": collected,
+        "cities_per_second": city_count / elapsed,
+        "p95_city_latency_s": summary['stages']['city_latency']['p95'],
+        "peak_rss_mb": sampler.peak_bytes / 2 ** 20,
+        # Largest browser process seen, ru_maxrss is reported in KiB on Linux
+        "peak_child_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    })
+    # Injected errors may cost a few cities, but most of them have to make it through
+    assert collected >= city_count // 2
+
+
+@pytest.mark.performance
+@pytest.mark.skipif(not _chromium_available(), reason="Playwright Chromium is not installed")
+def test_persistent_profile_serves_repeat_runs_from_cache(offline_pipeline, tmp_path):
+    """Checks that a second run with the same browser profile loads the static assets from the disk cache."""
+    _, web = offline_pipeline
+    profile_dir = str(tmp_path / "browser_profile")
+
+    async def scrape_run(cities):
+        scraper = WebScraper(user_data_dir=profile_dir)
+        await scraper.warm_cache()
+        results = [await scraper._scrape_weather_data(city) for city in cities]
+        await scraper.close()
+        return scraper, results
+
+    error_rate, web.error_rate = web.error_rate, 0.0
+    try:
+        cold, _ = asyncio.run(scrape_run(["city a"]))
+        warm, results = asyncio.run(scrape_run(["city b", "city c"]))
+    finally:
+        web.error_rate = error_rate
+
+    assert all(result["temperature_web"] is not None for result in results)
+    assert warm.cache_stats['cache_hits'] > cold.cache_stats['cache_hits']
+    assert warm.cache_hit_ratio() > cold.cache_hit_ratio()
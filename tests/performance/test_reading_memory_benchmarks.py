@@ -0,0 +1,74 @@
+import random
+import tracemalloc
+
+import pytest
+
+from utilities.models import WeatherReading
+from utilities.report_generator import ReportGeneration
+
+# 10k readings run on every benchmark session, the large run is marked slow
+READING_COUNTS = [10_000, pytest.param(1_000_000, marks=pytest.mark.slow)]
+
+
+def _store_readings(db_helper, count, seed=11):
+    """Stores count synthetic readings with unique city names in one bulk insert."""
+    rng = random.Random(seed)
+    readings = []
+    for i in range(count):
+        temperature_web = round(rng.uniform(-15, 40))
+        temperature_api = round(temperature_web + rng.gauss(0, 2), 2)
+        readings.append(WeatherReading(f"city_{i:07d}", temperature_web, temperature_web - 2, temperature_api,
+                                       round(temperature_api - 1.5, 2), 1_700_000_000.0 + i, "benchmark"))
+    db_helper.insert_readings(readings)
+
+
+def _traced(load):
+    """Runs load() under tracemalloc and returns its result, the bytes it holds and the allocation count."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = load()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    diff = after.compare_to(before, 'filename')
+    return result, sum(stat.size_diff for stat in diff), sum(stat.count_diff for stat in diff)
+
+
+@pytest.mark.performance
+@pytest.mark.database
+@pytest.mark.parametrize("reading_count", READING_COUNTS)
+def test_reading_records_use_less_memory_than_dict_rows(benchmark, db_helper, reading_count):
+    """
+    Compares loading every row as a dictionary with loading it as a WeatherReading, recording
+    the bytes and allocations per record that stay alive, and benchmarks the record path.
+    """
+    _store_readings(db_helper, reading_count)
+
+    dict_rows, dict_bytes, dict_allocations = _traced(db_helper.get_all_weather_data)
+    readings, reading_bytes, reading_allocations = _traced(db_helper.get_all_readings)
+    assert len(dict_rows) == len(readings) == reading_count
+    del dict_rows
+
+    benchmark.pedantic(db_helper.get_all_readings, rounds=1 if reading_count > 10_000 else 3, iterations=1)
+    benchmark.extra_info.update({
+        "readings": reading_count,
+        "dict_bytes_per_record": dict_bytes / reading_count,
+        "reading_bytes_per_record": reading_bytes / reading_count,
+        "dict_allocations_per_record": dict_allocations / reading_count,
+        "reading_allocations_per_record": reading_allocations / reading_count,
+    })
+    assert reading_bytes < dict_bytes * 0.75
+    assert reading_allocations < dict_allocations
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("reading_count", READING_COUNTS)
+def test_benchmark_report_from_readings(benchmark, db_helper, reading_count):
+    """Benchmarks building the compact report frame straight from WeatherReading records."""
+    _store_readings(db_helper, reading_count)
+    readings = db_helper.get_all_readings()
+
+    report_gen = benchmark.pedantic(ReportGeneration, args=(readings,), kwargs={"compact": True},
+                                    rounds=1 if reading_count > 10_000 else 3, iterations=1)
+    assert len(report_gen.df) == reading_count
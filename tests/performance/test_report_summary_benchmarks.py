@@ -0,0 +1,49 @@
+import random
+import subprocess
+import sys
+
+import pytest
+
+from utilities.report_generator import ReportGeneration
+from utilities.report_summary import summarize_readings
+
+
+def _synthetic_readings(count):
+    rng = random.Random(42)
+    readings = []
+    for i in range(count):
+        temperature_web = rng.uniform(-10, 35)
+        readings.append({
+            "city": f"city_{i}",
+            "temperature_web": temperature_web,
+            "feels_like_web": temperature_web - 1,
+            "temperature_api": temperature_web + rng.gauss(0, 2),
+            "feels_like_api": temperature_web + rng.gauss(0, 2),
+        })
+    return readings
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("row_count", [20, 10000])
+def test_benchmark_summary_fast_path(benchmark, row_count):
+    """Benchmarks the pandas-free summary computed straight from database rows."""
+    readings = _synthetic_readings(row_count)
+    summary = benchmark(summarize_readings, readings, thresholds=[1.0, 3.0])
+    assert summary['readings'] == row_count
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("row_count", [20, 10000])
+def test_benchmark_summary_dataframe_path(benchmark, row_count):
+    """Benchmarks the same summary built through ReportGeneration and its DataFrame."""
+    readings = _synthetic_readings(row_count)
+    summary = benchmark(lambda: ReportGeneration(readings).get_summary(thresholds=[1.0, 3.0]))
+    assert summary['readings'] == row_count
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("module", ["utilities.report_summary", "utilities.report_generator"])
+def test_benchmark_cold_import(benchmark, module):
+    """Benchmarks the cold import cost a short cron run pays for each report path."""
+    benchmark.pedantic(subprocess.run, args=([sys.executable, "-c", f"import {module}"],),
+                       kwargs={"check": True}, rounds=3, iterations=1)
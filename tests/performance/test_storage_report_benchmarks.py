@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from utilities.report_generator import ReportGeneration
+
+# 1k rows runs on every benchmark session, the realistic large sizes are marked slow
+ROW_COUNTS = [1000, pytest.param(100_000, marks=pytest.mark.slow), pytest.param(1_000_000, marks=pytest.mark.slow)]
+
+
+def _synthetic_readings(count, seed=7):
+    """Yields (city, web_data, api_data) triples with unique city names and plausible temperatures."""
+    rng = random.Random(seed)
+    for i in range(count):
+        temperature_web = round(rng.uniform(-15, 40))
+        temperature_api = round(temperature_web + rng.gauss(0, 2), 2)
+        yield (f"city_{i:07d}",
+               {"temperature_web": temperature_web, "feels_like_web": temperature_web - 2},
+               {"temperature_api": temperature_api, "feels_like_api": round(temperature_api - 1.5, 2)})
+
+
+def _populate(db_helper, count):
+    """Bulk loads the weather_data table directly, so only the measured operation is timed."""
+    rows = [(city, web["temperature_web"], web["feels_like_web"], api["temperature_api"], api["feels_like_api"],
+             (web["temperature_web"] + api["temperature_api"]) / 2)
+            for city, web, api in _synthetic_readings(count)]
+    with db_helper.conn:
+        db_helper.conn.executemany("INSERT INTO weather_data (city, temperature_web, feels_like_web, temperature_api, "
+                                   "feels_like_api, avg_temperature) VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+
+@pytest.mark.performance
+@pytest.mark.database
+@pytest.mark.parametrize("row_count", ROW_COUNTS)
+def test_benchmark_insert_weather_data(benchmark, regression_gate, db_helper, row_count):
+    """Benchmarks inserting row_count readings one by one, the way the orchestrator does."""
+    readings = list(_synthetic_readings(row_count))
+
+    def insert_all():
+        for city, web_data, api_data in readings:
+            db_helper.insert_weather_data(city, web_data, api_data)
+
+    benchmark.pedantic(insert_all, rounds=1 if row_count > 1000 else 3, iterations=1)
+    assert db_helper.conn.execute("SELECT COUNT(*) FROM weather_data").fetchone()[0] == row_count
+    regression_gate(benchmark)
+
+
+@pytest.mark.performance
+@pytest.mark.database
+@pytest.mark.parametrize("row_count", ROW_COUNTS)
+def test_benchmark_get_all_weather_data(benchmark, regression_gate, db_helper, row_count):
+    """Benchmarks reading the whole table back as a list of dictionaries."""
+    _populate(db_helper, row_count)
+    rows = benchmark.pedantic(db_helper.get_all_weather_data, rounds=1 if row_count > 1000 else 5, iterations=1)
+    assert len(rows) == row_count
+    regression_gate(benchmark)
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("row_count", ROW_COUNTS)
+def test_benchmark_report_statistics(benchmark, regression_gate, db_helper, row_count):
+    """Benchmarks building the report DataFrame and computing its statistics and threshold rows."""
+    _populate(db_helper, row_count)
+    all_data = db_helper.get_all_weather_data()
+
+    def compute_statistics():
+        report_gen = ReportGeneration(all_data)
+        return report_gen._get_summary_statistics(), report_gen._get_discrepancy_report(3.0)
+
+    stats, _ = benchmark.pedantic(compute_statistics, rounds=1 if row_count > 1000 else 5, iterations=1)
+    assert stats["Mean Discrepancy"] != "N/A"
+    regression_gate(benchmark)
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("row_count", ROW_COUNTS)
+def test_benchmark_generate_html_report(benchmark, regression_gate, db_helper, tmp_path, row_count):
+    """Benchmarks rendering and writing the complete HTML report."""
+    _populate(db_helper, row_count)
+    report_gen = ReportGeneration(db_helper.get_all_weather_data())
+    report_file = tmp_path / "report.html"
+
+    benchmark.pedantic(report_gen.generate_html_report, kwargs={"threshold": 3.0, "filename": report_file},
+                       rounds=1 if row_count > 1000 else 3, iterations=1)
+    assert report_file.stat().st_size > 0
+    regression_gate(benchmark)
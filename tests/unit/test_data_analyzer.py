@@ -1,5 +1,8 @@
+import asyncio
+
 import pytest
 
+from helpers.metrics import get_metrics
 from utilities.data_analyzer import AppOrchestrator
 
 
@@ -83,3 +86,74 @@ async def test_data_collection_with_invalid_city(db_helper):
     # Verify that only the valid city's data was inserted
     assert len(all_data) == 1
     assert all_data[0]['city'] == "rome"
+
+
+@pytest.mark.unit
+def test_readings_are_stored_as_each_city_completes(db_helper):
+    """
+    Tests that every city is written as soon as it is collected, so a failure later in the run
+    keeps the cities that were already done.
+    """
+    orchestrator = AppOrchestrator(cities=["london", "paris", "rome"], db_helper=db_helper)
+
+    async def fake_scrape(city):
+        return {"temperature_web": 20, "feels_like_web": 19}
+
+    async def fake_api(city):
+        if city == "rome":
+            raise RuntimeError("API down")
+        if city == "paris":
+            # london is already visible to readers while the run is still going
+            assert db_helper.get_weather_data("london") is not None
+        return {"temperature_api": 21, "feels_like_api": 20}
+
+    orchestrator.web_scraper._scrape_weather_data = fake_scrape
+    orchestrator.api_helper.get_current_api_weather_async = fake_api
+    with pytest.raises(RuntimeError):
+        asyncio.run(orchestrator.run_data_collection_async())
+
+    assert sorted(row['city'] for row in db_helper.get_all_weather_data()) == ["london", "paris"]
+
+
+@pytest.mark.unit
+def test_collect_readings_reports_only_stored_readings(db_helper):
+    """Tests that readings the store rejects are reported as not stored."""
+    orchestrator = AppOrchestrator(cities=["london", "paris"], db_helper=db_helper)
+
+    async def fake_scrape(city):
+        return {"temperature_web": 20, "feels_like_web": 19}
+
+    async def fake_api(city):
+        return {"temperature_api": 21, "feels_like_api": 20}
+
+    orchestrator.web_scraper._scrape_weather_data = fake_scrape
+    orchestrator.api_helper.get_current_api_weather_async = fake_api
+    stored, failed = asyncio.run(orchestrator.collect_readings(
+        ["london", "paris"], store=lambda readings: 0 if readings[0].city == "paris" else 1))
+
+    assert [reading.city for reading in stored] == ["london"]
+    assert failed == ["paris"]
+
+
+@pytest.mark.unit
+def test_city_latency_is_measured_per_city(db_helper):
+    """Tests that city_latency starts when a city's scrape starts, not when the run started."""
+    orchestrator = AppOrchestrator(cities=["london", "paris", "rome"], max_concurrency=1, db_helper=db_helper)
+
+    async def fake_scrape(city, slot=None):
+        await asyncio.sleep(0.1)
+        return {"temperature_web": 20, "feels_like_web": 19}
+
+    async def fake_api(city):
+        return {"temperature_api": 21, "feels_like_api": 20}
+
+    orchestrator.web_scraper._scrape_weather_data = fake_scrape
+    orchestrator.api_helper.get_current_api_weather_async = fake_api
+    metrics = get_metrics()
+    metrics.reset()
+    asyncio.run(orchestrator.collect_readings(orchestrator.cities))
+
+    # The scrapes run one after another, from the start of the run the last city would take 0.3s
+    latencies = metrics.timings['city_latency']
+    assert len(latencies) == 3
+    assert max(latencies) < 0.2
@@ -2,6 +2,11 @@
 import pytest
 from datetime import datetime
 
+import numpy as np
+
+from utilities.columnar_archive import ColumnarArchive
+from utilities.models import WeatherReading
+
 
 @pytest.mark.database
 def test_db_initialization(db_helper):
@@ -100,3 +105,141 @@ def test_null_handling(db_helper):
     assert retrieved_data['feels_like_api'] is None
     # The average should also be None if a value is missing
     assert retrieved_data['avg_temperature'] is None
+
+
+@pytest.mark.database
+@pytest.mark.parametrize("compress", [False, True])
+def test_export_and_import_archive(db_helper, tmp_path, compress):
+    """Test that the reading history round-trips through the columnar archive."""
+    db_helper.insert_weather_data("ArchiveCity", {"temperature_web": 20.5, "feels_like_web": 19.0},
+                                  {"temperature_api": 21.5, "feels_like_api": None})
+    db_helper.insert_weather_data("OtherCity", {"temperature_web": -3.0, "feels_like_web": -6.5},
+                                  {"temperature_api": -2.0, "feels_like_api": -5.0})
+    archive_path = tmp_path / "archive"
+
+    assert db_helper.export_archive(archive_path, chunk_size=1, compress=compress) == 2
+    # A second export only appends readings that are newer than the archive
+    assert db_helper.export_archive(archive_path) == 0
+
+    archive = ColumnarArchive(archive_path)
+    columns = archive.to_frame_columns()
+    assert len(archive) == 2
+    assert list(columns['city']) == ["ArchiveCity", "OtherCity"]
+    assert columns['temperature_web'].dtype == np.float32
+    assert columns['recorded_at'].dtype == np.int32
+    assert np.isnan(columns['feels_like_api'][0])
+
+    db_helper.conn.execute("DELETE FROM weather_history")
+    assert db_helper.import_archive(archive_path) == 2
+    rows = db_helper.conn.execute(
+        "SELECT city, temperature_web, feels_like_api, source FROM weather_history ORDER BY id").fetchall()
+    assert rows == [("ArchiveCity", 20.5, None, WeatherReading.DEFAULT_SOURCE),
+                    ("OtherCity", -3.0, -5.0, WeatherReading.DEFAULT_SOURCE)]
+
+
+@pytest.mark.database
+def test_importing_into_the_exporting_database_does_not_duplicate(db_helper, tmp_path):
+    """Test that readings imported from an archive are not exported back into it, but into other archives."""
+    db_helper.insert_readings([WeatherReading("london", 15, 14, 16.0, 15.5, 1_700_000_000.0, "web+api"),
+                               WeatherReading("paris", 20, 19, 21.0, 20.0, 1_700_000_001.0, None)])
+    archive_path = tmp_path / "archive"
+    assert db_helper.export_archive(archive_path) == 2
+
+    assert db_helper.import_archive(archive_path) == 2
+    assert db_helper.export_archive(archive_path) == 0
+    assert len(ColumnarArchive(archive_path)) == 2
+
+    # A different archive still receives the imported readings
+    assert db_helper.export_archive(tmp_path / "copy") == 4
+    assert list(ColumnarArchive(tmp_path / "copy").to_frame_columns()['source']) == ["web+api", None] * 2
+
+
+@pytest.mark.database
+def test_incremental_export_keeps_same_second_and_late_readings(db_helper, tmp_path):
+    """Test that the export watermark is the row id, not the reading timestamp."""
+    archive_path = tmp_path / "archive"
+    db_helper.insert_readings([WeatherReading("london", 15, 14, 16.0, 15.5, 1_700_000_100.0, "web+api")])
+    assert db_helper.export_archive(archive_path) == 1
+
+    # Same second as the archived reading, and a late reading with an older timestamp
+    db_helper.insert_readings([WeatherReading("paris", 20, 19, 21.0, 20.0, 1_700_000_100.9, "web+api"),
+                               WeatherReading("rome", 28, 30, 26.0, 27.0, 1_699_999_000.0, "web+api")])
+    assert db_helper.export_archive(archive_path) == 2
+    assert db_helper.export_archive(archive_path) == 0
+    assert list(ColumnarArchive(archive_path).to_frame_columns()['city']) == ["london", "paris", "rome"]
+
+
+@pytest.mark.database
+@pytest.mark.parametrize("compress", [False, True])
+def test_archive_discards_interrupted_append(tmp_path, compress):
+    """Test that column bytes written without a saved meta file are dropped on reopen."""
+    archive = ColumnarArchive(tmp_path / "archive", compress=compress)
+    archive.append([("london", 100, 15.0, 14.0, 16.0, 15.5, 15.5, "web+api")], max_id=1)
+
+    # Simulate a crash in the middle of the next append: only some columns got their bytes
+    for column in list(ColumnarArchive.COLUMNS)[:3]:
+        with open(archive._column_path(column), 'ab') as f:
+            f.write(b'\x01' * 11)
+
+    reopened = ColumnarArchive(tmp_path / "archive")
+    reopened.append([("paris", 200, 20.0, 19.0, 21.0, 20.0, 20.5, None)], max_id=2)
+
+    columns = ColumnarArchive(tmp_path / "archive").to_frame_columns()
+    assert list(columns['city']) == ["london", "paris"]
+    assert columns['recorded_at'].tolist() == [100, 200]
+    assert columns['avg_temperature'].tolist() == [15.5, 20.5]
+    assert list(columns['source']) == ["web+api", None]
+
+
+@pytest.mark.database
+def test_archive_is_memory_mapped(db_helper, tmp_path):
+    """Test that uncompressed archives are read through memory mapping."""
+    db_helper.insert_weather_data("MapCity", {"temperature_web": 10.0, "feels_like_web": 9.0},
+                                  {"temperature_api": 12.0, "feels_like_api": 11.0})
+    db_helper.export_archive(tmp_path / "archive")
+
+    columns = ColumnarArchive(tmp_path / "archive").read_columns()
+    assert isinstance(columns['temperature_api'], np.memmap)
+    assert columns['avg_temperature'][0] == 11.0
+
+
+@pytest.mark.database
+def test_get_weather_history(db_helper):
+    """Test that every insert is kept in the history, even for the same city."""
+    for temperature in (10.0, 12.0):
+        db_helper.insert_weather_data("HistoryCity", {"temperature_web": temperature, "feels_like_web": 9.0},
+                                      {"temperature_api": 11.0, "feels_like_api": 10.0})
+
+    history = db_helper.get_weather_history()
+    assert [row['temperature_web'] for row in history] == [10.0, 12.0]
+    assert all(isinstance(row['recorded_at'], int) for row in history)
+    assert db_helper.get_weather_history(since=history[0]['recorded_at'] + 3600) == []
+    assert len(db_helper.get_all_weather_data()) == 1
+
+
+@pytest.mark.database
+def test_insert_and_get_readings(db_helper):
+    """Tests that readings are stored in bulk with their metadata and read back as records."""
+    readings = [WeatherReading("london", 15, 14, 16.0, 15.5, 1_700_000_000.5, "web+api"),
+                WeatherReading("rome", 28, 30, 26.0, 27.0, 1_700_000_100.0, "web+api")]
+
+    assert db_helper.insert_readings(readings) == 2
+    assert db_helper.insert_readings([]) == 0
+
+    assert sorted(db_helper.get_all_readings()) == readings
+    assert db_helper.get_weather_data("london")['avg_temperature'] == 15.5
+    history = db_helper.conn.execute("SELECT city, recorded_at, source FROM weather_history ORDER BY id").fetchall()
+    assert history == [("london", 1_700_000_000, "web+api"), ("rome", 1_700_000_100, "web+api")]
+
+
+@pytest.mark.database
+def test_create_tables_adds_reading_metadata_columns(db_helper):
+    """Tests that a weather_data table from before the reading metadata gets the new columns."""
+    db_helper.conn.execute("DROP TABLE weather_data")
+    db_helper.conn.execute("CREATE TABLE weather_data (city TEXT PRIMARY KEY, temperature_web REAL, "
+                           "feels_like_web REAL, temperature_api REAL, feels_like_api REAL, avg_temperature REAL)")
+    db_helper.conn.execute("INSERT INTO weather_data VALUES ('paris', 20, 19, 25, 24, 22.5)")
+
+    db_helper.create_tables()
+
+    assert db_helper.get_all_readings() == [WeatherReading("paris", 20, 19, 25, 24)]
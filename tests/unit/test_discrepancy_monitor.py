@@ -0,0 +1,84 @@
+import statistics
+
+import pytest
+
+from utilities.db_helpers import DatabaseHelper
+from utilities.discrepancy_monitor import RunningStats, StreamingDiscrepancyDetector
+from utilities.models import WeatherReading
+
+
+@pytest.mark.unit
+def test_running_stats_match_batch_statistics():
+    """Tests that Welford's updates give the same mean and variance as a batch computation."""
+    values = [0.5, 1.25, 3.0, 0.0, 2.5, 1.0]
+    stats = RunningStats()
+    for value in values:
+        stats.update(value)
+
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(statistics.mean(values))
+    assert stats.variance == pytest.approx(statistics.variance(values))
+
+
+@pytest.mark.unit
+def test_detector_flags_threshold_breaches_and_outliers():
+    """Tests immediate threshold and outlier alerts, with the outlier scored before it is absorbed."""
+    received = []
+    detector = StreamingDiscrepancyDetector(threshold=3.0, z_threshold=3.0, min_samples=5,
+                                            on_alert=received.append)
+
+    for temperature_api in [20.5, 21.0, 20.0, 20.5, 21.0]:
+        assert detector.update("haifa", 20.0, temperature_api) == []
+    alerts = detector.update("haifa", 20.0, 24.0)
+
+    assert [alert['type'] for alert in alerts] == ['threshold', 'outlier']
+    assert alerts[1]['z_score'] > 3.0
+    assert received == alerts == detector.alerts
+    assert detector.update("haifa", None, 20.0) == []
+    assert detector.stats["haifa"].count == 6
+
+
+@pytest.mark.database
+def test_detector_state_survives_restart(db_helper):
+    """Tests that the running statistics are persisted and reloaded by a new detector."""
+    first = StreamingDiscrepancyDetector(db_helper)
+    for temperature_api in [10.0, 11.0, 12.0]:
+        first.update("oslo", 10.0, temperature_api)
+
+    restarted = StreamingDiscrepancyDetector(db_helper)
+    assert restarted.stats["oslo"].count == 3
+    assert restarted.stats["oslo"].mean == pytest.approx(1.0)
+    assert restarted.stats["oslo"].variance == pytest.approx(first.stats["oslo"].variance)
+
+
+@pytest.mark.database
+def test_concurrent_detectors_merge_their_state(tmp_path):
+    """Tests that two detectors on one database file both contribute, instead of overwriting each other."""
+    first_db, second_db = DatabaseHelper(str(tmp_path / "state.db")), DatabaseHelper(str(tmp_path / "state.db"))
+    first, second = StreamingDiscrepancyDetector(first_db), StreamingDiscrepancyDetector(second_db)
+    values = [1.0, 2.0, 4.0, 7.0]
+    for index, value in enumerate(values):
+        (first if index % 2 else second).update("oslo", 10.0, 10.0 + value)
+
+    count, mean, m2 = first_db.load_discrepancy_state()["oslo"]
+    assert count == len(values)
+    assert mean == pytest.approx(statistics.mean(values))
+    assert m2 / (count - 1) == pytest.approx(statistics.variance(values))
+    # Each detector picks up the other's readings with its own
+    assert first.stats["oslo"].count == 4 and second.stats["oslo"].count == 3
+    first_db.close()
+    second_db.close()
+
+
+@pytest.mark.database
+def test_stored_readings_advance_the_state_in_their_transaction(db_helper):
+    """Tests that insert_readings() advances the state, and the detector only reads it back."""
+    detector = StreamingDiscrepancyDetector(db_helper)
+    for temperature_api in [12.0, 13.0]:
+        reading = WeatherReading.from_sources("oslo", {"temperature_web": 10.0, "feels_like_web": 9.0},
+                                              {"temperature_api": temperature_api, "feels_like_api": 11.0})
+        assert db_helper.insert_readings([reading])
+        detector.update("oslo", reading.temperature_web, reading.temperature_api, stored=True)
+
+    assert db_helper.load_discrepancy_state() == {"oslo": (2, pytest.approx(2.5), pytest.approx(0.5))}
+    assert detector.stats["oslo"].count == 2
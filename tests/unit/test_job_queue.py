@@ -0,0 +1,215 @@
+import asyncio
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from utilities.collection_worker import CollectionWorker, on_network_filesystem
+from utilities.db_helpers import DatabaseHelper
+from utilities.models import WeatherReading
+
+
+def _reading(city):
+    return WeatherReading(city, 20, 19, 21.0, 20.0, time.time(), "test")
+
+
+@pytest.fixture
+def queue_db(tmp_path):
+    """Provides the path of a fresh SQLite file shared by several connections."""
+    return str(tmp_path / "queue.db")
+
+
+@pytest.mark.database
+def test_concurrent_claims_never_overlap(queue_db):
+    """Tests that two connections claiming from one file get disjoint batches."""
+    first, second = DatabaseHelper(queue_db), DatabaseHelper(queue_db)
+    first.enqueue_cities([f"city {i}" for i in range(10)])
+
+    batch_a = first.claim_jobs("worker-a", batch_size=4)
+    batch_b = second.claim_jobs("worker-b", batch_size=4)
+    batch_c = second.claim_jobs("worker-b", batch_size=4)
+
+    assert len(batch_a) == len(batch_b) == 4 and len(batch_c) == 2
+    assert not set(batch_a) & set(batch_b) and not set(batch_b) & set(batch_c)
+    assert second.claim_jobs("worker-b") == []
+    assert first.get_job_counts() == {DatabaseHelper.JOB_LEASED: 10}
+    first.close()
+    second.close()
+
+
+@pytest.mark.database
+def test_expired_leases_are_requeued_and_lost_results_dropped(queue_db):
+    """Tests lease expiry, re-queueing, the attempt limit, and that only the lease holder can complete."""
+    db = DatabaseHelper(queue_db)
+    db.enqueue_cities(["london", "paris"])
+
+    assert db.claim_jobs("crashed", batch_size=2, lease_seconds=-1) == ["london", "paris"]
+    assert db.claim_jobs("healthy", batch_size=1, lease_seconds=60) == ["london"]
+
+    # The crashed worker comes back after its lease went to another worker
+    assert db.complete_jobs("crashed", [_reading("london")]) == 0
+    assert db.complete_jobs("healthy", [_reading("london")]) == 1
+    assert [reading.city for reading in db.get_all_readings()] == ["london"]
+
+    # paris expired as well: it fails for good once it used up its attempts
+    assert db.claim_jobs("healthy", lease_seconds=-1, max_attempts=2) == ["paris"]
+    assert db.claim_jobs("healthy", max_attempts=2) == []
+    assert db.get_job_counts() == {DatabaseHelper.JOB_DONE: 1, DatabaseHelper.JOB_FAILED: 1}
+    db.close()
+
+
+@pytest.mark.database
+def test_heartbeat_extends_leases_and_failed_cities_are_retried(queue_db):
+    """Tests that a heartbeat keeps a lease alive and that a failed city is queued again."""
+    db = DatabaseHelper(queue_db)
+    db.enqueue_cities(["rome"])
+    assert db.claim_jobs("slow", lease_seconds=0.2) == ["rome"]
+    db.heartbeat("slow", lease_seconds=60)
+    time.sleep(0.3)
+    assert db.claim_jobs("other") == []
+
+    assert db.complete_jobs("slow", [], failed_cities=["rome"]) == 0
+    assert db.get_job_counts() == {DatabaseHelper.JOB_PENDING: 1}
+    assert db.conn.execute("SELECT worker_id FROM collection_workers").fetchall() == [("slow",)]
+    db.close()
+
+
+def _run_worker(db_name, crash):
+    """Worker process body: collects with a fake collector, or leases a batch and dies if crash is set."""
+    worker = CollectionWorker(db_name, batch_size=3, lease_seconds=1.0, poll_interval=0.1)
+    if crash:
+        worker.db_helper.claim_jobs(worker.worker_id, batch_size=5, lease_seconds=1.0)
+        os._exit(1)
+
+    async def fake_collect(cities, store):
+        await asyncio.sleep(0.01)
+        stored = [reading for reading in map(_reading, cities) if await store([reading])]
+        return stored, [city for city in cities if city not in {reading.city for reading in stored}]
+
+    worker.orchestrator.collect_readings = fake_collect
+    asyncio.run(worker.run())
+    worker.close()
+
+
+@pytest.mark.database
+def test_worker_processes_share_the_queue_without_duplicates_or_losses(queue_db):
+    """Runs several worker processes and one crashing worker against one SQLite file."""
+    cities = [f"city {i:03d}" for i in range(60)]
+    db = DatabaseHelper(queue_db)
+    db.enqueue_cities(cities)
+
+    crasher = multiprocessing.Process(target=_run_worker, args=(queue_db, True))
+    crasher.start()
+    crasher.join()
+    workers = [multiprocessing.Process(target=_run_worker, args=(queue_db, False)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    assert db.get_job_counts() == {DatabaseHelper.JOB_DONE: len(cities)}
+    assert sorted(reading.city for reading in db.get_all_readings()) == cities
+    assert db.conn.execute("SELECT COUNT(*) FROM weather_history").fetchone()[0] == len(cities)
+    jobs_done = db.conn.execute("SELECT SUM(jobs_done), COUNT(*) FROM collection_workers").fetchone()
+    assert jobs_done == (len(cities), 3)
+    db.close()
+
+
+@pytest.mark.database
+def test_worker_refuses_database_on_network_filesystem(queue_db, mocker):
+    """Tests that the queue is limited to one host by refusing network filesystem databases."""
+    mounts = "server:/export /mnt/shared nfs4 rw 0 0\n/dev/sda1 / ext4 rw 0 0\n"
+    mocker.patch("builtins.open", mocker.mock_open(read_data=mounts))
+    assert on_network_filesystem("/mnt/shared/queue.db")
+    assert not on_network_filesystem("/mnt/shared-local/queue.db")
+    assert not on_network_filesystem(queue_db)
+    mocker.stopall()
+
+    mocker.patch("utilities.collection_worker.on_network_filesystem", return_value=True)
+    with pytest.raises(RuntimeError, match="network filesystem"):
+        CollectionWorker(queue_db)
+
+
+@pytest.mark.database
+def test_worker_heartbeat_runs_off_the_event_loop(queue_db):
+    """Tests that a heartbeat waiting for the write lock does not block the event loop."""
+    worker = CollectionWorker(queue_db, lease_seconds=60, worker_id="w1")
+    blocker = DatabaseHelper(queue_db)
+    blocker.conn.execute("BEGIN IMMEDIATE")
+
+    async def beat_while_locked():
+        heartbeat = asyncio.create_task(worker._heartbeat())
+        await asyncio.sleep(0.2)
+        # The loop stays responsive while the heartbeat thread waits for the lock
+        assert not heartbeat.done()
+        blocker.conn.rollback()
+        await heartbeat
+
+    asyncio.run(beat_while_locked())
+    assert blocker.conn.execute("SELECT worker_id FROM collection_workers").fetchall() == [("w1",)]
+    blocker.close()
+    worker.close()
+
+
+@pytest.mark.database
+def test_worker_updates_the_detector_only_for_jobs_it_completed(queue_db):
+    """Tests that a reading whose lease was lost neither reaches the database nor the detector state."""
+    db = DatabaseHelper(queue_db)
+    db.enqueue_cities(["london", "paris"])
+    worker = CollectionWorker(queue_db, lease_seconds=60)
+
+    async def fake_scrape(city):
+        return {"temperature_web": 20, "feels_like_web": 19}
+
+    async def fake_api(city):
+        if city == "paris":
+            # Another worker took paris over after this worker's lease expired, and finished it
+            with db.conn:
+                db.conn.execute("UPDATE collection_jobs SET worker_id = 'other', status = ? WHERE city = 'paris'",
+                                (DatabaseHelper.JOB_DONE,))
+        return {"temperature_api": 30, "feels_like_api": 29}
+
+    worker.orchestrator.web_scraper._scrape_weather_data = fake_scrape
+    worker.orchestrator.api_helper.get_current_api_weather_async = fake_api
+    assert asyncio.run(worker.run()) == 1
+
+    assert [reading.city for reading in db.get_all_readings()] == ["london"]
+    assert list(db.load_discrepancy_state()) == ["london"]
+    worker.close()
+    db.close()
+
+
+@pytest.mark.database
+def test_worker_queue_operations_do_not_block_the_event_loop(queue_db):
+    """Tests that a claim waiting for another worker's write lock leaves the event loop running."""
+    db = DatabaseHelper(queue_db)
+    db.enqueue_cities(["london"])
+    worker = CollectionWorker(queue_db, lease_seconds=60, worker_id="w1")
+    collected = []
+
+    async def fake_collect(cities, store):
+        collected.extend(cities)
+        assert await store([_reading(city) for city in cities]) == len(cities)
+        return [], []
+
+    worker.orchestrator.collect_readings = fake_collect
+
+    async def run_while_locked():
+        ticks = 0
+        db.conn.execute("BEGIN IMMEDIATE")
+        running = asyncio.create_task(worker.run())
+        while ticks < 10:
+            await asyncio.sleep(0.02)
+            ticks += 1
+        # The loop kept ticking although the worker's claim is stuck behind the lock
+        assert not running.done() and collected == []
+        db.conn.rollback()
+        return await running
+
+    asyncio.run(run_while_locked())
+    assert collected == ["london"]
+    assert db.get_job_counts() == {DatabaseHelper.JOB_DONE: 1}
+    worker.close()
+    db.close()
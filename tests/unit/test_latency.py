@@ -0,0 +1,192 @@
+import asyncio
+import threading
+
+import pytest
+
+from helpers.latency import HedgeBudget, LatencyTracker, hedged
+from utilities.api_helpers import ApiHelper
+
+
+@pytest.mark.unit
+def test_latency_tracker_derives_bounded_timeouts():
+    """Tests that timeouts follow the observed tail, stay within floor and default, and need enough samples."""
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for _ in range(9):
+        tracker.record(0.5)
+    assert tracker.timeout(default=60, floor=5) == 60
+    assert tracker.hedge_delay() is None
+
+    tracker.record(0.5)
+    assert tracker.timeout(default=60, floor=5) == 5  # 3 x p99 is below the floor
+    for _ in range(100):
+        tracker.record(4.0)
+    assert tracker.timeout(default=60, floor=5) == pytest.approx(12.0)
+    assert tracker.hedge_delay() == pytest.approx(4.0)
+    for _ in range(5):
+        tracker.record(100.0)
+    assert tracker.timeout(default=60, floor=5) == 60
+    assert len(tracker) == 100
+
+
+@pytest.mark.unit
+def test_latency_tracker_refreshes_the_sorted_window_on_record():
+    """Tests that percentiles served from the cached sorted window follow new samples."""
+    tracker = LatencyTracker(window=3, min_samples=1)
+    for seconds in (3.0, 1.0, 2.0):
+        tracker.record(seconds)
+    assert tracker.percentile(100) == pytest.approx(3.0)
+    assert tracker.percentile(0) == pytest.approx(1.0)
+    # Evicts 3.0 from the window
+    tracker.record(0.5)
+    assert tracker.percentile(100) == pytest.approx(2.0)
+    assert tracker.percentile(0) == pytest.approx(0.5)
+
+
+@pytest.mark.unit
+def test_hedge_budget_caps_extra_attempts():
+    """Tests that hedges are limited to the burst plus the ratio of primary requests."""
+    budget = HedgeBudget(ratio=0.1, burst=1)
+    for _ in range(10):
+        budget.record_request()
+    assert budget.try_acquire()
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+
+
+def _attempts(durations, results, started, cancelled):
+    """Builds an attempt factory whose n-th attempt sleeps durations[n] and returns results[n]."""
+    async def attempt(index):
+        started.append(index)
+        try:
+            await asyncio.sleep(durations[index])
+            return results[index]
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+    return lambda: attempt(len(started))
+
+
+@pytest.mark.unit
+def test_hedged_backup_wins_and_straggler_is_cancelled():
+    """Tests that a hedged attempt replaces a straggling primary, which gets cancelled."""
+    started, cancelled = [], []
+    attempt = _attempts([5.0, 0.01], ["primary", "backup"], started, cancelled)
+
+    result = asyncio.run(hedged(attempt, 0.05, HedgeBudget(), 'test'))
+
+    assert result == "backup"
+    assert started == [0, 1]
+    assert cancelled == [0]
+
+
+@pytest.mark.unit
+def test_hedged_skips_backup_for_fast_primary_or_empty_budget():
+    """Tests that no second attempt starts when the primary is fast or the budget is exhausted."""
+    started, cancelled = [], []
+    attempt = _attempts([0.01, 0.01], ["primary", "backup"], started, cancelled)
+    assert asyncio.run(hedged(attempt, 0.5, HedgeBudget(), 'test')) == "primary"
+    assert started == [0]
+
+    started, cancelled = [], []
+    attempt = _attempts([0.1, 0.01], ["primary", "backup"], started, cancelled)
+    assert asyncio.run(hedged(attempt, 0.02, HedgeBudget(ratio=0, burst=0), 'test')) == "primary"
+    assert started == [0]
+
+
+@pytest.mark.unit
+def test_hedged_ignores_failed_backup():
+    """Tests that a backup finishing first without a usable result does not win."""
+    started, cancelled = [], []
+    attempt = _attempts([0.1, 0.01], [{"value": 1}, {"value": None}], started, cancelled)
+
+    result = asyncio.run(hedged(attempt, 0.02, HedgeBudget(), 'test',
+                                is_success=lambda data: data["value"] is not None))
+
+    assert result == {"value": 1}
+    assert cancelled == []
+
+
+@pytest.mark.unit
+def test_hedged_reads_the_delay_while_the_primary_runs():
+    """Tests that a delay unknown when the primary starts still triggers a hedge once it is known."""
+    started, cancelled = [], []
+    attempt = _attempts([5.0, 0.01], ["primary", "backup"], started, cancelled)
+    tracker = LatencyTracker(min_samples=1)
+
+    async def run():
+        delay = tracker.hedge_delay_when_known()
+        hedging = asyncio.create_task(hedged(attempt, delay, HedgeBudget(), 'test'))
+        await asyncio.sleep(0.05)
+        assert started == [0]
+        # Another request finishes meanwhile, from a worker thread, and provides the first sample
+        await asyncio.to_thread(tracker.record, 0.01)
+        return await hedging
+
+    assert asyncio.run(run()) == "backup"
+    assert started == [0, 1]
+
+
+@pytest.mark.unit
+def test_hedged_runs_the_backup_attempt_and_abandoned_work_holds_the_budget():
+    """Tests the separate backup attempt, and that uncancellable abandoned work blocks further hedges."""
+    budget = HedgeBudget(ratio=0, burst=1)
+
+    async def slow():
+        await asyncio.sleep(5)
+
+    async def run():
+        backup_started = []
+
+        async def backup():
+            backup_started.append(True)
+            return "backup"
+
+        assert await hedged(slow, 0.01, budget, 'test', backup_attempt=backup) == "backup"
+        assert backup_started == [True]
+
+        fresh_budget = HedgeBudget(ratio=0, burst=1)
+        work = asyncio.get_running_loop().create_future()
+        fresh_budget.abandon(work)
+        assert not fresh_budget.try_acquire()
+        work.set_result(None)
+        await asyncio.sleep(0)
+        assert fresh_budget.try_acquire()
+
+    asyncio.run(run())
+
+
+@pytest.mark.unit
+def test_cancelled_api_request_is_charged_until_its_thread_ends(mocker):
+    """Tests that a losing API request keeps holding the hedge budget while its thread still runs."""
+    api_helper = ApiHelper()
+    release = threading.Event()
+    mocker.patch.object(api_helper, "_fetch_api_weather", side_effect=lambda city: release.wait(5))
+
+    async def run():
+        attempt = asyncio.create_task(api_helper._fetch_in_thread("london"))
+        await asyncio.sleep(0.05)
+        attempt.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await attempt
+        assert api_helper.hedge_budget.abandoned == 1
+        release.set()
+        for _ in range(100):
+            if not api_helper.hedge_budget.abandoned:
+                break
+            await asyncio.sleep(0.01)
+        assert api_helper.hedge_budget.abandoned == 0
+
+    asyncio.run(run())
+
+
+@pytest.mark.unit
+def test_latency_tracker_counts_failures_as_censored_samples():
+    """Tests that a block that raises still adds its duration to the tail, flagged as censored."""
+    tracker = LatencyTracker(min_samples=1)
+    with tracker.measure():
+        pass
+    with pytest.raises(TimeoutError):
+        with tracker.measure():
+            raise TimeoutError
+    assert len(tracker) == 2
+    assert tracker.censored == 1
@@ -0,0 +1,99 @@
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+from helpers import logger as logger_module
+from helpers.logger import PER_CITY, SamplingFilter, enable_queued_logging, setup_logger, stop_queued_logging
+
+
+@pytest.fixture
+def queued_log_file(tmp_path):
+    """Enables queued logging into a temporary file and stops it after the test."""
+    log_file = tmp_path / "queued.log"
+    enable_queued_logging(log_file=str(log_file))
+    yield log_file
+    stop_queued_logging()
+
+
+@pytest.mark.unit
+def test_queued_loggers_share_one_file(queued_log_file):
+    """Tests that queued loggers only enqueue, and that all records land in one shared file."""
+    first = setup_logger("test_queued_first")
+    second = setup_logger("test_queued_second")
+    assert [type(handler) for handler in first.handlers] == [QueueHandler]
+
+    first.info("first message")
+    second.warning("second message")
+    stop_queued_logging()
+
+    content = queued_log_file.read_text(encoding='utf-8')
+    assert "test_queued_first - INFO - first message" in content
+    assert "test_queued_second - WARNING - second message" in content
+
+
+@pytest.mark.unit
+def _record(level, per_city=True):
+    record = logging.LogRecord("x", level, __file__, 1, "city", None, None)
+    if per_city:
+        record.__dict__.update(PER_CITY)
+    return record
+
+
+@pytest.mark.unit
+def test_sampling_filter_keeps_warnings_and_lifecycle_messages():
+    """Tests that sampling thins per-city INFO records but never drops warnings or unmarked messages."""
+    sampling = SamplingFilter(sample_rate=0.25)
+    info = _record(logging.INFO)
+
+    kept = [sampling.filter(info) for _ in range(8)]
+    assert kept.count(True) == 2
+    assert sampling.dropped == 6
+    assert all(sampling.filter(_record(logging.WARNING)) for _ in range(3))
+    assert all(sampling.filter(_record(logging.INFO, per_city=False)) for _ in range(3))
+    assert sampling.dropped == 6
+
+
+@pytest.mark.unit
+def test_rate_limit_caps_records_per_second():
+    """Tests the per-second cap of the sampling filter."""
+    sampling = SamplingFilter(max_per_second=3)
+    info = _record(logging.INFO)
+    assert [sampling.filter(info) for _ in range(5)] == [True, True, True, False, False]
+
+
+@pytest.mark.unit
+def test_loggers_keep_writing_after_queued_logging_stops(queued_log_file, mocker):
+    """Tests that loggers created in queued mode write directly once it stops, and atexit is registered once."""
+    logger = setup_logger("test_queued_after_stop")
+    stop_queued_logging()
+
+    assert not any(isinstance(handler, QueueHandler) for handler in logger.handlers)
+    logger.warning("logged after stop")
+    for handler in logger.handlers:
+        handler.flush()
+    assert "test_queued_after_stop - WARNING - logged after stop" in queued_log_file.read_text(encoding='utf-8')
+
+    register = mocker.patch("helpers.logger.atexit.register")
+    enable_queued_logging(log_file=str(queued_log_file))
+    stop_queued_logging()
+    register.assert_not_called()
+
+
+@pytest.mark.unit
+def test_exit_hook_closes_shared_handlers_and_blocks_re_enabling(tmp_path, monkeypatch):
+    """Tests that the final stop closes the file handler and that LOG_QUEUE cannot turn the mode back on."""
+    monkeypatch.setattr(logger_module, "_shut_down", False)
+    enable_queued_logging(log_file=str(tmp_path / "final.log"))
+    logger = setup_logger("test_queued_exit_hook")
+    stop_queued_logging()
+    file_handler = next(h for h in logger.handlers if isinstance(h, logging.FileHandler))
+
+    logger_module._shutdown_queued_logging()
+    assert file_handler.stream is None
+
+    monkeypatch.setenv("LOG_QUEUE", "1")
+    setup_logger("test_queued_after_exit")
+    assert logger_module._queue_listener is None
+    for handler in setup_logger("test_queued_after_exit").handlers:
+        handler.close()
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+from helpers.loop_monitor import LoopMonitor
+from utilities.data_analyzer import AppOrchestrator
+
+
+def _blocking_call(seconds):
+    time.sleep(seconds)
+
+
+async def _run_monitored(monitor, workload):
+    await monitor.start()
+    try:
+        await workload()
+    finally:
+        return await monitor.stop()
+
+
+@pytest.mark.unit
+def test_loop_monitor_reports_blocking_call_with_stack():
+    """Tests that a synchronous sleep inside a coroutine is reported with the offending location."""
+    async def workload():
+        await asyncio.sleep(0.1)
+        _blocking_call(0.3)
+        await asyncio.sleep(0.1)
+
+    summary = asyncio.run(_run_monitored(LoopMonitor(threshold=0.1, interval=0.02), workload))
+
+    assert summary['stalls'] == 1
+    assert summary['blocked_total'] == pytest.approx(0.3, abs=0.1)
+    assert summary['max_lag'] >= 0.2
+    worst = summary['worst_offenders'][0]
+    assert "_blocking_call" in worst['location']
+    assert "workload" in worst['stack']
+
+
+@pytest.mark.unit
+def test_loop_monitor_quiet_for_non_blocking_workload():
+    """Tests that awaiting in small steps is not reported as blocking."""
+    async def workload():
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+
+    summary = asyncio.run(_run_monitored(LoopMonitor(threshold=0.1, interval=0.02), workload))
+
+    assert summary['samples'] > 0
+    assert summary['stalls'] == 0
+    assert summary['worst_offenders'] == []
+
+
+@pytest.mark.unit
+def test_orchestrator_monitors_loop_when_enabled(db_helper):
+    """Tests that the orchestrator attaches the loop summary of a monitored collection run."""
+    orchestrator = AppOrchestrator(cities=["london"], monitor_loop=True)
+    orchestrator.db_helper = db_helper
+
+    async def fake_scrape(city):
+        return {"temperature_web": 20, "feels_like_web": 19}
+
+    async def slow_api(city):
+        time.sleep(0.3)
+        return {"temperature_api": 21, "feels_like_api": 20}
+
+    orchestrator.web_scraper._scrape_weather_data = fake_scrape
+    orchestrator.api_helper.get_current_api_weather_async = slow_api
+    asyncio.run(orchestrator.run_data_collection_async())
+
+    assert orchestrator.loop_summary['stalls'] >= 1
+    assert "slow_api" in orchestrator.loop_summary['worst_offenders'][0]['location']
+    assert len(db_helper.get_all_weather_data()) == 1
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from helpers.metrics import MetricsRegistry, get_metrics
+from utilities.report_generator import ReportGeneration
+
+
+@pytest.fixture
+def metrics():
+    """Provides the shared registry, emptied before and after the test."""
+    registry = get_metrics()
+    registry.reset()
+    yield registry
+    registry.reset()
+
+
+@pytest.mark.unit
+def test_summary_percentiles_and_counters():
+    """Tests the latency percentiles and the outcome counters of a registry."""
+    registry = MetricsRegistry()
+    for seconds in range(1, 101):
+        registry.observe('api_call', seconds / 100)
+    registry.increment('api', 'success', amount=3)
+    registry.increment('api', 'failure')
+
+    summary = registry.summary()
+    stats = summary['stages']['api_call']
+    assert stats['count'] == 100
+    assert stats['p50'] == pytest.approx(0.505)
+    assert stats['p95'] == pytest.approx(0.9505)
+    assert stats['max'] == pytest.approx(1.0)
+    assert summary['counters'] == {'api': {'failure': 1, 'success': 3}}
+
+
+@pytest.mark.unit
+def test_exports(tmp_path):
+    """Tests the JSON and Prometheus exports and the HTML section."""
+    registry = MetricsRegistry()
+    with registry.timer('db_write'):
+        pass
+    registry.increment('city', 'success')
+
+    json_path, prom_path = registry.export(tmp_path)
+    assert json.loads(open(json_path, encoding='utf-8').read())['stages']['db_write']['count'] == 1
+    prometheus = open(prom_path, encoding='utf-8').read()
+    assert '# TYPE weather_stage_duration_seconds histogram' in prometheus
+    assert 'weather_stage_duration_seconds_bucket{stage="db_write",le="+Inf"} 1' in prometheus
+    assert 'weather_stage_duration_seconds_count{stage="db_write"} 1' in prometheus
+    assert 'weather_operations_total{operation="city",outcome="success"} 1' in prometheus
+    assert '<td>db_write</td><td>1</td>' in registry.to_html()
+
+
+@pytest.mark.unit
+def test_prometheus_histogram_buckets_are_cumulative():
+    """Tests that each bucket counts the observations up to and including its bound."""
+    registry = MetricsRegistry()
+    for seconds in (0.004, 0.1, 0.3, 7.0, 120.0):
+        registry.observe('scrape_navigation', seconds)
+
+    prometheus = registry.to_prometheus()
+    bucket = 'weather_stage_duration_seconds_bucket{{stage="scrape_navigation",le="{}"}} {}'
+    for bound, count in (('0.005', 1), ('0.1', 2), ('0.25', 2), ('0.5', 3), ('10.0', 4), ('60.0', 4), ('+Inf', 5)):
+        assert bucket.format(bound, count) in prometheus
+    assert 'weather_stage_duration_seconds_sum{stage="scrape_navigation"} 127.404000' in prometheus
+
+
+@pytest.mark.database
+def test_components_record_stage_timings(db_helper, metrics, tmp_path):
+    """Tests that the DB helper and the report generator report into the shared registry."""
+    db_helper.insert_weather_data("MetricsCity", {"temperature_web": 10.0, "feels_like_web": 9.0},
+                                  {"temperature_api": 12.0, "feels_like_api": 11.0})
+    ReportGeneration(db_helper.get_all_weather_data()).generate_html_report(filename=tmp_path / "report.html")
+
+    summary = metrics.summary()
+    assert summary['stages']['db_write']['count'] == 1
+    assert summary['stages']['report_render']['count'] == 1
+    assert summary['counters']['db_write'] == {'success': 1}
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from utilities.models import WeatherReading, readings_to_columns
+
+
+@pytest.mark.unit
+def test_reading_from_sources():
+    """Tests that a reading combines both source dictionaries and derives the average."""
+    reading = WeatherReading.from_sources("london", {"temperature_web": 15, "feels_like_web": 14},
+                                          {"temperature_api": 16.0, "feels_like_api": 15.5}, fetched_at=100.0)
+
+    assert reading == ("london", 15, 14, 16.0, 15.5, 100.0, WeatherReading.DEFAULT_SOURCE)
+    assert reading.is_complete
+    assert reading.avg_temperature == 15.5
+    assert not hasattr(reading, '__dict__')
+
+    missing = WeatherReading.from_sources("rome", {"temperature_web": None, "feels_like_web": None},
+                                          {"temperature_api": 20.0, "feels_like_api": 19.0})
+    assert not missing.is_complete
+    assert missing.avg_temperature is None
+    assert missing.fetched_at is not None
+
+
+@pytest.mark.unit
+def test_readings_to_columns():
+    """Tests the transposition into typed columns, with NaN for missing values."""
+    readings = [WeatherReading("london", 15, 14, 16.0, 15.5, 100.0, "web"),
+                WeatherReading("rome", None, None, 20.0, 19.0)]
+
+    columns = readings_to_columns(readings)
+
+    assert columns['city'].tolist() == ["london", "rome"]
+    assert columns['source'].tolist() == ["web", None]
+    assert columns['temperature_web'].dtype == np.float64
+    assert np.isnan(columns['temperature_web'][1])
+    assert columns['avg_temperature'][0] == 15.5
+    assert np.isnan(columns['fetched_at'][1])
+    assert all(len(values) == 0 for values in readings_to_columns([]).values())
@@ -0,0 +1,47 @@
+import asyncio
+import json
+import pstats
+
+import pytest
+
+from helpers.profiler import RunProfiler
+
+
+async def _busy_pipeline(profiler):
+    profiler.instrument_loop()
+
+    async def fetch(delay):
+        await asyncio.sleep(delay)
+        return sum(range(20000))
+
+    await asyncio.gather(*(asyncio.create_task(fetch(0.01 * i)) for i in range(3)))
+    profiler.stage("collection")
+    payload = [str(i) * 10 for i in range(20000)]
+    profiler.stage("report")
+    return payload
+
+
+@pytest.mark.unit
+def test_profiler_writes_all_outputs(tmp_path):
+    """Tests that a profiled run produces CPU, collapsed-stack, task and memory outputs."""
+    profiler = RunProfiler(output_dir=str(tmp_path), sample_interval=0.001)
+    profiler.start()
+    try:
+        asyncio.run(_busy_pipeline(profiler))
+    finally:
+        paths = profiler.stop()
+
+    assert pstats.Stats(paths['cpu']).total_calls > 0
+
+    collapsed = open(paths['collapsed'], encoding='utf-8').read().splitlines()
+    assert collapsed and all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed)
+
+    tasks = json.load(open(paths['tasks'], encoding='utf-8'))
+    fetch_tasks = [task for task in tasks if task['task'].endswith('fetch')]
+    assert len(fetch_tasks) == 3
+    assert fetch_tasks[0]['duration'] >= 0.02
+
+    memory = open(paths['memory'], encoding='utf-8').read()
+    assert "== Stage ending at 'collection'" in memory
+    assert "== Stage ending at 'report'" in memory
+    assert "test_profiler.py" in memory
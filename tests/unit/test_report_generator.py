@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utilities.models import WeatherReading
+from utilities.report_generator import ReportGeneration
+
+
+@pytest.fixture
+def report_rows():
+    """Provides a small set of database-like rows with one clear discrepancy."""
+    return [
+        {"city": "london", "temperature_web": 15.0, "feels_like_web": 14.0, "temperature_api": 15.5,
+         "feels_like_api": 14.5, "avg_temperature": 15.25},
+        {"city": "paris", "temperature_web": 20.0, "feels_like_web": 19.0, "temperature_api": 25.0,
+         "feels_like_api": 24.0, "avg_temperature": 22.5},
+        {"city": "rome", "temperature_web": 28.0, "feels_like_web": 30.0, "temperature_api": 26.0,
+         "feels_like_api": 27.0, "avg_temperature": 27.0},
+        {"city": "<script>", "temperature_web": None, "feels_like_web": None, "temperature_api": 10.0,
+         "feels_like_api": 9.0, "avg_temperature": None},
+    ]
+
+
+@pytest.mark.unit
+def test_streaming_report_is_paginated(report_rows, tmp_path):
+    """Tests that the streaming writer splits the full data log into linked pages."""
+    report_file = tmp_path / "report.html"
+    report_gen = ReportGeneration(report_rows + [
+        {"city": "<script>alert(1)</script>", "temperature_web": 5.0, "feels_like_web": 4.0,
+         "temperature_api": 5.0, "feels_like_api": 4.0, "avg_temperature": 5.0}])
+
+    pages = report_gen.generate_streaming_html_report(threshold=3.0, filename=report_file, rows_per_page=2)
+
+    assert len(pages) == 2
+    index = report_file.read_text(encoding='utf-8')
+    assert "<h1>Weather Data Analysis Report</h1>" in index
+    assert "report_pages/page_0001.html" in index and "report_pages/page_0002.html" in index
+    assert "<td>paris</td><td>20.00</td><td>25.00</td><td>5.00</td>" in index
+    assert "<td>london</td>" not in index.split("Full Data Log")[0]
+
+    first_page = (tmp_path / "report_pages" / "page_0001.html").read_text(encoding='utf-8')
+    second_page = (tmp_path / "report_pages" / "page_0002.html").read_text(encoding='utf-8')
+    assert "london" in first_page and "paris" in first_page
+    assert "rome" in second_page and 'href="page_0001.html"' in second_page
+    # Rows without both temperatures are dropped, and names are always escaped
+    assert "<td>&lt;script&gt;alert(1)&lt;/script&gt;</td>" in second_page
+    assert "&lt;/script&gt; (2 rows)" in index
+    assert "<script>" not in index + first_page + second_page
+
+
+@pytest.mark.unit
+def test_streaming_report_replaces_stale_pages_and_checks_page_size(report_rows, tmp_path):
+    """Tests that pages of an earlier, longer report are removed and that empty pages are refused."""
+    report_file = tmp_path / "report.html"
+    report_gen = ReportGeneration(report_rows)
+    report_gen.generate_streaming_html_report(filename=report_file, rows_per_page=1)
+    assert len(list((tmp_path / "report_pages").iterdir())) == 3
+
+    report_gen.generate_streaming_html_report(filename=report_file, rows_per_page=2)
+    assert sorted(path.name for path in (tmp_path / "report_pages").iterdir()) == ["page_0001.html",
+                                                                                  "page_0002.html"]
+    with pytest.raises(ValueError):
+        report_gen.generate_streaming_html_report(filename=report_file, rows_per_page=0)
+
+
+@pytest.mark.unit
+def test_format_cell_treats_pandas_missing_values_as_empty():
+    """Tests that pd.NA, NaT and NaN cells render empty instead of raising."""
+    assert ReportGeneration._format_cell(pd.NA) == ''
+    assert ReportGeneration._format_cell(pd.NaT) == ''
+    assert ReportGeneration._format_cell(np.nan) == ''
+    assert ReportGeneration._format_cell(1.234) == '1.23'
+
+
+@pytest.mark.unit
+def test_streaming_report_with_no_data(tmp_path):
+    """Tests that no files are written when there is nothing to report."""
+    report_file = tmp_path / "empty.html"
+    assert ReportGeneration([]).generate_streaming_html_report(filename=report_file) == []
+    assert not report_file.exists()
+
+
+@pytest.mark.unit
+def test_threshold_queries_match_boolean_mask(report_rows):
+    """Tests that the sorted analysis engine answers exactly like a boolean mask scan."""
+    report_gen = ReportGeneration(report_rows)
+    discrepancy = report_gen.df['discrepancy']
+
+    for threshold in [0.0, 0.5, 2.0, 3.0, 5.0, 10.0]:
+        expected = report_gen.df[discrepancy > threshold]
+        assert report_gen._get_discrepancy_report(threshold)['city'].tolist() == expected['city'].tolist()
+    assert report_gen.get_threshold_summary([0.5, 2.0, 5.0]) == {0.5: 2, 2.0: 1, 5.0: 0}
+
+
+@pytest.mark.unit
+def test_extended_statistics(report_rows):
+    """Tests the percentile, deviation and 'feels like' statistics against numpy."""
+    report_gen = ReportGeneration(report_rows)
+    values = report_gen.df['discrepancy'].to_numpy()
+
+    stats = report_gen.get_extended_statistics()
+    assert stats['temperature']['count'] == 3
+    assert stats['temperature']['std'] == pytest.approx(np.std(values))
+    assert stats['temperature']['p95'] == pytest.approx(np.percentile(values, 95))
+    assert stats['feels_like']['max'] == pytest.approx(5.0)
+    assert report_gen._get_summary_statistics() == {
+        "Mean Discrepancy": "2.50 °C",
+        "Maximum Discrepancy": "5.00 °C",
+        "Minimum Discrepancy": "0.50 °C"
+    }
+
+
+@pytest.mark.unit
+def test_multi_threshold_report(report_rows, tmp_path):
+    """Tests that one report file covers every requested threshold."""
+    report_file = tmp_path / "multi.html"
+    ReportGeneration(report_rows).generate_multi_threshold_html_report([3.0, 1.0], filename=report_file)
+
+    content = report_file.read_text(encoding='utf-8')
+    assert "Threshold > 1.0°C" in content and "Threshold > 3.0°C" in content
+    assert "Discrepancy Distribution" in content
+
+
+@pytest.mark.unit
+def test_cached_report_skips_unchanged_input(report_rows, tmp_path):
+    """Tests that an unchanged dataset and threshold do not rewrite the report."""
+    report_file = tmp_path / "cached.html"
+
+    assert ReportGeneration(report_rows).generate_cached_html_report(threshold=3.0, filename=report_file)
+    first_content = report_file.read_text(encoding='utf-8')
+    assert not ReportGeneration(report_rows).generate_cached_html_report(threshold=3.0, filename=report_file)
+    assert report_file.read_text(encoding='utf-8') == first_content
+    # A different threshold changes the fingerprint
+    assert ReportGeneration(report_rows).generate_cached_html_report(threshold=1.0, filename=report_file)
+
+
+@pytest.mark.unit
+def test_cached_report_matches_full_report(report_rows, tmp_path):
+    """Tests that the cached and the complete report write the same page for the same data."""
+    sections = [("Discrepancy Trends", "<table class=\"trend-table\"></table>")]
+    ReportGeneration(report_rows).generate_html_report(threshold=3.0, filename=tmp_path / "full.html",
+                                                       extra_sections=sections)
+    ReportGeneration(report_rows).generate_cached_html_report(threshold=3.0, filename=tmp_path / "cached.html",
+                                                              extra_sections=sections)
+
+    assert (tmp_path / "cached.html").read_bytes() == (tmp_path / "full.html").read_bytes()
+
+
+@pytest.mark.unit
+def test_cached_report_only_rewrites_changed_extra_sections(report_rows, tmp_path, mocker):
+    """Tests that changed extra sections with unchanged data are rewritten without rendering rows."""
+    report_file = tmp_path / "cached.html"
+    ReportGeneration(report_rows).generate_cached_html_report(
+        threshold=3.0, filename=report_file, extra_sections=[("Trends", "<p>a much longer first run</p>")])
+
+    report_gen = ReportGeneration(report_rows)
+    render_spy = mocker.spy(report_gen, '_render_row')
+    sections = [("Trends", "<p>second run</p>")]
+    assert report_gen.generate_cached_html_report(threshold=3.0, filename=report_file, extra_sections=sections)
+    assert render_spy.call_count == 0
+    assert not report_gen.generate_cached_html_report(threshold=3.0, filename=report_file, extra_sections=sections)
+
+    ReportGeneration(report_rows).generate_html_report(threshold=3.0, filename=tmp_path / "full.html",
+                                                       extra_sections=sections)
+    assert report_file.read_bytes() == (tmp_path / "full.html").read_bytes()
+
+
+@pytest.mark.unit
+def test_cached_report_renders_only_changed_rows(report_rows, tmp_path, mocker):
+    """Tests that only the rows of changed cities are rendered again."""
+    report_file = tmp_path / "cached.html"
+    ReportGeneration(report_rows).generate_cached_html_report(threshold=3.0, filename=report_file)
+
+    report_rows[2] = dict(report_rows[2], temperature_web=35.0)
+    report_gen = ReportGeneration(report_rows)
+    render_spy = mocker.spy(report_gen, '_render_row')
+    assert report_gen.generate_cached_html_report(threshold=3.0, filename=report_file)
+
+    # The three summary lines plus the full and discrepancy fragments of the changed city
+    assert render_spy.call_count == 5
+    content = report_file.read_text(encoding='utf-8')
+    assert "<td>rome</td><td>35.00</td><td>26.00</td><td>9.00</td>" in content
+    assert "<td>london</td>" in content
+
+
+@pytest.mark.unit
+def test_compact_mode_dtypes_and_results(report_rows):
+    """Tests that compact mode uses lean dtypes and produces the same analysis."""
+    default_gen = ReportGeneration(report_rows)
+    compact_gen = ReportGeneration(report_rows, compact=True)
+
+    assert isinstance(compact_gen.df['city'].dtype, pd.CategoricalDtype)
+    assert compact_gen.df['temperature_web'].dtype == np.float32
+    assert compact_gen.df['discrepancy'].dtype == np.float32
+    assert compact_gen.df['city'].tolist() == default_gen.df['city'].tolist()
+    assert compact_gen._get_summary_statistics() == default_gen._get_summary_statistics()
+    assert compact_gen.get_summary([3.0]) == default_gen.get_summary([3.0])
+
+
+@pytest.mark.unit
+def test_compact_mode_reduces_memory():
+    """Tests that compact mode needs a fraction of the default memory on larger inputs."""
+    rows = [{"city": f"city_{i % 50}", "temperature_web": float(i % 30), "feels_like_web": 1.0,
+             "temperature_api": 2.0, "feels_like_api": 3.0, "avg_temperature": 4.0} for i in range(5000)]
+
+    default_bytes = ReportGeneration(rows).get_memory_usage()
+    compact_gen = ReportGeneration(rows, compact=True)
+    assert compact_gen.get_memory_usage() < default_bytes / 3
+    # The first 1000 rows are measured with default dtypes and scaled to the 5000
+    assert compact_gen._measure_default_memory(compact_gen.df) == (pytest.approx(default_bytes, rel=0.05), 1000)
+    assert compact_gen._measure_default_memory(compact_gen.df, sample_rows=5000) == (default_bytes, 5000)
+
+
+@pytest.mark.unit
+def test_compact_mode_without_city_column():
+    """Tests that compact mode accepts rows without a city, like the default mode."""
+    rows = [{"temperature_web": 10.0, "temperature_api": 12.0}, {"temperature_web": None, "temperature_api": 1.0}]
+
+    compact_gen = ReportGeneration(rows, compact=True)
+    assert 'city' not in compact_gen.df.columns
+    assert compact_gen.df['discrepancy'].tolist() == [2.0]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("compact", [False, True])
+def test_readings_input_matches_dict_rows(report_rows, compact):
+    """Tests that WeatherReading records produce the same report as database dictionaries."""
+    readings = [WeatherReading(row["city"], row["temperature_web"], row["feels_like_web"], row["temperature_api"],
+                               row["feels_like_api"], 1_700_000_000.0, "web+api") for row in report_rows]
+
+    from_rows = ReportGeneration(report_rows, compact=compact)
+    from_readings = ReportGeneration(readings, compact=compact)
+
+    assert from_readings._get_summary_statistics() == from_rows._get_summary_statistics()
+    assert from_readings.get_summary([3.0]) == from_rows.get_summary([3.0])
+    assert from_readings.df['avg_temperature'].tolist() == from_rows.df['avg_temperature'].tolist()
@@ -0,0 +1,84 @@
+import csv
+import json
+import subprocess
+import sys
+
+import pytest
+
+from utilities.models import WeatherReading
+from utilities.report_generator import ReportGeneration
+from utilities.report_summary import summarize_columns, summarize_readings, write_csv_report, write_json_report
+
+READINGS = [
+    {"city": "london", "temperature_web": 15.0, "feels_like_web": 14.0, "temperature_api": 15.5,
+     "feels_like_api": 14.5},
+    {"city": "paris", "temperature_web": 20.0, "feels_like_web": 19.0, "temperature_api": 25.0,
+     "feels_like_api": 24.0},
+    {"city": "rome", "temperature_web": 28.0, "feels_like_web": 30.0, "temperature_api": 26.0,
+     "feels_like_api": None},
+    {"city": "oslo", "temperature_web": None, "feels_like_web": None, "temperature_api": 1.0,
+     "feels_like_api": 0.0},
+]
+
+
+@pytest.mark.unit
+def test_fast_path_matches_dataframe_report():
+    """Tests that the pandas-free summary equals the DataFrame based one."""
+    fast = summarize_readings(READINGS, thresholds=[3.0, 1.0])
+    full = ReportGeneration(READINGS).get_summary(thresholds=[3.0, 1.0])
+
+    assert fast['readings'] == full['readings'] == 3
+    for section in ('temperature', 'feels_like'):
+        assert fast[section].keys() == full[section].keys()
+        for key, value in fast[section].items():
+            assert value == pytest.approx(full[section][key])
+    assert fast['thresholds'] == full['thresholds']
+    assert [entry['count'] for entry in fast['thresholds']] == [2, 1]
+
+
+@pytest.mark.unit
+def test_fast_path_accepts_weather_readings(db_helper):
+    """Tests that the WeatherReading records of get_all_readings() summarize like dictionary rows."""
+    readings = [WeatherReading(row["city"], row["temperature_web"], row["feels_like_web"], row["temperature_api"],
+                               row["feels_like_api"]) for row in READINGS]
+    assert summarize_readings(readings, thresholds=[3.0, 1.0]) == summarize_readings(READINGS, thresholds=[3.0, 1.0])
+
+    db_helper.insert_readings([reading for reading in readings if reading.is_complete])
+    summary = summarize_readings(db_helper.get_all_readings(), thresholds=[3.0])
+    assert summary['readings'] == 3
+    assert [breach['city'] for breach in summary['thresholds'][0]['breaches']] == ["paris"]
+
+
+@pytest.mark.unit
+def test_fast_path_accepts_arrays():
+    """Tests the column based entry point with numpy arrays and NaN gaps."""
+    np = pytest.importorskip("numpy")
+    summary = summarize_columns(np.array(["a", "b"]), np.array([1.0, np.nan], dtype=np.float32),
+                                np.array([4.0, 2.0], dtype=np.float32), thresholds=[2.0])
+
+    assert summary['readings'] == 1
+    assert summary['temperature']['max'] == 3.0
+    assert summary['thresholds'][0]['breaches'][0]['city'] == "a"
+
+
+@pytest.mark.unit
+def test_json_and_csv_outputs(tmp_path):
+    """Tests that both machine-readable outputs carry the statistics and breaches."""
+    summary = summarize_readings(READINGS, thresholds=[3.0])
+    write_json_report(summary, tmp_path / "report.json")
+    write_csv_report(summary, tmp_path / "report.csv")
+
+    assert json.loads((tmp_path / "report.json").read_text(encoding='utf-8')) == summary
+    with open(tmp_path / "report.csv", encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert {'section': 'breach', 'threshold': '3.0', 'city': 'paris', 'statistic': 'discrepancy',
+            'value': '5.0'} in rows
+    assert any(row['section'] == 'temperature' and row['statistic'] == 'p95' for row in rows)
+
+
+@pytest.mark.unit
+def test_fast_path_does_not_import_pandas():
+    """Tests that the lightweight module stays free of the pandas import."""
+    code = "import sys, utilities.report_summary; print('pandas' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from utilities.report_generator import ReportGeneration
+from utilities.trend_analyzer import TrendAnalysis
+
+HOUR = 3600
+
+
+@pytest.fixture
+def history():
+    """Provides interleaved readings for two cities, one of them drifting apart over time."""
+    rows = []
+    for i in range(6):
+        rows.append({"city": "haifa", "recorded_at": i * HOUR, "temperature_web": 20.0,
+                     "temperature_api": 20.0 + i})
+        rows.append({"city": "oslo", "recorded_at": i * HOUR + 60, "temperature_web": 5.0,
+                     "temperature_api": 6.0})
+    rows.append({"city": "oslo", "recorded_at": 7 * HOUR, "temperature_web": None, "temperature_api": 6.0})
+    return rows
+
+
+@pytest.mark.unit
+def test_grouped_trends_match_per_city_computation(history):
+    """Tests the grouped rolling statistics against a straightforward per-city computation."""
+    trends = TrendAnalysis(history, window='2h', ewma_halflife='1h').compute()
+
+    assert len(trends) == 12
+    for city, city_df in trends.groupby('city'):
+        series = city_df.set_index('time')['discrepancy']
+        expected_mean = series.rolling('2h').mean().to_numpy()
+        expected_max = series.rolling('2h').max().to_numpy()
+        expected_ewma = series.ewm(halflife='1h', times=series.index).mean().to_numpy()
+        assert city_df['rolling_mean'].to_numpy() == pytest.approx(expected_mean)
+        assert city_df['rolling_max'].to_numpy() == pytest.approx(expected_max)
+        assert city_df['ewma'].to_numpy() == pytest.approx(expected_ewma)
+
+
+@pytest.mark.unit
+def test_city_summary_reports_drift(history):
+    """Tests that the drifting city shows a positive drift and the stable one none."""
+    summary = TrendAnalysis(history, window='2h').get_city_summary().set_index('city')
+
+    assert summary.loc['haifa', 'readings'] == 6
+    assert summary.loc['haifa', 'rolling_max'] == 5.0
+    assert summary.loc['haifa', 'drift'] > 0
+    assert summary.loc['oslo', 'drift'] == pytest.approx(0.0)
+    assert summary.loc['oslo', 'last_reading'] == pd.Timestamp(5 * HOUR + 60, unit='s')
+
+
+@pytest.mark.unit
+def test_trend_section_in_report(history, tmp_path):
+    """Tests that the trend table can be added to the HTML report as an extra section."""
+    report_file = tmp_path / "report.html"
+    latest = [{"city": "haifa", "temperature_web": 20.0, "temperature_api": 25.0}]
+    section = ("Discrepancy Trends", TrendAnalysis(history).to_html())
+    ReportGeneration(latest).generate_html_report(filename=report_file, extra_sections=[section])
+
+    content = report_file.read_text(encoding='utf-8')
+    assert "<h2>Discrepancy Trends</h2>" in content
+    assert 'class="dataframe trend-table"' in content
+
+
+@pytest.mark.unit
+def test_empty_history():
+    """Tests that an empty history produces an empty summary instead of failing."""
+    assert TrendAnalysis([]).get_city_summary().empty
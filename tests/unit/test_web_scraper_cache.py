@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from utilities.web_scraper import WebScraper
+
+
+@pytest.mark.unit
+def test_cache_hit_ratio_counts_disk_and_memory_cache_hits():
+    """Tests the cache accounting fed by the CDP Network events, no browser needed."""
+    scraper = WebScraper(user_data_dir="unused")
+    assert scraper.cache_hit_ratio() is None
+
+    scraper._record_response({'requestId': '1', 'response': {'fromDiskCache': False}})
+    scraper._record_transfer({'requestId': '1', 'encodedDataLength': 2048})
+    scraper._record_response({'requestId': '2', 'response': {'fromDiskCache': True}})
+    scraper._record_memory_cache_hit({'requestId': '3'})
+    scraper._record_response({'requestId': '3', 'response': {'fromDiskCache': False}})
+    scraper._record_response({'requestId': '4', 'response': {}})
+
+    assert scraper.cache_stats == {'responses': 4, 'cache_hits': 2, 'network_bytes': 2048}
+    assert scraper.cache_hit_ratio() == 0.5
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cache_warm_up_and_close_are_no_ops_without_profile():
+    """Tests that a scraper without a persistent profile never starts a shared browser."""
+    scraper = WebScraper()
+    await scraper.warm_cache()
+    await scraper.close()
+    assert scraper._context is None
+
+
+@pytest.mark.unit
+def test_persistent_context_lock_belongs_to_the_running_loop(tmp_path, mocker):
+    """Tests that the context lock is created in the loop using it, so the scraper works across runs."""
+    playwright = mocker.MagicMock()
+    playwright.stop = mocker.AsyncMock()
+    playwright.chromium.launch_persistent_context = mocker.AsyncMock(return_value=mocker.AsyncMock())
+    starter = mocker.patch("utilities.web_scraper.async_playwright")
+    starter.return_value.start = mocker.AsyncMock(return_value=playwright)
+    scraper = WebScraper(user_data_dir=str(tmp_path / "profile"))
+    assert scraper._context_lock is None
+
+    async def run():
+        contexts = await asyncio.gather(*(scraper._persistent_context() for _ in range(3)))
+        assert len({id(context) for context in contexts}) == 1
+        await scraper.close()
+
+    asyncio.run(run())
+    asyncio.run(run())
+    assert playwright.chromium.launch_persistent_context.await_count == 2
@@ -1,16 +1,32 @@
+import asyncio
 import configparser
 import os
+import time
 import requests
-from helpers.logger import setup_logger
+from helpers.latency import HedgeBudget, LatencyTracker, hedged
+from helpers.logger import PER_CITY, setup_logger
+from helpers.metrics import get_metrics
 
 
 class ApiHelper:
     """ApiHelper class to interact with the OpenWeatherMap API for weather data."""
     BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
+    # Request timeout in seconds until enough latencies are observed, and the lowest adaptive one
+    REQUEST_TIMEOUT = 10.0
+    MIN_REQUEST_TIMEOUT = 2.0
 
-    def __init__(self):
-        """Initializes the ApiHelper with API key from the configuration file."""
+    def __init__(self, hedge=False, hedge_budget_ratio=0.1):
+        """
+        Initializes the ApiHelper with API key from the configuration file.
+
+        Args:
+            hedge (bool): Send a second request when one runs longer than the observed p95 (async calls only).
+            hedge_budget_ratio (float): Maximum share of extra requests caused by hedging.
+        """
         self.logger = setup_logger(__name__)
+        self.hedge = hedge
+        self.hedge_budget = HedgeBudget(ratio=hedge_budget_ratio)
+        self.latency = LatencyTracker()
         config = configparser.ConfigParser()
         # Get path relative to the current file
         config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'config.ini')
@@ -28,25 +44,62 @@ class ApiHelper:
 
     def get_current_api_weather(self, city):
         """Fetches current weather data from the OpenWeatherMap API."""
+        metrics = get_metrics()
+        with metrics.timer('api_call'):
+            data = self._fetch_api_weather(city)
+        metrics.increment('api', 'success' if data['temperature_api'] is not None else 'failure')
+        return data
+
+    async def get_current_api_weather_async(self, city):
+        """
+        Fetches current weather data without blocking the event loop, the request runs in a worker
+        thread. With hedging enabled a second request is sent when the first exceeds the observed p95.
+        """
+        metrics = get_metrics()
+        delay = self.latency.hedge_delay_when_known() if self.hedge else None
+        with metrics.timer('api_call'):
+            data = await hedged(lambda: self._fetch_in_thread(city), delay, self.hedge_budget, 'api',
+                                is_success=lambda result: result['temperature_api'] is not None)
+        metrics.increment('api', 'success' if data['temperature_api'] is not None else 'failure')
+        return data
+
+    async def _fetch_in_thread(self, city):
+        """
+        Runs _fetch_api_weather in a worker thread. A thread cannot be interrupted, so when the
+        attempt is cancelled the request keeps running and is charged to the hedge budget until it ends.
+        """
+        work = asyncio.ensure_future(asyncio.to_thread(self._fetch_api_weather, city))
+        try:
+            return await asyncio.shield(work)
+        except asyncio.CancelledError:
+            self.hedge_budget.abandon(work)
+            raise
+
+    def _fetch_api_weather(self, city):
+        """Performs the API request and parses the temperatures out of the response."""
         url = f"{self.BASE_URL}?q={city}&appid={self.api_key}&units=metric"
         try:
-            self.logger.info(f"Fetching API data for {city.title()}")
-            response = requests.get(url)
+            self.logger.info(f"Fetching API data for {city.title()}", extra=PER_CITY)
+            request_start = time.perf_counter()
+            response = requests.get(url, timeout=self.latency.timeout(self.REQUEST_TIMEOUT, self.MIN_REQUEST_TIMEOUT))
             response.raise_for_status()  # Raise an exception for HTTP errors
 
             try:
                 data = response.json()
-                self.logger.info(f"Successfully fetched API data for {city.title()}")
+                self.logger.info(f"Successfully fetched API data for {city.title()}", extra=PER_CITY)
             except ValueError:
                 self.logger.error(f"Error: Unable to parse JSON response for city: {city}")
+                self.latency.record(time.perf_counter() - request_start, censored=True)
                 return {"temperature_api": None, "feels_like_api": None}
 
             # Validate required keys in the response
             if 'main' not in data or 'temp' not in data['main'] or 'feels_like' not in data['main']:
                 self.logger.error(f"Error: Missing required data in API response for city: {city}")
+                self.latency.record(time.perf_counter() - request_start, censored=True)
                 return {"temperature_api": None, "feels_like_api": None}
 
             #self.logger.info(f"Fetched weather data for {city}: {data}")
+            self.latency.record(time.perf_counter() - request_start)
             return {
                 "temperature_api": data['main']['temp'],
                 "feels_like_api": data['main']['feels_like']
@@ -61,6 +114,8 @@ class ApiHelper:
         except requests.RequestException as req_err:
             self.logger.error(f"Error: An error occurred while fetching data for city {city}: {req_err}")
 
+        # The request took at least this long, a failure must not make the tail look faster than it is
+        self.latency.record(time.perf_counter() - request_start, censored=True)
         return {"temperature_api": None, "feels_like_api": None}
 
 
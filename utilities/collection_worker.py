@@ -0,0 +1,158 @@
+import argparse
+import asyncio
+import os
+import socket
+import uuid
+
+from helpers.logger import setup_logger
+from utilities.data_analyzer import AppOrchestrator
+from utilities.db_helpers import DatabaseHelper
+
+
+# Filesystems on which SQLite's WAL mode and file locking cannot be trusted
+NETWORK_FILESYSTEMS = ('nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'fuse.sshfs', 'ceph', 'glusterfs', '9p')
+
+
+def on_network_filesystem(path):
+    """
+    Tells whether a path lives on a network filesystem, from the longest matching mount point
+    in /proc/mounts. Returns False where /proc/mounts does not exist.
+    """
+    path = os.path.realpath(path)
+    try:
+        with open('/proc/mounts', encoding='utf-8') as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    matches = [(mount_point, fs_type) for mount_point, fs_type in mounts
+               if path == mount_point or path.startswith(mount_point.rstrip('/') + '/')]
+    if not matches:
+        return False
+    return max(matches, key=lambda match: len(match[0]))[1] in NETWORK_FILESYSTEMS
+
+
+class CollectionWorker:
+    """
+    Collector worker for parallel sweeps. Any number of worker processes share one SQLite file:
+    each leases a batch of city jobs, collects them and writes the readings back, while a
+    heartbeat keeps its leases alive. Jobs of a crashed worker are re-queued once their lease
+    expires.
+
+    Scope: single host only. Workers may run as processes or as containers sharing a local
+    volume of one host, but not on several machines. The atomic claim relies on SQLite's WAL
+    mode and file locks, which are unreliable on network filesystems, so a database file on one
+    is refused. A multi-machine setup would need the queue behind a database server.
+    """
+
+    def __init__(self, db_name=None, batch_size=5, lease_seconds=120.0, max_attempts=3, poll_interval=2.0,
+                 max_concurrency=None, worker_id=None):
+        """
+        Args:
+            db_name (str): Shared SQLite file, defaults to DB_NAME from config/config.ini.
+            batch_size (int): Cities leased and collected per batch.
+            lease_seconds (float): Lease length, renewed by the heartbeat every third of it.
+            max_attempts (int): Leases per city before it is marked failed.
+            poll_interval (float): Seconds to wait for leases of other workers to finish or expire.
+            max_concurrency (int): Maximum number of simultaneous browser sessions of this worker.
+            worker_id (str): Unique worker name, defaults to host, process id and a random suffix.
+        """
+        self.logger = setup_logger(__name__)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.db_helper = DatabaseHelper(db_name)
+        db_file = self.db_helper.conn.execute('PRAGMA database_list').fetchone()[2]
+        if db_file and on_network_filesystem(db_file):
+            self.db_helper.close()
+            raise RuntimeError(f"The job queue database '{db_file}' is on a network filesystem. SQLite locking "
+                               f"is not reliable there, run all workers on one host with a local database file.")
+        # Readers do not block the writer, which matters with many workers polling one file
+        self.db_helper.conn.execute('PRAGMA journal_mode=WAL')
+        # Queue operations may wait up to the busy timeout for another worker's write lock, so they
+        # run in threads, on connections of their own so the heartbeat never queues behind a claim
+        self._queue_db = DatabaseHelper(db_file or db_name, check_same_thread=False)
+        self._heartbeat_db = DatabaseHelper(db_file or db_name, check_same_thread=False)
+        self.orchestrator = AppOrchestrator(cities=[], max_concurrency=max_concurrency, db_helper=self.db_helper)
+
+    async def run(self):
+        """
+        Processes batches until no job is pending or leased anymore.
+
+        Returns:
+            int: The number of cities this worker completed.
+        """
+        self.logger.info(f"Worker {self.worker_id} started.")
+        await self._heartbeat()
+        heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        completed = 0
+        try:
+            await self.orchestrator.web_scraper.warm_cache()
+            while True:
+                cities = await asyncio.to_thread(self._queue_db.claim_jobs, self.worker_id, self.batch_size,
+                                                 self.lease_seconds, self.max_attempts)
+                if not cities:
+                    job_counts = await asyncio.to_thread(self._queue_db.get_job_counts)
+                    if not job_counts.get(DatabaseHelper.JOB_LEASED):
+                        break
+                    # Other workers still hold leases, which come back to the queue if they crashed
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                self.logger.info(f"Worker {self.worker_id} leased {len(cities)} cities: {cities}")
+                # Every city is completed as soon as it is collected, and only if this worker still holds it
+                stored, failed = await self.orchestrator.collect_readings(cities, store=self._complete)
+                await asyncio.to_thread(self._queue_db.complete_jobs, self.worker_id, [], failed, self.max_attempts)
+                completed += len(stored)
+        finally:
+            heartbeat_task.cancel()
+            await asyncio.gather(heartbeat_task, return_exceptions=True)
+            await self.orchestrator.web_scraper.close()
+        self.logger.info(f"Worker {self.worker_id} finished after completing {completed} cities.")
+        return completed
+
+    async def _complete(self, readings):
+        return await asyncio.to_thread(self._queue_db.complete_jobs, self.worker_id, readings,
+                                       max_attempts=self.max_attempts)
+
+    async def _heartbeat(self):
+        await asyncio.to_thread(self._heartbeat_db.heartbeat, self.worker_id, self.lease_seconds)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await self._heartbeat()
+
+    def close(self):
+        self._heartbeat_db.close()
+        self._queue_db.close()
+        self.db_helper.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collect queued cities as one of several workers on this host.")
+    parser.add_argument("--db", help="Shared SQLite file, defaults to DB_NAME from config/config.ini.")
+    parser.add_argument("--enqueue", nargs='+', metavar="CITY", help="Queue these cities for a new sweep and exit.")
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--lease-seconds", type=float, default=120.0)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--max-concurrency", type=int)
+    args = parser.parse_args(argv)
+
+    if args.enqueue:
+        db_helper = DatabaseHelper(args.db)
+        db_helper.enqueue_cities(args.enqueue)
+        db_helper.close()
+        return
+
+    worker = CollectionWorker(args.db, batch_size=args.batch_size, lease_seconds=args.lease_seconds,
+                              max_attempts=args.max_attempts, max_concurrency=args.max_concurrency)
+    try:
+        asyncio.run(worker.run())
+        worker.logger.info(f"Job queue: {worker.db_helper.get_job_counts()}")
+    finally:
+        worker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import json
+import os
+import struct
+import uuid
+import zlib
+
+import numpy as np
+
+from helpers.logger import setup_logger
+
+
+class ColumnarArchive:
+    """
+    Append-only, per-column binary archive of historical weather readings.
+
+    Every column is stored in its own file as a fixed-width array (float32 temperatures,
+    int32 timestamps and int32 city and source ids). City and source names are kept once in
+    dictionary tables. Uncompressed archives can be memory mapped, so scanning them costs
+    almost no load time.
+    """
+    COLUMNS = {
+        'city_id': np.int32,
+        'recorded_at': np.int32,
+        'temperature_web': np.float32,
+        'feels_like_web': np.float32,
+        'temperature_api': np.float32,
+        'feels_like_api': np.float32,
+        'avg_temperature': np.float32,
+        'source_id': np.int32,
+    }
+    # Columns stored as values, between the city and source ids
+    VALUE_COLUMNS = list(COLUMNS)[1:-1]
+    # Source id of readings without a source
+    NO_SOURCE = -1
+    META_FILE = 'meta.json'
+    CITIES_FILE = 'cities.json'
+    SOURCES_FILE = 'sources.json'
+    FRAME_HEADER = struct.Struct('<I')
+
+    def __init__(self, path, compress=False):
+        """
+        Opens an existing archive directory or creates a new one.
+
+        Args:
+            path (str): Directory holding the column files.
+            compress (bool): Whether new archives store zlib compressed chunks.
+                             Existing archives keep the mode they were created with.
+        """
+        self.logger = setup_logger(__name__)
+        self.path = str(path)
+        os.makedirs(self.path, exist_ok=True)
+
+        meta_path = os.path.join(self.path, self.META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(os.path.join(self.path, self.CITIES_FILE), encoding='utf-8') as f:
+                self.cities = json.load(f)
+            with open(os.path.join(self.path, self.SOURCES_FILE), encoding='utf-8') as f:
+                self.sources = json.load(f)
+        else:
+            meta = {'rows': 0, 'compress': bool(compress), 'max_id': None, 'sizes': {},
+                    'archive_id': uuid.uuid4().hex}
+            self.cities = []
+            self.sources = []
+
+        self.rows = meta['rows']
+        self.compress = meta['compress']
+        # Highest source row id archived, the watermark of incremental exports
+        self.max_id = meta['max_id']
+        # Identifies the archive, so readings imported from it are not exported back into it
+        self.archive_id = meta['archive_id']
+        self._city_ids = {city: i for i, city in enumerate(self.cities)}
+        self._source_ids = {source: i for i, source in enumerate(self.sources)}
+        self.sizes = meta['sizes']
+        self._discard_uncommitted_bytes()
+
+    def __len__(self):
+        return self.rows
+
+    def _column_path(self, column):
+        suffix = '.z' if self.compress else '.bin'
+        return os.path.join(self.path, f"{column}{suffix}")
+
+    def _discard_uncommitted_bytes(self):
+        """
+        Truncates every column file to the size recorded with the last committed chunk. An append
+        interrupted before its meta file was saved leaves extra bytes, which would misalign the
+        columns of every later chunk.
+        """
+        for column, size in self.sizes.items():
+            column_path = self._column_path(column)
+            if os.path.exists(column_path) and os.path.getsize(column_path) > size:
+                self.logger.warning(f"Discarding {os.path.getsize(column_path) - size} uncommitted bytes "
+                                    f"from '{column_path}'.")
+                with open(column_path, 'r+b') as f:
+                    f.truncate(size)
+
+    def _write_json_atomically(self, name, data):
+        target = os.path.join(self.path, name)
+        with open(f"{target}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{target}.tmp", target)
+
+    def _save_meta(self):
+        """Commits a chunk: writes the dictionary tables, then the row count and column sizes, each atomically."""
+        self._write_json_atomically(self.CITIES_FILE, self.cities)
+        self._write_json_atomically(self.SOURCES_FILE, self.sources)
+        self._write_json_atomically(self.META_FILE, {'rows': self.rows, 'compress': self.compress,
+                                                     'max_id': self.max_id, 'sizes': self.sizes,
+                                                     'archive_id': self.archive_id})
+
+    @staticmethod
+    def _dictionary_id(names, ids, name):
+        """Returns the id of a name in a dictionary table, adding the name on first use."""
+        name_id = ids.get(name)
+        if name_id is None:
+            name_id = len(names)
+            ids[name] = name_id
+            names.append(name)
+        return name_id
+
+    def append(self, rows, max_id=None):
+        """
+        Appends one chunk of readings to every column file. The chunk only counts once the meta
+        file is saved, bytes of an interrupted append are discarded when the archive is reopened.
+
+        Args:
+            rows (list of tuple): Rows of (city, recorded_at, temperature_web, feels_like_web,
+                                  temperature_api, feels_like_api, avg_temperature, source).
+            max_id (int): Highest source row id in the chunk, stored as the export watermark.
+
+        Returns:
+            int: The number of rows appended.
+        """
+        if not rows:
+            return 0
+
+        city_ids = [self._dictionary_id(self.cities, self._city_ids, row[0]) for row in rows]
+        source_ids = [self.NO_SOURCE if row[7] is None
+                      else self._dictionary_id(self.sources, self._source_ids, row[7]) for row in rows]
+
+        values = list(zip(*(row[1:7] for row in rows)))
+        arrays = [np.asarray(city_ids, dtype=np.int32)]
+        for column, data in zip(self.VALUE_COLUMNS, values):
+            arrays.append(np.array(data, dtype=self.COLUMNS[column]))
+        arrays.append(np.asarray(source_ids, dtype=np.int32))
+
+        for column, array in zip(self.COLUMNS, arrays):
+            with open(self._column_path(column), 'ab') as f:
+                payload = array.tobytes()
+                if self.compress:
+                    payload = zlib.compress(payload)
+                    f.write(self.FRAME_HEADER.pack(len(payload)))
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+                self.sizes[column] = f.tell()
+
+        if max_id is not None:
+            self.max_id = max_id if self.max_id is None else max(self.max_id, max_id)
+        self.rows += len(rows)
+        self._save_meta()
+        return len(rows)
+
+    def _read_compressed(self, column):
+        """Decompresses every chunk frame of a column into one in-memory array."""
+        chunks = []
+        with open(self._column_path(column), 'rb') as f:
+            data = f.read()
+        offset = 0
+        while offset < len(data):
+            (length,) = self.FRAME_HEADER.unpack_from(data, offset)
+            offset += self.FRAME_HEADER.size
+            chunks.append(zlib.decompress(data[offset:offset + length]))
+            offset += length
+        return np.frombuffer(b''.join(chunks), dtype=self.COLUMNS[column])[:self.rows]
+
+    def read_columns(self):
+        """
+        Returns every column as a numpy array. Uncompressed archives are memory mapped
+        read-only, compressed archives are decompressed into memory.
+
+        Returns:
+            dict: Column name mapped to its array.
+        """
+        columns = {}
+        for column, dtype in self.COLUMNS.items():
+            if self.rows == 0:
+                columns[column] = np.empty(0, dtype=dtype)
+            elif self.compress:
+                columns[column] = self._read_compressed(column)
+            else:
+                columns[column] = np.memmap(self._column_path(column), dtype=dtype, mode='r', shape=(self.rows,))
+        return columns
+
+    def to_frame_columns(self):
+        """
+        Returns the archive as columns ready for a DataFrame, with city and source ids decoded to names.
+
+        Returns:
+            dict: Column name mapped to its array, with 'city' and 'source' in place of the ids.
+        """
+        columns = self.read_columns()
+        city_ids = columns.pop('city_id')
+        source_ids = columns.pop('source_id')
+        # NO_SOURCE (-1) picks the trailing None
+        sources = np.asarray(self.sources + [None], dtype=object)[source_ids]
+        return {'city': np.asarray(self.cities, dtype=object)[city_ids], **columns, 'source': sources}
+
+    def iter_chunks(self, chunk_size=50000):
+        """
+        Yields the archive as lists of row tuples, in the same layout accepted by append().
+        Missing temperatures are returned as None.
+
+        Args:
+            chunk_size (int): Number of rows per yielded chunk.
+        """
+        columns = self.read_columns()
+        sources = self.sources + [None]
+        for start in range(0, self.rows, chunk_size):
+            stop = start + chunk_size
+            cities = [self.cities[i] for i in columns['city_id'][start:stop].tolist()]
+            values = [columns['recorded_at'][start:stop].tolist()]
+            for column in self.VALUE_COLUMNS[1:]:
+                chunk = columns[column][start:stop]
+                values.append([None if v != v else v for v in chunk.tolist()])
+            values.append([sources[i] for i in columns['source_id'][start:stop].tolist()])
+            yield list(zip(cities, *values))
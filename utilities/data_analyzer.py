@@ -1,18 +1,38 @@
 import asyncio
+import inspect
+import os
+import time
 from utilities.api_helpers import ApiHelper
 from utilities.db_helpers import DatabaseHelper
+from utilities.discrepancy_monitor import StreamingDiscrepancyDetector
+from utilities.models import WeatherReading
 from utilities.web_scraper import WebScraper
-from helpers.logger import setup_logger
+from helpers.logger import PER_CITY, setup_logger
+from helpers.loop_monitor import LoopMonitor
+from helpers.metrics import get_metrics
 
 
 class AppOrchestrator:
     """AppOrchestrator class to manage and orchestrate the entire weather data collection process"""
 
-    def __init__(self, cities=None):
+    def __init__(self, cities=None, alert_threshold=3.0, max_concurrency=None, monitor_loop=None, hedge=None,
+                 browser_profile_dir=None, db_helper=None):
         self.logger = setup_logger(__name__)
-        self.api_helper = ApiHelper()
-        self.db_helper = DatabaseHelper()
-        self.web_scraper = WebScraper()
+        # Hedged scrapes and API calls, also enabled with the HEDGE_REQUESTS environment variable
+        hedge = bool(os.environ.get("HEDGE_REQUESTS")) if hedge is None else hedge
+        self.api_helper = ApiHelper(hedge=hedge)
+        self.db_helper = db_helper or DatabaseHelper()
+        # Persistent browser profile with a warm HTTP cache, also set with BROWSER_PROFILE_DIR
+        browser_profile_dir = browser_profile_dir or os.environ.get("BROWSER_PROFILE_DIR")
+        self.web_scraper = WebScraper(hedge=hedge, user_data_dir=browser_profile_dir)
+        self.alert_threshold = alert_threshold
+        # Upper bound on simultaneous browser sessions, None launches every scrape at once
+        self.max_concurrency = max_concurrency
+        # Created on the first run, so it persists its state through whichever db_helper is in use then
+        self.detector = None
+        # Opt-in event loop watchdog, also enabled with the LOOP_MONITOR environment variable
+        self.monitor_loop = bool(os.environ.get("LOOP_MONITOR")) if monitor_loop is None else monitor_loop
+        self.loop_summary = None
         if cities:
             self.cities = cities
         else:
@@ -28,33 +48,99 @@ class AppOrchestrator:
         2) Then for each city in list order, await its scrape, call API, insert, for better readability.
         """
         self.logger.info(f"Starting ASYNC data collection for {len(self.cities)} cities.")
+        monitor = None
+        if self.monitor_loop:
+            monitor = LoopMonitor(threshold=float(os.environ.get("LOOP_MONITOR_THRESHOLD", "0.1")))
+            await monitor.start()
+        try:
+            await self.web_scraper.warm_cache()
+            stored, _ = await self.collect_readings(self.cities)
+            self.logger.info(f"Stored {len(stored)} of {len(self.cities)} city readings.")
+        finally:
+            await self.web_scraper.close()
+            if monitor:
+                self.loop_summary = await monitor.stop()
+
+        self.logger.info("ASYNC data collection process complete.")
+
+    async def collect_readings(self, cities, store=None):
+        """
+        Scrapes, fetches and stores the given cities, each one as soon as it is complete,
+        see run_data_collection_async.
+
+        Args:
+            cities (list of str): The cities to collect.
+            store (callable): Stores a list of WeatherReading records and returns how many it stored,
+                              or an awaitable of that number. Defaults to DatabaseHelper.insert_readings.
+                              Like it and complete_jobs, a store advances the discrepancy statistics
+                              in the transaction of the readings.
+
+        Returns:
+            tuple: The WeatherReading records that were stored, and the cities that were not.
+        """
+        store = store or self.db_helper.insert_readings
+        if self.detector is None:
+            self.detector = StreamingDiscrepancyDetector(self.db_helper, threshold=self.alert_threshold)
+        metrics = get_metrics()
 
         # Launch all web-scrape tasks at once, store by city
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        city_starts = {}
         scrape_tasks = {
-            city: asyncio.create_task(self.web_scraper._scrape_weather_data(city))
-            for city in self.cities
+            city: asyncio.create_task(self._scrape_city(city, semaphore, city_starts))
+            for city in cities
         }
 
+        readings, failed = [], []
         #  Now process each city in the original order
-        for city in self.cities:
-            self.logger.info(f"Starting Fetching Weather data for {city.title()}...")
+        for city in cities:
+            self.logger.info(f"Starting Fetching Weather data for {city.title()}...", extra=PER_CITY)
 
             #  await the web scrape for this city
             web_data = await scrape_tasks[city]
 
-            #  do the (now sequential) API call
-            api_data = self.api_helper.get_current_api_weather(city)
+            #  do the (now sequential) API call, in a worker thread so pending scrapes keep running
+            api_data = await self.api_helper.get_current_api_weather_async(city)
 
-            #  insert into DB (and the log for insertion)
-            if (web_data.get('temperature_web') is not None
-                    and api_data.get('temperature_api') is not None):
-                self.db_helper.insert_weather_data(city, web_data, api_data)
-            else:
+            #  insert into DB right away, so a crash later in the run keeps what was collected
+            reading = WeatherReading.from_sources(city, web_data, api_data)
+            if not reading.is_complete:
                 self.logger.warning(
                     f"Skipping DB entry for {city.title()} due to missing data."
                 )
+                failed.append(city)
+                metrics.increment('city', 'failure')
+            elif await self._store(store, [reading]):
+                readings.append(reading)
+                # Flag breaches and outliers right away instead of waiting for the report
+                self.detector.update(city, reading.temperature_web, reading.temperature_api, stored=True)
+                metrics.increment('city', 'success')
+            else:
+                failed.append(city)
+                metrics.increment('city', 'failure')
+            # Time from the start of this city's scrape until the city is fully processed
+            metrics.observe('city_latency', time.perf_counter() - city_starts[city])
 
-        self.logger.info("ASYNC data collection process complete.")
+        return readings, failed
+
+    @staticmethod
+    async def _store(store, readings):
+        stored = store(readings)
+        return await stored if inspect.isawaitable(stored) else stored
+
+    async def _scrape_city(self, city, semaphore=None, starts=None):
+        """
+        Scrapes one city, waiting for a free slot first when the concurrency is bounded. A hedged
+        second scrape of the city takes a slot as well, so hedging stays within max_concurrency.
+        The time the scrape starts, after the wait for a slot, is stored under the city in starts.
+        """
+        starts = {} if starts is None else starts
+        if semaphore is None:
+            starts[city] = time.perf_counter()
+            return await self.web_scraper._scrape_weather_data(city)
+        async with semaphore:
+            starts[city] = time.perf_counter()
+            return await self.web_scraper._scrape_weather_data(city, slot=semaphore)
 
     def close_connections(self):
         self.db_helper.close()
@@ -1,29 +1,47 @@
 import os
 import sqlite3
+import time
 import configparser
-from helpers.logger import setup_logger
+from helpers.logger import PER_CITY, setup_logger
+from helpers.metrics import get_metrics
+from utilities.columnar_archive import ColumnarArchive
+from utilities.models import WeatherReading
 
 
 class DatabaseHelper:
-    def __init__(self):
+    # Job states of the collection queue
+    JOB_PENDING = 'pending'
+    JOB_LEASED = 'leased'
+    JOB_DONE = 'done'
+    JOB_FAILED = 'failed'
+
+    def __init__(self, db_name=None, timeout=30.0, check_same_thread=True):
+        """
+        Args:
+            db_name (str): SQLite file to use, defaults to DB_NAME from config/config.ini.
+            timeout (float): Seconds to wait for a lock held by another connection or process.
+            check_same_thread (bool): False allows the helper to be used from worker threads, one at a time.
+        """
         self.logger = setup_logger(__name__)
-        config = configparser.ConfigParser()
-        # Get path relative to the current file
-        config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'config.ini')
+        if db_name is None:
+            config = configparser.ConfigParser()
+            # Get path relative to the current file
+            config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'config.ini')
 
-        if not os.path.exists(config_path):
-            self.logger.error(f"Config file not found at: {config_path}")
-            raise FileNotFoundError(f"Config file not found at: {config_path}")
+            if not os.path.exists(config_path):
+                self.logger.error(f"Config file not found at: {config_path}")
+                raise FileNotFoundError(f"Config file not found at: {config_path}")
 
-        config.read(config_path)
-        db_name = config['DB']['DB_NAME']
-        self.conn = sqlite3.connect(db_name)
+            config.read(config_path)
+            db_name = config['DB']['DB_NAME']
+        self.conn = sqlite3.connect(db_name, timeout=timeout, check_same_thread=check_same_thread)
         self.create_tables()
 
     def create_tables(self):
         """
         Creates the 'weather_data' table using the required, extended schema.
         This schema includes columns for both web and API data, plus a computed average.
+        The append-only 'weather_history' table keeps every reading with its timestamp.
         """
         try:
             with self.conn:
@@ -34,12 +52,64 @@ class DatabaseHelper:
                            feels_like_web REAL,
                            temperature_api REAL,
                            feels_like_api REAL,
-                           avg_temperature REAL
+                           avg_temperature REAL,
+                           fetched_at REAL,
+                           source TEXT
+                       )''')
+                self.conn.execute('''
+                       CREATE TABLE IF NOT EXISTS weather_history (
+                           id INTEGER PRIMARY KEY AUTOINCREMENT,
+                           city TEXT NOT NULL,
+                           recorded_at INTEGER NOT NULL,
+                           temperature_web REAL,
+                           feels_like_web REAL,
+                           temperature_api REAL,
+                           feels_like_api REAL,
+                           avg_temperature REAL,
+                           source TEXT,
+                           archive_id TEXT
                        )''')
-            self.logger.info("Database table 'weather_data' is ready.")
+                self.conn.execute('''
+                       CREATE TABLE IF NOT EXISTS discrepancy_state (
+                           city TEXT PRIMARY KEY,
+                           count INTEGER NOT NULL,
+                           mean REAL NOT NULL,
+                           m2 REAL NOT NULL
+                       )''')
+                self.conn.execute('''
+                       CREATE TABLE IF NOT EXISTS collection_jobs (
+                           city TEXT PRIMARY KEY,
+                           status TEXT NOT NULL,
+                           worker_id TEXT,
+                           lease_expires_at REAL,
+                           attempts INTEGER NOT NULL DEFAULT 0,
+                           updated_at REAL NOT NULL
+                       )''')
+                self.conn.execute('''
+                       CREATE INDEX IF NOT EXISTS idx_collection_jobs_status ON collection_jobs (status, attempts)
+                   ''')
+                self.conn.execute('''
+                       CREATE TABLE IF NOT EXISTS collection_workers (
+                           worker_id TEXT PRIMARY KEY,
+                           started_at REAL NOT NULL,
+                           last_heartbeat REAL NOT NULL,
+                           jobs_done INTEGER NOT NULL DEFAULT 0
+                       )''')
+                # Databases created before readings carried their metadata get the columns added
+                self._add_missing_columns('weather_data', {'fetched_at': 'REAL', 'source': 'TEXT'})
+                self._add_missing_columns('weather_history', {'source': 'TEXT', 'archive_id': 'TEXT'})
+            self.logger.info("Database tables 'weather_data', 'weather_history', 'discrepancy_state' and the "
+                             "collection job queue are ready.")
         except sqlite3.Error as e:
             self.logger.error(f"Database error creating table: {e}")
 
+    def _add_missing_columns(self, table, columns):
+        """Adds the given columns (name mapped to SQL type) to a table that does not have them yet."""
+        existing = {row[1] for row in self.conn.execute(f'PRAGMA table_info({table})')}
+        for name, sql_type in columns.items():
+            if name not in existing:
+                self.conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {sql_type}')
+
     def insert_weather_data(self, city, web_data, api_data):
         """
         Inserts or replaces a full weather record for a city.
@@ -50,32 +120,70 @@ class DatabaseHelper:
             web_data (dict): A dictionary containing 'temperature_web' and 'feels_like_web'.
             api_data (dict): A dictionary containing 'temperature_api' and 'feels_like_api'.
         """
-        try:
-            temp_web = web_data.get('temperature_web')
-            temp_api = api_data.get('temperature_api')
+        if self.insert_readings([WeatherReading.from_sources(city, web_data, api_data)]):
+            self.logger.info(f"Weather data for {city.title()} inserted/updated successfully.", extra=PER_CITY)
 
-            # Calculate average temperature only if both values are available
-            avg_temperature = None
-            if temp_web is not None and temp_api is not None:
-                avg_temperature = (float(temp_web) + float(temp_api)) / 2
+    def insert_readings(self, readings):
+        """
+        Inserts or replaces the latest reading of each city and appends all of them to the history,
+        binding the readings in bulk within a single transaction.
 
-            with self.conn:
-                # 'INSERT OR REPLACE' is used to either add a new city or update an existing one.
-                self.conn.execute('''
-                       INSERT OR REPLACE INTO weather_data 
-                       (city, temperature_web, feels_like_web, temperature_api, feels_like_api, avg_temperature)
-                       VALUES (?, ?, ?, ?, ?, ?)
-                   ''', (
-                    city,
-                    temp_web,
-                    web_data.get('feels_like_web'),
-                    temp_api,
-                    api_data.get('feels_like_api'),
-                    avg_temperature
-                ))
-            self.logger.info(f"Weather data for {city.title()} inserted/updated successfully.")
+        Args:
+            readings (list of WeatherReading): The readings to store.
+
+        Returns:
+            int: The number of readings stored, 0 when the transaction failed.
+        """
+        rows = self._reading_rows(readings)
+        if not rows:
+            return 0
+        try:
+            with get_metrics().timer('db_write'), self.conn:
+                self._write_reading_rows(rows)
+            get_metrics().increment('db_write', 'success', len(rows))
+            return len(rows)
         except sqlite3.Error as e:
-            self.logger.error(f"Database error inserting/updating data for {city.title()}: {e}")
+            self.logger.error(f"Database error inserting/updating {len(rows)} readings: {e}")
+            get_metrics().increment('db_write', 'failure', len(rows))
+            return 0
+
+    @staticmethod
+    def _reading_rows(readings):
+        return [(*reading[:5], reading.avg_temperature, reading.fetched_at, reading.source) for reading in readings]
+
+    # Welford's update applied inside SQLite: on conflict every right-hand side reads the stored row
+    # before the update, and excluded.mean is the new discrepancy. Concurrent writers are serialized
+    # by the write lock, so each one advances the latest state instead of replacing it.
+    ADVANCE_DISCREPANCY_STATE_SQL = '''
+           INSERT INTO discrepancy_state (city, count, mean, m2) VALUES (?, 1, ?, 0.0)
+           ON CONFLICT (city) DO UPDATE SET
+               count = count + 1,
+               mean = mean + (excluded.mean - mean) / (count + 1),
+               m2 = m2 + (excluded.mean - mean) * (excluded.mean - mean - (excluded.mean - mean) / (count + 1))
+       '''
+
+    def _write_reading_rows(self, rows):
+        """
+        Writes reading rows inside the caller's transaction, and advances the running discrepancy
+        statistics of every row with both temperatures in the same transaction.
+        """
+        # 'INSERT OR REPLACE' is used to either add a new city or update an existing one.
+        self.conn.executemany('''
+               INSERT OR REPLACE INTO weather_data 
+               (city, temperature_web, feels_like_web, temperature_api, feels_like_api, avg_temperature,
+                fetched_at, source)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+           ''', rows)
+        # Every reading is also kept in the history table for offline analysis.
+        self.conn.executemany('''
+               INSERT INTO weather_history
+               (city, temperature_web, feels_like_web, temperature_api, feels_like_api, avg_temperature,
+                recorded_at, source)
+               VALUES (?, ?, ?, ?, ?, ?, COALESCE(CAST(? AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER)), ?)
+           ''', rows)
+        self.conn.executemany(self.ADVANCE_DISCREPANCY_STATE_SQL,
+                              [(row[0], abs(float(row[1]) - float(row[3]))) for row in rows
+                               if row[1] is not None and row[3] is not None])
 
     def get_weather_data(self, city):
         """
@@ -93,7 +201,7 @@ class DatabaseHelper:
         if row:
             # Return data as a dictionary with column names as keys
             columns = [description[0] for description in cursor.description]
-            self.logger.info(f"Weather data retrieved for {city.title()}")
+            self.logger.info(f"Weather data retrieved for {city.title()}", extra=PER_CITY)
             return dict(zip(columns, row))
         self.logger.warning(f"No weather data found for {city.title()}")
         return None
@@ -114,6 +222,307 @@ class DatabaseHelper:
             self.logger.error(f"Database error retrieving all weather data: {e}")
             return []
 
+    def get_all_readings(self):
+        """
+        Retrieves the latest reading of every city as WeatherReading records, without building
+        a dictionary per row.
+
+        Returns:
+            list of WeatherReading: All readings in the weather_data table.
+        """
+        try:
+            cursor = self.conn.execute('''
+                   SELECT city, temperature_web, feels_like_web, temperature_api, feels_like_api, fetched_at, source
+                   FROM weather_data
+               ''')
+            return list(map(WeatherReading._make, cursor.fetchall()))
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error retrieving all readings: {e}")
+            return []
+
+    def get_weather_history(self, since=None):
+        """
+        Retrieves readings from the append-only history table, oldest first.
+
+        Args:
+            since (int): Only return readings recorded at or after this epoch timestamp.
+
+        Returns:
+            list of dict: The matching history records.
+        """
+        try:
+            cursor = self.conn.execute('''
+                   SELECT city, recorded_at, temperature_web, feels_like_web, temperature_api, feels_like_api,
+                          avg_temperature
+                   FROM weather_history WHERE recorded_at >= ? ORDER BY id
+               ''', (since if since is not None else 0,))
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error retrieving weather history: {e}")
+            return []
+
+    def advance_discrepancy_state(self, city, discrepancy):
+        """
+        Adds one discrepancy to the running statistics of a city, merged with whatever other
+        writers stored meanwhile. Readings stored with insert_readings() or complete_jobs() are
+        added already, in the same transaction as the reading.
+
+        Args:
+            city (str): The name of the city.
+            discrepancy (float): Absolute difference between the website and API temperatures.
+
+        Returns:
+            tuple: The city's (count, mean, m2) after the update, or None when it failed.
+        """
+        try:
+            with self.conn:
+                return self.conn.execute(f"{self.ADVANCE_DISCREPANCY_STATE_SQL} RETURNING count, mean, m2",
+                                         (city, discrepancy)).fetchone()
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error saving discrepancy state for {city.title()}: {e}")
+            return None
+
+    def load_discrepancy_state(self, city=None):
+        """
+        Loads the running discrepancy statistics of every city, or of one city.
+
+        Args:
+            city (str): Only load this city.
+
+        Returns:
+            dict: City mapped to a (count, mean, m2) tuple.
+        """
+        try:
+            if city is None:
+                cursor = self.conn.execute('SELECT city, count, mean, m2 FROM discrepancy_state')
+            else:
+                cursor = self.conn.execute('SELECT city, count, mean, m2 FROM discrepancy_state WHERE city = ?',
+                                           (city,))
+            return {city: (count, mean, m2) for city, count, mean, m2 in cursor.fetchall()}
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error loading discrepancy state: {e}")
+            return {}
+
+    def export_archive(self, path, chunk_size=50000, compress=False):
+        """
+        Exports the reading history into a memory-mappable columnar archive.
+        Readings are streamed from the database in chunks, and only readings with a row id above
+        the last one already archived are appended, so repeated exports are incremental. Readings
+        imported from the same archive are skipped, they are in it already.
+
+        Args:
+            path (str): Archive directory.
+            chunk_size (int): Number of rows fetched and appended per chunk.
+            compress (bool): Whether a newly created archive stores compressed chunks.
+
+        Returns:
+            int: The number of readings exported.
+        """
+        archive = ColumnarArchive(path, compress=compress)
+        exported = 0
+        try:
+            cursor = self.conn.execute('''
+                   SELECT id, city, recorded_at, temperature_web, feels_like_web, temperature_api, feels_like_api,
+                          avg_temperature, source
+                   FROM weather_history WHERE id > ? AND archive_id IS NOT ? ORDER BY id
+               ''', (-1 if archive.max_id is None else archive.max_id, archive.archive_id))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                exported += archive.append([row[1:] for row in rows], max_id=rows[-1][0])
+            self.logger.info(f"Exported {exported} readings to archive '{path}'.")
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error exporting readings to archive: {e}")
+        return exported
+
+    def import_archive(self, path, chunk_size=50000):
+        """
+        Imports every reading of a columnar archive into the history table. The rows are marked
+        with the archive's id, so exporting to the same archive does not append them again.
+
+        Args:
+            path (str): Archive directory.
+            chunk_size (int): Number of rows inserted per batch.
+
+        Returns:
+            int: The number of readings imported.
+        """
+        archive = ColumnarArchive(path)
+        imported = 0
+        try:
+            with self.conn:
+                for rows in archive.iter_chunks(chunk_size):
+                    self.conn.executemany('''
+                           INSERT INTO weather_history
+                           (city, recorded_at, temperature_web, feels_like_web, temperature_api, feels_like_api,
+                            avg_temperature, source, archive_id)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ''', [(*row, archive.archive_id) for row in rows])
+                    imported += len(rows)
+            self.logger.info(f"Imported {imported} readings from archive '{path}'.")
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error importing readings from archive: {e}")
+            return 0
+        return imported
+
+    def enqueue_cities(self, cities):
+        """
+        Queues one collection job per city for a new sweep. Cities already in the queue are reset
+        to pending, so a finished sweep can simply be enqueued again.
+
+        Args:
+            cities (list of str): The cities to collect.
+
+        Returns:
+            int: The number of jobs queued.
+        """
+        now = time.time()
+        try:
+            with self.conn:
+                self.conn.executemany('''
+                       INSERT INTO collection_jobs (city, status, worker_id, lease_expires_at, attempts, updated_at)
+                       VALUES (?, ?, NULL, NULL, 0, ?)
+                       ON CONFLICT(city) DO UPDATE SET status = excluded.status, worker_id = NULL,
+                           lease_expires_at = NULL, attempts = 0, updated_at = excluded.updated_at
+                   ''', [(city, self.JOB_PENDING, now) for city in cities])
+            self.logger.info(f"Queued {len(cities)} collection jobs.")
+            return len(cities)
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error queueing collection jobs: {e}")
+            return 0
+
+    def _requeue_expired_jobs(self, now, max_attempts):
+        """Returns jobs whose lease ran out to the queue, or fails them after max_attempts, in the open transaction."""
+        cursor = self.conn.execute('''
+               UPDATE collection_jobs
+               SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker_id = NULL, lease_expires_at = NULL,
+                   updated_at = ?
+               WHERE status = ? AND lease_expires_at < ?
+               RETURNING city, status
+           ''', (max_attempts, self.JOB_FAILED, self.JOB_PENDING, now, self.JOB_LEASED, now))
+        for city, status in cursor.fetchall():
+            self.logger.warning(f"Lease on {city.title()} expired, job is now {status}.")
+
+    def claim_jobs(self, worker_id, batch_size=5, lease_seconds=120.0, max_attempts=3):
+        """
+        Atomically leases up to batch_size pending jobs to a worker. The claim runs in a
+        BEGIN IMMEDIATE transaction, so concurrent workers never lease the same city. Jobs of
+        crashed workers (expired leases) are re-queued first.
+
+        Args:
+            worker_id (str): The claiming worker.
+            batch_size (int): Maximum number of jobs to lease.
+            lease_seconds (float): How long the lease is valid without a heartbeat.
+            max_attempts (int): Leases per job before an expired job is marked failed.
+
+        Returns:
+            list of str: The leased cities, empty when nothing is pending.
+        """
+        now = time.time()
+        try:
+            with self.conn:
+                self.conn.execute('BEGIN IMMEDIATE')
+                self._requeue_expired_jobs(now, max_attempts)
+                cursor = self.conn.execute('''
+                       UPDATE collection_jobs
+                       SET status = ?, worker_id = ?, lease_expires_at = ?, attempts = attempts + 1, updated_at = ?
+                       WHERE city IN (SELECT city FROM collection_jobs WHERE status = ?
+                                      ORDER BY attempts, city LIMIT ?)
+                       RETURNING city
+                   ''', (self.JOB_LEASED, worker_id, now + lease_seconds, now, self.JOB_PENDING, batch_size))
+                cities = [row[0] for row in cursor.fetchall()]
+            return sorted(cities)
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error claiming jobs for worker {worker_id}: {e}")
+            return []
+
+    def complete_jobs(self, worker_id, readings, failed_cities=(), max_attempts=3):
+        """
+        Stores the readings of a worker's batch and marks their jobs done in one transaction.
+        Only jobs the worker still holds are touched: when a lease was lost to another worker,
+        that worker's result is the one kept. Failed cities go back to the queue until max_attempts.
+
+        Args:
+            worker_id (str): The worker reporting back.
+            readings (list of WeatherReading): Collected readings of leased cities.
+            failed_cities (list of str): Leased cities that could not be collected.
+            max_attempts (int): Leases per job before a failed city is given up.
+
+        Returns:
+            int: The number of jobs marked done.
+        """
+        now = time.time()
+        cities = [reading.city for reading in readings] + list(failed_cities)
+        if not cities:
+            return 0
+        try:
+            with get_metrics().timer('db_write'), self.conn:
+                self.conn.execute('BEGIN IMMEDIATE')
+                placeholders = ', '.join('?' * len(cities))
+                owned = {row[0] for row in self.conn.execute(f'''
+                       SELECT city FROM collection_jobs WHERE worker_id = ? AND status = ? AND city IN ({placeholders})
+                   ''', (worker_id, self.JOB_LEASED, *cities))}
+                rows = self._reading_rows([reading for reading in readings if reading.city in owned])
+                self._write_reading_rows(rows)
+                self.conn.executemany('''
+                       UPDATE collection_jobs SET status = ?, worker_id = NULL, lease_expires_at = NULL, updated_at = ?
+                       WHERE city = ?
+                   ''', [(self.JOB_DONE, now, row[0]) for row in rows])
+                self.conn.executemany('''
+                       UPDATE collection_jobs
+                       SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker_id = NULL,
+                           lease_expires_at = NULL, updated_at = ?
+                       WHERE city = ?
+                   ''', [(max_attempts, self.JOB_FAILED, self.JOB_PENDING, now, city)
+                         for city in failed_cities if city in owned])
+                self.conn.execute('''
+                       UPDATE collection_workers SET jobs_done = jobs_done + ?, last_heartbeat = ? WHERE worker_id = ?
+                   ''', (len(rows), now, worker_id))
+            lost = len(cities) - len(owned)
+            if lost:
+                self.logger.warning(f"Worker {worker_id} lost the lease on {lost} jobs, their results were dropped.")
+            get_metrics().increment('db_write', 'success', len(rows))
+            return len(rows)
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error completing jobs for worker {worker_id}: {e}")
+            get_metrics().increment('db_write', 'failure', len(readings))
+            return 0
+
+    def heartbeat(self, worker_id, lease_seconds=120.0):
+        """
+        Records that a worker is alive and extends the leases of the jobs it holds.
+
+        Args:
+            worker_id (str): The worker.
+            lease_seconds (float): New lease length, counted from now.
+        """
+        now = time.time()
+        try:
+            with self.conn:
+                self.conn.execute('''
+                       INSERT INTO collection_workers (worker_id, started_at, last_heartbeat) VALUES (?, ?, ?)
+                       ON CONFLICT(worker_id) DO UPDATE SET last_heartbeat = excluded.last_heartbeat
+                   ''', (worker_id, now, now))
+                self.conn.execute('''
+                       UPDATE collection_jobs SET lease_expires_at = ? WHERE worker_id = ? AND status = ?
+                   ''', (now + lease_seconds, worker_id, self.JOB_LEASED))
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error recording heartbeat of worker {worker_id}: {e}")
+
+    def get_job_counts(self):
+        """
+        Returns:
+            dict: Job status mapped to the number of jobs in it.
+        """
+        try:
+            cursor = self.conn.execute('SELECT status, COUNT(*) FROM collection_jobs GROUP BY status')
+            return dict(cursor.fetchall())
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error counting collection jobs: {e}")
+            return {}
+
     # function to clear the database table
     def clear_table(self):
         """Clears all records from the weather_data table."""
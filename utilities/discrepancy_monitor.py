@@ -0,0 +1,118 @@
+import math
+
+from helpers.logger import setup_logger
+
+
+class RunningStats:
+    """Welford-style running count, mean and variance of one city's discrepancies."""
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, value):
+        """Adds one value in O(1) time and memory."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class StreamingDiscrepancyDetector:
+    """
+    Flags discrepancies as soon as each reading is collected, instead of at the end of a run.
+
+    Every update is constant time: a threshold check, a z-score check against the city's
+    running statistics and one update of the persisted state, so a restart resumes from the
+    persisted statistics instead of recomputing them from the history. The state is advanced
+    inside SQLite, so several workers sharing the database all contribute to it.
+    """
+
+    def __init__(self, db_helper=None, threshold=3.0, z_threshold=3.0, min_samples=5, on_alert=None):
+        """
+        Args:
+            db_helper (DatabaseHelper): Stores the running statistics. None keeps them in memory only.
+            threshold (float): Absolute discrepancy in °C above which a reading is flagged.
+            z_threshold (float): Number of standard deviations from the city's mean that marks an outlier.
+            min_samples (int): Readings a city needs before outlier detection starts.
+            on_alert (callable): Optional callback invoked with every alert dictionary.
+        """
+        self.logger = setup_logger(__name__)
+        self.db_helper = db_helper
+        self.threshold = threshold
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self.on_alert = on_alert
+        self.alerts = []
+        self.stats = {}
+        if db_helper is not None:
+            self.stats = {city: RunningStats(*state) for city, state in db_helper.load_discrepancy_state().items()}
+            self.logger.info(f"Loaded running discrepancy statistics for {len(self.stats)} cities.")
+
+    def update(self, city, temperature_web, temperature_api, stored=False):
+        """
+        Processes one reading and returns the alerts it raised.
+
+        Args:
+            city (str): The name of the city.
+            temperature_web (float): Website temperature.
+            temperature_api (float): API temperature.
+            stored (bool): The reading was stored with DatabaseHelper.insert_readings() or complete_jobs(),
+                           which advanced the persisted statistics in the same transaction. They are
+                           only read back then.
+
+        Returns:
+            list of dict: Alerts of type 'threshold' and/or 'outlier', empty if the reading is normal.
+        """
+        if temperature_web is None or temperature_api is None:
+            return []
+
+        discrepancy = abs(float(temperature_web) - float(temperature_api))
+        stats = self.stats.get(city)
+        if stats is None:
+            stats = self.stats[city] = RunningStats()
+
+        alerts = []
+        if discrepancy > self.threshold:
+            alerts.append({'type': 'threshold', 'city': city, 'discrepancy': discrepancy,
+                           'threshold': self.threshold})
+        # Score against the statistics before this reading, so an outlier does not dilute its own score
+        if stats.count >= self.min_samples and stats.std > 0:
+            z_score = (discrepancy - stats.mean) / stats.std
+            if abs(z_score) > self.z_threshold:
+                alerts.append({'type': 'outlier', 'city': city, 'discrepancy': discrepancy,
+                               'mean': stats.mean, 'std': stats.std, 'z_score': z_score})
+
+        if self.db_helper is None:
+            stats.update(discrepancy)
+        else:
+            # The persisted state includes the readings of other workers, so it replaces the local one
+            state = (self.db_helper.load_discrepancy_state(city).get(city) if stored
+                     else self.db_helper.advance_discrepancy_state(city, discrepancy))
+            if state is None:
+                stats.update(discrepancy)
+            else:
+                self.stats[city] = RunningStats(*state)
+
+        for alert in alerts:
+            if alert['type'] == 'threshold':
+                self.logger.warning(f"Discrepancy alert for {city.title()}: {discrepancy:.2f}°C "
+                                    f"exceeds the {self.threshold}°C threshold.")
+            else:
+                self.logger.warning(f"Outlier alert for {city.title()}: {discrepancy:.2f}°C is "
+                                    f"{alert['z_score']:.1f} standard deviations from its mean of "
+                                    f"{alert['mean']:.2f}°C.")
+            if self.on_alert:
+                self.on_alert(alert)
+        self.alerts.extend(alerts)
+        return alerts
@@ -0,0 +1,74 @@
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+
+class WeatherReading(NamedTuple):
+    """
+    One reading of a city from both sources. A NamedTuple has no per-instance __dict__, so a
+    reading costs a single tuple instead of a dict per source and another one per database row,
+    and it binds directly to SQL parameters.
+    """
+    city: str
+    temperature_web: Optional[float]
+    feels_like_web: Optional[float]
+    temperature_api: Optional[float]
+    feels_like_api: Optional[float]
+    fetched_at: Optional[float] = None
+    source: Optional[str] = None
+
+    DEFAULT_SOURCE = "timeanddate.com+openweathermap"
+
+    @classmethod
+    def from_sources(cls, city, web_data, api_data, fetched_at=None, source=DEFAULT_SOURCE):
+        """
+        Combines the dictionaries returned by WebScraper and ApiHelper into one reading.
+
+        Args:
+            city (str): The name of the city.
+            web_data (dict): A dictionary containing 'temperature_web' and 'feels_like_web'.
+            api_data (dict): A dictionary containing 'temperature_api' and 'feels_like_api'.
+            fetched_at (float): Epoch timestamp of the reading, defaults to now.
+            source (str): Where the values came from.
+        """
+        return cls(city, web_data.get('temperature_web'), web_data.get('feels_like_web'),
+                   api_data.get('temperature_api'), api_data.get('feels_like_api'),
+                   time.time() if fetched_at is None else fetched_at, source)
+
+    @property
+    def is_complete(self):
+        """True when both sources delivered a temperature."""
+        return self.temperature_web is not None and self.temperature_api is not None
+
+    @property
+    def avg_temperature(self):
+        """Average of both temperatures, None unless the reading is complete."""
+        if not self.is_complete:
+            return None
+        return (float(self.temperature_web) + float(self.temperature_api)) / 2
+
+
+def readings_to_columns(readings):
+    """
+    Transposes readings into one array per field in a single pass, for DataFrame construction.
+
+    Args:
+        readings (list of WeatherReading): The readings.
+
+    Returns:
+        dict: 'city' and 'source' as object arrays, the temperatures, 'avg_temperature' and
+              'fetched_at' as float64 arrays with NaN for missing values.
+    """
+    if not readings:
+        return {name: np.empty(0, dtype=object if name in ('city', 'source') else np.float64)
+                for name in (*WeatherReading._fields, 'avg_temperature')}
+
+    columns = {}
+    for name, values in zip(WeatherReading._fields, zip(*readings)):
+        if name in ('city', 'source'):
+            columns[name] = np.array(values, dtype=object)
+        else:
+            columns[name] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    columns['avg_temperature'] = (columns['temperature_web'] + columns['temperature_api']) / 2
+    return columns
@@ -1,25 +1,143 @@
+import glob
+import hashlib
+import html
+import io
+import json
+import os
+
+import numpy as np
 import pandas as pd
 
 from helpers.logger import setup_logger
+from helpers.metrics import timed
+from utilities.columnar_archive import ColumnarArchive
+from utilities.models import readings_to_columns
+from utilities.report_summary import write_csv_report, write_json_report
+
+
+class DiscrepancyAnalysis:
+    """
+    Vectorized analysis engine over a discrepancy array. The values are sorted once,
+    after which any number of threshold counts and row selections are answered with
+    binary searches, and all order statistics are read straight from the sorted array.
+    """
+    PERCENTILES = (50, 90, 95, 99)
+
+    def __init__(self, discrepancy):
+        """
+        Args:
+            discrepancy (array-like): One discrepancy value per DataFrame row, NaN for missing values.
+        """
+        values = np.asarray(discrepancy, dtype=np.float64)
+        valid_positions = np.flatnonzero(~np.isnan(values))
+        valid_values = values[valid_positions]
+        order = np.argsort(valid_values, kind='stable')
+        self.sorted_values = valid_values[order]
+        self.sorted_positions = valid_positions[order]
+
+    def __len__(self):
+        return len(self.sorted_values)
+
+    def count_above(self, thresholds):
+        """
+        Counts the values strictly greater than each threshold.
+
+        Args:
+            thresholds (list of float): Thresholds to answer in one call.
+
+        Returns:
+            dict: Threshold mapped to the number of values above it.
+        """
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        counts = len(self.sorted_values) - np.searchsorted(self.sorted_values, thresholds, side='right')
+        return dict(zip(thresholds.tolist(), counts.tolist()))
+
+    def positions_above(self, threshold):
+        """Returns the row positions of values above the threshold, in their original order."""
+        start = np.searchsorted(self.sorted_values, threshold, side='right')
+        return np.sort(self.sorted_positions[start:])
+
+    def percentiles(self, percentiles=PERCENTILES):
+        """Linearly interpolated percentiles, read from the already sorted values."""
+        if not len(self.sorted_values):
+            return {}
+        ranks = np.asarray(percentiles, dtype=np.float64) / 100 * (len(self.sorted_values) - 1)
+        lower = np.floor(ranks).astype(np.intp)
+        upper = np.ceil(ranks).astype(np.intp)
+        weights = ranks - lower
+        values = self.sorted_values[lower] * (1 - weights) + self.sorted_values[upper] * weights
+        return dict(zip(percentiles, values.tolist()))
+
+    def statistics(self):
+        """
+        Computes count, mean, standard deviation, extremes and percentiles.
+
+        Returns:
+            dict: The statistics, or an empty dict when there are no valid values.
+        """
+        if not len(self.sorted_values):
+            return {}
+        mean = float(self.sorted_values.mean())
+        stats = {
+            'count': len(self.sorted_values),
+            'mean': mean,
+            'std': float(np.sqrt(np.mean(np.square(self.sorted_values - mean)))),
+            'min': float(self.sorted_values[0]),
+            'max': float(self.sorted_values[-1]),
+        }
+        stats.update({f"p{p}": value for p, value in self.percentiles().items()})
+        return stats
 
 
 class ReportGeneration:
     """Analyzes data and generates a user-friendly HTML report."""
+    REPORT_STYLE = """
+                body { font-family: Arial, sans-serif; margin: 20px; background-color: #f9f9f9; }
+                h1, h2 { color: #2E4053; border-bottom: 2px solid #aed6f1; padding-bottom: 5px;}
+                .container { max-width: 900px; margin: auto; padding: 20px; border: 1px solid #ddd; border-radius: 8px; background-color: white; box-shadow: 0 4px 8px 0 rgba(0,0,0,0.1);}
+                table { width: 100%; border-collapse: collapse; margin-bottom: 30px; }
+                th, td { padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }
+                th { background-color: #f2f2f2; font-weight: bold; }
+                tr:hover { background-color: #f5f5f5; }
+                .stats-table td:first-child { font-weight: bold; }
+                .pager { margin-bottom: 20px; }
+            """
+    DISCREPANCY_COLUMNS = ['city', 'temperature_web', 'temperature_api', 'discrepancy']
+    FULL_DATA_COLUMNS = ['city', 'temperature_web', 'feels_like_web', 'temperature_api', 'feels_like_api',
+                         'avg_temperature']
+    STREAM_CHUNK_ROWS = 500
+    CACHE_VERSION = 2
+    DOCUMENT_END = '</div>\n</body>\n</html>\n'
+    TEMPERATURE_COLUMNS = ['temperature_web', 'feels_like_web', 'temperature_api', 'feels_like_api',
+                           'avg_temperature']
 
-    def __init__(self, all_weather_data):
+    def __init__(self, all_weather_data, compact=False):
         """
         Initializes with the data to be analyzed. This method is now robust
         against missing or malformed data.
 
         Args:
-            all_weather_data (list of dict): Data fetched from the database.
+            all_weather_data (list of dict): Data fetched from the database, a list of WeatherReading
+                                             records, or a dict of columns.
+            compact (bool): Build a memory-lean DataFrame with a categorical city column and
+                            float32 temperatures, constructed once without intermediate copies.
         """
         self.logger = setup_logger(__name__)
+        self._analysis = None
+        self._feels_like_analysis = None
         if not all_weather_data:
             self.logger.warning("ReportGeneration initialized with no data.")
             self.df = pd.DataFrame()
             return
 
+        if isinstance(all_weather_data, list) and hasattr(all_weather_data[0], '_fields'):
+            # WeatherReading records are transposed into columns once, instead of read row by row
+            all_weather_data = readings_to_columns(all_weather_data)
+
+        if compact:
+            self.df = self._build_compact_frame(all_weather_data)
+            return
+
         self.df = pd.DataFrame(all_weather_data)
 
         # Check if required columns exist before processing to prevent KeyErrors
@@ -36,95 +154,522 @@ class ReportGeneration:
             if 'discrepancy' not in self.df.columns:
                 self.df['discrepancy'] = pd.Series(dtype='float64')
 
+    def _build_compact_frame(self, all_weather_data):
+        """
+        Builds the DataFrame once with a fixed, compact schema. Every column is converted straight
+        into its final dtype, rows missing a temperature are dropped with a single mask, and the
+        discrepancy is computed before construction so the frame is never copied afterwards.
+        """
+        def column(name):
+            if isinstance(all_weather_data, dict):
+                return all_weather_data.get(name)
+            if not any(name in row for row in all_weather_data):
+                return None
+            return [row.get(name) for row in all_weather_data]
+
+        cities = column('city')
+        if cities is None or column('temperature_web') is None or column('temperature_api') is None:
+            self.logger.warning("Input data is missing required temperature columns. Report may be incomplete.")
+
+        present = [values for values in map(column, ['city', *self.TEMPERATURE_COLUMNS]) if values is not None]
+        row_count = len(present[0]) if present else 0
+        columns = {}
+        for name in self.TEMPERATURE_COLUMNS:
+            values = column(name)
+            columns[name] = (np.full(row_count, np.nan, dtype=np.float32) if values is None
+                             else np.asarray(values, dtype=np.float32))
+
+        valid = ~(np.isnan(columns['temperature_web']) | np.isnan(columns['temperature_api']))
+        if not valid.all():
+            columns = {name: values[valid] for name, values in columns.items()}
+        discrepancy = np.abs(columns['temperature_web'] - columns['temperature_api'])
+        if cities is not None:
+            # Like the default frame, there is no city column when the input has none
+            columns = {'city': pd.Categorical(np.asarray(cities, dtype=object)[valid]), **columns}
+
+        df = pd.DataFrame({**columns, 'discrepancy': discrepancy}, copy=False)
+        compact_bytes = int(df.memory_usage(deep=True).sum())
+        default_bytes, sample_rows = self._measure_default_memory(df)
+        self.logger.info(f"Compact DataFrame with {len(df)} rows uses {compact_bytes / 1024:.1f} KiB, "
+                         f"down from {default_bytes / 1024:.1f} KiB with default dtypes "
+                         f"(measured on {sample_rows} rows{', extrapolated' if sample_rows < len(df) else ''}).")
+        return df
+
+    @staticmethod
+    def _measure_default_memory(df, sample_rows=1000):
+        """
+        Measures the deep memory of the frame with the default object city names and float64
+        numbers on its first sample_rows rows, and scales it to the full frame.
+
+        Returns:
+            tuple: (bytes, number of rows actually converted and measured)
+        """
+        sample = df.head(sample_rows)
+        dtypes = {name: object if name == 'city' else np.float64 for name in sample.columns}
+        sample_bytes = int(sample.astype(dtypes).memory_usage(deep=True).sum())
+        if len(sample) == len(df):
+            return sample_bytes, len(sample)
+        return round(sample_bytes * len(df) / len(sample)), len(sample)
+
+    def get_memory_usage(self):
+        """Returns the deep memory footprint of the report DataFrame in bytes."""
+        return int(self.df.memory_usage(deep=True).sum())
+
+    @classmethod
+    def from_archive(cls, path, compact=False):
+        """
+        Builds a report straight from a columnar archive. The archive columns are memory
+        mapped, so no SQLite round trip or per-row dictionaries are needed.
+
+        Args:
+            path (str): Archive directory written by DatabaseHelper.export_archive().
+            compact (bool): Build the memory-lean DataFrame, see __init__().
+        """
+        return cls(ColumnarArchive(path).to_frame_columns(), compact=compact)
+
+    @property
+    def analysis(self):
+        """The discrepancy analysis engine, built and sorted once on first use."""
+        if self._analysis is None:
+            discrepancy = self.df['discrepancy'] if 'discrepancy' in self.df else []
+            self._analysis = DiscrepancyAnalysis(discrepancy)
+        return self._analysis
+
+    @property
+    def feels_like_analysis(self):
+        """The analysis engine for the absolute 'feels like' difference between the two sources."""
+        if self._feels_like_analysis is None:
+            if 'feels_like_web' in self.df and 'feels_like_api' in self.df:
+                feels_like = (self.df['feels_like_web'].to_numpy(dtype=np.float64, na_value=np.nan)
+                              - self.df['feels_like_api'].to_numpy(dtype=np.float64, na_value=np.nan))
+                self._feels_like_analysis = DiscrepancyAnalysis(np.abs(feels_like))
+            else:
+                self._feels_like_analysis = DiscrepancyAnalysis([])
+        return self._feels_like_analysis
+
     def _get_summary_statistics(self):
         """
         Calculates summary statistics for the temperature discrepancy.
         Now safely handles cases with no valid data.
         """
         # Check if the dataframe is empty or the discrepancy column has no valid data
-        if self.df.empty or self.df['discrepancy'].isnull().all():
+        stats = self.analysis.statistics() if not self.df.empty else {}
+        if not stats:
             return {
                 "Mean Discrepancy": "N/A",
                 "Maximum Discrepancy": "N/A",
                 "Minimum Discrepancy": "N/A"
             }
 
-        mean_disc = self.df['discrepancy'].mean()
-        max_disc = self.df['discrepancy'].max()
-        min_disc = self.df['discrepancy'].min()
         return {
-            "Mean Discrepancy": f"{mean_disc:.2f} °C",
-            "Maximum Discrepancy": f"{max_disc:.2f} °C",
-            "Minimum Discrepancy": f"{min_disc:.2f} °C"
+            "Mean Discrepancy": f"{stats['mean']:.2f} °C",
+            "Maximum Discrepancy": f"{stats['max']:.2f} °C",
+            "Minimum Discrepancy": f"{stats['min']:.2f} °C"
+        }
+
+    def get_extended_statistics(self):
+        """
+        Calculates the full set of statistics for the temperature and 'feels like' discrepancies.
+
+        Returns:
+            dict: 'temperature' and 'feels_like' mapped to their statistics dictionaries.
+        """
+        return {
+            'temperature': self.analysis.statistics(),
+            'feels_like': self.feels_like_analysis.statistics(),
         }
 
+    def get_threshold_summary(self, thresholds):
+        """
+        Counts the readings above each threshold with one binary search per threshold.
+
+        Args:
+            thresholds (list of float): Discrepancy thresholds in °C.
+
+        Returns:
+            dict: Threshold mapped to the number of readings exceeding it.
+        """
+        return self.analysis.count_above(thresholds)
+
+    def get_summary(self, thresholds=(2.0,)):
+        """
+        Builds the machine-readable summary, in the same layout as report_summary.summarize_readings().
+
+        Args:
+            thresholds (list of float): Discrepancy thresholds in °C.
+
+        Returns:
+            dict: The summary with 'readings', 'temperature', 'feels_like' and 'thresholds' entries.
+        """
+        threshold_entries = []
+        for threshold in sorted(float(t) for t in thresholds):
+            breaches_df = self._get_discrepancy_report(threshold)
+            breaches = [] if breaches_df.empty else [
+                {'city': str(city), 'temperature_web': float(t_web), 'temperature_api': float(t_api),
+                 'discrepancy': float(discrepancy)}
+                for city, t_web, t_api, discrepancy in breaches_df[self.DISCREPANCY_COLUMNS].itertuples(
+                    index=False, name=None)
+            ]
+            threshold_entries.append({'threshold': threshold, 'count': len(breaches), 'breaches': breaches})
+        return {
+            'readings': len(self.analysis),
+            **self.get_extended_statistics(),
+            'thresholds': threshold_entries,
+        }
+
+    def generate_json_report(self, thresholds=(2.0,), filename="weather_discrepancy_report.json"):
+        """Writes the summary statistics and threshold breaches as JSON."""
+        write_json_report(self.get_summary(thresholds), filename)
+        self.logger.info(f"JSON report successfully generated: {filename}")
+
+    def generate_csv_report(self, thresholds=(2.0,), filename="weather_discrepancy_report.csv"):
+        """Writes the summary statistics and threshold breaches as a tidy CSV table."""
+        write_csv_report(self.get_summary(thresholds), filename)
+        self.logger.info(f"CSV report successfully generated: {filename}")
+
     def _get_discrepancy_report(self, threshold=2.0):
         """Filters for cities where the temperature difference exceeds a threshold."""
-        if 'discrepancy' not in self.df or self.df['discrepancy'].isnull().all():
+        if self.df.empty or not len(self.analysis):
             return pd.DataFrame()
-        return self.df[self.df['discrepancy'] > threshold]
+        return self.df.iloc[self.analysis.positions_above(threshold)]
 
-    def generate_html_report(self, threshold=2.0, filename="weather_discrepancy_report.html"):
+    @timed('report_render')
+    def generate_html_report(self, threshold=2.0, filename="weather_discrepancy_report.html", extra_sections=None):
         """
         Generates and saves a complete HTML report.
+
+        Args:
+            threshold (float): Discrepancy threshold in °C.
+            filename (str): Path of the report file.
+            extra_sections (list of tuple): Optional (title, html) sections appended after the
+                                            full data log, e.g. TrendAnalysis.to_html().
         """
         self.logger.info(f"Generating HTML report. Threshold: {threshold}°C")
         if self.df.empty:
             self.logger.warning("Cannot generate report because no valid data is available.")
             return
 
-        stats = self._get_summary_statistics()
+        existing_cols = [col for col in self.FULL_DATA_COLUMNS if col in self.df.columns]
         discrepancies_df = self._get_discrepancy_report(threshold)
+        if discrepancies_df.empty:
+            discrepancies_df = self.df.iloc[0:0]
+        body = self._report_body(
+            threshold, self._summary_table_html(),
+            self._table_html(self.DISCREPANCY_COLUMNS, 'discrepancy-table', ''.join(
+                map(self._render_row, discrepancies_df[self.DISCREPANCY_COLUMNS].itertuples(index=False, name=None)))),
+            self._table_html(existing_cols, 'full-data-table', ''.join(
+                map(self._render_row, self.df[existing_cols].itertuples(index=False, name=None)))))
+
+        with open(filename, "w", encoding='utf-8') as f:
+            f.write(body)
+            f.write(self._render_extra_sections(extra_sections))
+            self._write_document_end(f)
+        self.logger.info(f"Report successfully generated: {filename}")
+
+    def _summary_table_html(self):
+        return self._table_html(['Statistic', 'Value'], 'stats-table',
+                                ''.join(self._render_row(item) for item in self._get_summary_statistics().items()))
+
+    def _report_body(self, threshold, summary_html, discrepancies_html, full_data_html):
+        """
+        Returns the page up to the extra sections. generate_html_report() and
+        generate_cached_html_report() share it, so both render the same page for the same data.
+        """
+        document = io.StringIO()
+        self._write_document_start(document, "Weather Data Analysis Report")
+        document.write(f"<h2>Summary Statistics</h2>\n{summary_html}"
+                       f"<h2>Temperature Discrepancies (Threshold > {threshold}°C)</h2>\n{discrepancies_html}"
+                       f"<h2>Full Data Log</h2>\n{full_data_html}")
+        return document.getvalue()
 
-        # Convert DataFrames to HTML tables
-        stats_html = pd.DataFrame.from_dict(stats, orient='index', columns=['Value']).to_html(header=False,
-                                                                                              classes='stats-table')
-
-        discrepancy_cols = ['city', 'temperature_web', 'temperature_api', 'discrepancy']
-        discrepancies_html = discrepancies_df[discrepancy_cols].to_html(index=False, classes='discrepancy-table',
-                                                                        float_format='%.2f')
-
-        # Prepare the full data log, ensuring all columns exist
-        full_data_cols = ['city', 'temperature_web', 'feels_like_web', 'temperature_api', 'feels_like_api',
-                          'avg_temperature']
-        # Filter dataframe to only columns that actually exist to prevent KeyErrors
-        existing_cols = [col for col in full_data_cols if col in self.df.columns]
-        full_data_html = self.df[existing_cols].round(2).to_html(index=False, classes='full-data-table')
-
-        # Assemble the final HTML content with CSS styling
-        html_content = f"""
-        <html>
-        <head>
-            <title>Weather Data Analysis Report</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; background-color: #f9f9f9; }}
-                h1, h2 {{ color: #2E4053; border-bottom: 2px solid #aed6f1; padding-bottom: 5px;}}
-                .container {{ max-width: 900px; margin: auto; padding: 20px; border: 1px solid #ddd; border-radius: 8px; background-color: white; box-shadow: 0 4px 8px 0 rgba(0,0,0,0.1);}}
-                table {{ width: 100%; border-collapse: collapse; margin-bottom: 30px; }}
-                th, td {{ padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }}
-                th {{ background-color: #f2f2f2; font-weight: bold; }}
-                tr:hover {{ background-color: #f5f5f5; }}
-                .stats-table td:first-child {{ font-weight: bold; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h1>Weather Data Analysis Report</h1>
-
-                <h2>Summary Statistics</h2>
-                {stats_html}
-
-                <h2>Temperature Discrepancies (Threshold > {threshold}°C)</h2>
-                {discrepancies_html}
-
-                <h2>Full Data Log</h2>
-                {full_data_html}
-
-            </div>
-        </body>
-        </html>
+    @timed('report_render')
+    def generate_multi_threshold_html_report(self, thresholds, filename="weather_discrepancy_report.html"):
         """
+        Generates one HTML report covering several thresholds. The discrepancy array is
+        sorted once, so each additional threshold only costs a binary search.
+
+        Args:
+            thresholds (list of float): Discrepancy thresholds in °C.
+            filename (str): Path of the report file.
+        """
+        self.logger.info(f"Generating multi-threshold HTML report. Thresholds: {thresholds}")
+        if self.df.empty:
+            self.logger.warning("Cannot generate report because no valid data is available.")
+            return
+
+        thresholds = sorted(thresholds)
+        stats_html = pd.DataFrame.from_dict(self._get_summary_statistics(), orient='index',
+                                            columns=['Value']).to_html(header=False, classes='stats-table')
+        extended_html = pd.DataFrame(self.get_extended_statistics()).to_html(classes='stats-table',
+                                                                             float_format='%.2f', na_rep='N/A')
+        counts = self.get_threshold_summary(thresholds)
+        counts_html = pd.DataFrame({'threshold': list(counts), 'readings above': list(counts.values())}).to_html(
+            index=False, classes='stats-table', float_format='%.2f')
+
+        sections = []
+        for threshold in thresholds:
+            discrepancies_df = self._get_discrepancy_report(threshold)
+            if discrepancies_df.empty:
+                discrepancies_df = self.df.iloc[0:0]
+            table_html = discrepancies_df[self.DISCREPANCY_COLUMNS].to_html(index=False, classes='discrepancy-table',
+                                                                            float_format='%.2f')
+            sections.append(f"<h2>Temperature Discrepancies (Threshold > {threshold}°C)</h2>\n{table_html}")
 
         with open(filename, "w", encoding='utf-8') as f:
-            f.write(html_content)
-        self.logger.info(f"Report successfully generated: {filename}")
+            self._write_document_start(f, "Weather Data Analysis Report")
+            f.write(f"<h2>Summary Statistics</h2>\n{stats_html}\n")
+            f.write(f"<h2>Discrepancy Distribution</h2>\n{extended_html}\n")
+            f.write(f"<h2>Readings Above Each Threshold</h2>\n{counts_html}\n")
+            f.write("\n".join(sections))
+            self._write_document_end(f)
+        self.logger.info(f"Multi-threshold report successfully generated: {filename}")
+
+    @staticmethod
+    def _render_extra_sections(extra_sections):
+        return ''.join(f"<h2>{html.escape(title)}</h2>\n{section_html}\n" for title, section_html in
+                       (extra_sections or []))
+
+    @staticmethod
+    def _format_cell(value):
+        """Formats a single table cell the same way for every streamed table."""
+        if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+            return ''
+        if isinstance(value, (float, np.floating)):
+            return f"{value:.2f}"
+        return html.escape(str(value))
+
+    def _iter_table_chunks(self, df, columns, css_class):
+        """
+        Yields an HTML table in pieces of at most STREAM_CHUNK_ROWS rows, so a large
+        table is never held in memory as one string.
+        """
+        yield self._table_open(columns, css_class)
+        for start in range(0, len(df), self.STREAM_CHUNK_ROWS):
+            chunk = df.iloc[start:start + self.STREAM_CHUNK_ROWS]
+            yield ''.join(self._render_row(row) for row in chunk[columns].itertuples(index=False, name=None))
+        yield '</tbody>\n</table>\n'
+
+    def _render_row(self, row):
+        return '<tr>' + ''.join(f"<td>{self._format_cell(v)}</td>" for v in row) + '</tr>\n'
+
+    @staticmethod
+    def _table_open(columns, css_class):
+        header = ''.join(f"<th>{html.escape(col)}</th>" for col in columns)
+        return f'<table class="{css_class}">\n<thead><tr>{header}</tr></thead>\n<tbody>\n'
+
+    def _table_html(self, columns, css_class, rows_html):
+        return f"{self._table_open(columns, css_class)}{rows_html}</tbody>\n</table>\n"
+
+    def _write_document_start(self, f, title):
+        f.write(f'<html>\n<head>\n<meta charset="utf-8">\n<title>{html.escape(title)}</title>\n'
+                f'<style>{self.REPORT_STYLE}</style>\n</head>\n<body>\n<div class="container">\n'
+                f'<h1>{html.escape(title)}</h1>\n')
+
+    @classmethod
+    def _write_document_end(cls, f):
+        f.write(cls.DOCUMENT_END)
+
+    @timed('report_render')
+    def generate_streaming_html_report(self, threshold=2.0, filename="weather_discrepancy_report.html",
+                                       rows_per_page=1000):
+        """
+        Generates the report for large datasets by streaming it to disk in chunks.
+
+        The main file holds the summary statistics, the discrepancy table and an index of
+        the full data log. The full data log itself is split into pages of rows_per_page rows,
+        written to a '<report name>_pages' directory next to the main file.
+
+        Args:
+            threshold (float): Discrepancy threshold in °C.
+            filename (str): Path of the main report file.
+            rows_per_page (int): Number of full data log rows per page, at least 1.
+
+        Returns:
+            list of str: Paths of the written page files.
+        """
+        if rows_per_page < 1:
+            raise ValueError(f"rows_per_page must be at least 1, got {rows_per_page}")
+        self.logger.info(f"Generating streaming HTML report. Threshold: {threshold}°C")
+        if self.df.empty:
+            self.logger.warning("Cannot generate report because no valid data is available.")
+            return []
+
+        filename = str(filename)
+        pages_dir = f"{os.path.splitext(filename)[0]}_pages"
+        os.makedirs(pages_dir, exist_ok=True)
+        # Pages of an earlier, longer report would otherwise stay behind and look current
+        for stale_page in glob.glob(os.path.join(pages_dir, "page_*.html")):
+            os.remove(stale_page)
+        pages_dir_name = os.path.basename(pages_dir)
+
+        existing_cols = [col for col in self.FULL_DATA_COLUMNS if col in self.df.columns]
+        page_count = max(1, -(-len(self.df) // rows_per_page))
+        page_paths = []
+
+        with open(filename, "w", encoding='utf-8') as f:
+            self._write_document_start(f, "Weather Data Analysis Report")
+
+            f.write("<h2>Summary Statistics</h2>\n<table class=\"stats-table\">\n<tbody>\n")
+            for name, value in self._get_summary_statistics().items():
+                f.write(f"<tr><th>{html.escape(name)}</th><td>{html.escape(value)}</td></tr>\n")
+            f.write("</tbody>\n</table>\n")
+
+            f.write(f"<h2>Temperature Discrepancies (Threshold > {threshold}°C)</h2>\n")
+            discrepancies_df = self._get_discrepancy_report(threshold)
+            if discrepancies_df.empty:
+                discrepancies_df = self.df.iloc[0:0]
+            for piece in self._iter_table_chunks(discrepancies_df, self.DISCREPANCY_COLUMNS, 'discrepancy-table'):
+                f.write(piece)
+
+            f.write(f"<h2>Full Data Log ({len(self.df)} rows, {page_count} pages)</h2>\n<ol>\n")
+            for page in range(page_count):
+                rows = self.df.iloc[page * rows_per_page:(page + 1) * rows_per_page]
+                first_city = html.escape(str(rows['city'].iloc[0])) if 'city' in rows else ''
+                last_city = html.escape(str(rows['city'].iloc[-1])) if 'city' in rows else ''
+                f.write(f'<li><a href="{pages_dir_name}/page_{page + 1:04d}.html">'
+                        f'Page {page + 1}: {first_city} &ndash; {last_city} ({len(rows)} rows)</a></li>\n')
+            f.write("</ol>\n")
+            self._write_document_end(f)
+
+        index_link = os.path.basename(filename)
+        for page in range(page_count):
+            page_path = os.path.join(pages_dir, f"page_{page + 1:04d}.html")
+            rows = self.df.iloc[page * rows_per_page:(page + 1) * rows_per_page]
+            with open(page_path, "w", encoding='utf-8') as f:
+                self._write_document_start(f, f"Full Data Log - Page {page + 1} of {page_count}")
+                nav = [f'<a href="../{index_link}">Index</a>']
+                if page > 0:
+                    nav.append(f'<a href="page_{page:04d}.html">Previous</a>')
+                if page + 1 < page_count:
+                    nav.append(f'<a href="page_{page + 2:04d}.html">Next</a>')
+                f.write(f'<div class="pager">{" | ".join(nav)}</div>\n')
+                for piece in self._iter_table_chunks(rows, existing_cols, 'full-data-table'):
+                    f.write(piece)
+                self._write_document_end(f)
+            page_paths.append(page_path)
+
+        self.logger.info(f"Streaming report successfully generated: {filename} ({page_count} data pages)")
+        return page_paths
+
+    def _fingerprint_rows(self, columns):
+        """Returns one content hash per row, computed vectorized over the given columns."""
+        return pd.util.hash_pandas_object(self.df[columns], index=False).to_numpy()
+
+    @timed('report_render')
+    def generate_cached_html_report(self, threshold=2.0, filename="weather_discrepancy_report.html",
+                                    cache_file=None, extra_sections=None):
+        """
+        Generates the HTML report incrementally, using a content-hash cache from previous runs.
+
+        Every row is fingerprinted together with the threshold, and the extra sections separately.
+        When nothing changed and the report file still exists, generation is skipped entirely. When
+        only the extra sections changed, just they are rewritten at the end of the file. Otherwise
+        only the sections and per-city row fragments whose content changed are rendered again, the
+        rest is reused. The page is the same as the one generate_html_report() writes.
+
+        Args:
+            threshold (float): Discrepancy threshold in °C.
+            filename (str): Path of the report file.
+            cache_file (str): Path of the fragment cache. Defaults to a hidden file next to the report.
+            extra_sections (list of tuple): Optional (title, html) sections, see generate_html_report().
+
+        Returns:
+            bool: True if the report was (re)written, False if it was already up to date.
+        """
+        if self.df.empty:
+            self.logger.warning("Cannot generate report because no valid data is available.")
+            return False
+
+        filename = str(filename)
+        if cache_file is None:
+            cache_file = os.path.join(os.path.dirname(filename), f".{os.path.basename(filename)}.cache.json")
+
+        existing_cols = [col for col in self.FULL_DATA_COLUMNS if col in self.df.columns]
+        row_hashes = [f"{h:016x}" for h in self._fingerprint_rows(existing_cols + ['discrepancy']).tolist()]
+        data_digest = hashlib.sha256(
+            json.dumps([self.CACHE_VERSION, existing_cols, row_hashes]).encode('utf-8')).hexdigest()
+        positions = self.analysis.positions_above(threshold)
+        discrepancy_digest = hashlib.sha256(
+            json.dumps([threshold, [row_hashes[i] for i in positions.tolist()]]).encode('utf-8')).hexdigest()
+        # Extra sections, such as the trend table, change on every run as the history grows. They
+        # are fingerprinted apart from the data, so a change there only rewrites the end of the file.
+        data_fingerprint = hashlib.sha256(f"{data_digest}:{discrepancy_digest}".encode('utf-8')).hexdigest()
+        tail = f"{self._render_extra_sections(extra_sections)}{self.DOCUMENT_END}".encode('utf-8')
+        extra_digest = hashlib.sha256(tail).hexdigest()
+
+        cache = {}
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, encoding='utf-8') as f:
+                    cache = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Ignoring unreadable report cache '{cache_file}': {e}")
+        if cache.get('version') != self.CACHE_VERSION:
+            cache = {}
+
+        # The size check catches a report file that was replaced since the cache was written
+        if (cache.get('data_fingerprint') == data_fingerprint and os.path.exists(filename)
+                and os.path.getsize(filename) == cache.get('size')):
+            if cache['extra_digest'] == extra_digest:
+                self.logger.info(f"Report input unchanged, skipping regeneration of {filename}")
+                return False
+            with open(filename, "r+b") as f:
+                f.seek(cache['body_size'])
+                f.write(tail)
+                f.truncate()
+            cache.update(extra_digest=extra_digest, size=cache['body_size'] + len(tail))
+            with open(cache_file, "w", encoding='utf-8') as f:
+                json.dump(cache, f)
+            self.logger.info(f"Report data unchanged, only the extra sections of {filename} were rewritten")
+            return True
+
+        cached_fragments = cache.get('fragments', {})
+        cached_sections = cache.get('sections', {})
+        fragments = {}
+        rendered = 0
+
+        def row_fragments(position, row_hash):
+            nonlocal rendered
+            fragment = fragments.get(row_hash) or cached_fragments.get(row_hash)
+            if fragment is None:
+                row = self.df.iloc[position]
+                fragment = {'full': self._render_row(row[existing_cols].tolist()),
+                            'discrepancy': self._render_row(row[self.DISCREPANCY_COLUMNS].tolist())}
+                rendered += 1
+            fragments[row_hash] = fragment
+            return fragment
+
+        sections = {}
+        for name, key, render in (
+                ('summary', data_digest, self._summary_table_html),
+                ('discrepancies', discrepancy_digest, lambda: self._table_html(
+                    self.DISCREPANCY_COLUMNS, 'discrepancy-table',
+                    ''.join(row_fragments(i, row_hashes[i])['discrepancy'] for i in positions.tolist()))),
+                ('full_data', data_digest, lambda: self._table_html(
+                    existing_cols, 'full-data-table',
+                    ''.join(row_fragments(i, h)['full'] for i, h in enumerate(row_hashes)))),
+        ):
+            cached = cached_sections.get(name)
+            sections[name] = cached if cached and cached['key'] == key else {'key': key, 'html': render()}
+
+        # Keep fragments of rows that are still present, so the cache does not grow without bound
+        for row_hash in row_hashes:
+            if row_hash not in fragments and row_hash in cached_fragments:
+                fragments[row_hash] = cached_fragments[row_hash]
+
+        body = self._report_body(threshold, sections['summary']['html'], sections['discrepancies']['html'],
+                                 sections['full_data']['html']).encode('utf-8')
+        # Binary, so the cached body size is a byte offset on every platform
+        with open(filename, "wb") as f:
+            f.write(body)
+            f.write(tail)
+
+        os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+        with open(cache_file, "w", encoding='utf-8') as f:
+            json.dump({'version': self.CACHE_VERSION, 'data_fingerprint': data_fingerprint,
+                       'extra_digest': extra_digest, 'body_size': len(body), 'size': len(body) + len(tail),
+                       'sections': sections, 'fragments': fragments}, f)
+
+        self.logger.info(f"Report successfully generated: {filename} "
+                         f"({rendered} of {len(row_hashes)} rows rendered, the rest reused from cache)")
+        return True
@@ -0,0 +1,149 @@
+"""
+Lightweight, pandas-free computation of the report summary and its JSON/CSV outputs.
+
+This module deliberately imports nothing heavier than the standard library, so cron jobs and
+downstream consumers can produce machine-readable summaries straight from database rows or
+plain arrays without paying for the pandas import and DataFrame construction.
+"""
+import csv
+import json
+import math
+
+SUMMARY_PERCENTILES = (50, 90, 95, 99)
+CSV_FIELDS = ['section', 'threshold', 'city', 'statistic', 'value']
+
+
+def _is_missing(value):
+    return value is None or value != value
+
+
+def _describe(values):
+    """
+    Computes the same statistics as DiscrepancyAnalysis.statistics() for a list of floats.
+
+    Returns:
+        dict: count, mean, std, min, max and percentiles, or an empty dict for no values.
+    """
+    if not values:
+        return {}
+    values = sorted(values)
+    count = len(values)
+    mean = math.fsum(values) / count
+    stats = {
+        'count': count,
+        'mean': mean,
+        'std': math.sqrt(math.fsum((v - mean) ** 2 for v in values) / count),
+        'min': values[0],
+        'max': values[-1],
+    }
+    for p in SUMMARY_PERCENTILES:
+        rank = p / 100 * (count - 1)
+        lower, upper = math.floor(rank), math.ceil(rank)
+        weight = rank - lower
+        stats[f"p{p}"] = values[lower] * (1 - weight) + values[upper] * weight
+    return stats
+
+
+def summarize_columns(city, temperature_web, temperature_api, feels_like_web=None, feels_like_api=None,
+                      thresholds=(2.0,)):
+    """
+    Builds the report summary from parallel column sequences (lists, tuples or numpy arrays).
+
+    Rows missing either temperature are skipped, matching the DataFrame based report.
+
+    Args:
+        city (sequence): City names.
+        temperature_web (sequence): Website temperatures.
+        temperature_api (sequence): API temperatures.
+        feels_like_web (sequence): Optional website 'feels like' temperatures.
+        feels_like_api (sequence): Optional API 'feels like' temperatures.
+        thresholds (list of float): Discrepancy thresholds in °C.
+
+    Returns:
+        dict: The summary with 'readings', 'temperature', 'feels_like' and 'thresholds' entries.
+    """
+    if feels_like_web is None or feels_like_api is None:
+        feels_like_web = feels_like_api = [None] * len(city)
+
+    rows = []
+    feels_like = []
+    for name, t_web, t_api, f_web, f_api in zip(city, temperature_web, temperature_api,
+                                                  feels_like_web, feels_like_api):
+        if _is_missing(t_web) or _is_missing(t_api):
+            continue
+        t_web, t_api = float(t_web), float(t_api)
+        rows.append((str(name), t_web, t_api, abs(t_web - t_api)))
+        if not _is_missing(f_web) and not _is_missing(f_api):
+            feels_like.append(abs(float(f_web) - float(f_api)))
+
+    threshold_entries = []
+    for threshold in sorted(float(t) for t in thresholds):
+        breaches = [
+            {'city': name, 'temperature_web': t_web, 'temperature_api': t_api, 'discrepancy': discrepancy}
+            for name, t_web, t_api, discrepancy in rows if discrepancy > threshold
+        ]
+        threshold_entries.append({'threshold': threshold, 'count': len(breaches), 'breaches': breaches})
+
+    return {
+        'readings': len(rows),
+        'temperature': _describe([row[3] for row in rows]),
+        'feels_like': _describe(feels_like),
+        'thresholds': threshold_entries,
+    }
+
+
+def _field(row, name):
+    """Reads a field from a dictionary row or from a record with attributes, such as WeatherReading."""
+    return row.get(name) if isinstance(row, dict) else getattr(row, name, None)
+
+
+def summarize_readings(readings, thresholds=(2.0,)):
+    """
+    Builds the report summary from database rows, e.g. DatabaseHelper.get_all_weather_data()
+    or DatabaseHelper.get_all_readings().
+
+    Args:
+        readings (list of dict or WeatherReading): Rows with 'city', 'temperature_web',
+                                                   'temperature_api', 'feels_like_web' and
+                                                   'feels_like_api' keys or attributes.
+        thresholds (list of float): Discrepancy thresholds in °C.
+
+    Returns:
+        dict: The summary, see summarize_columns().
+    """
+    readings = list(readings)
+    return summarize_columns(
+        [_field(row, 'city') for row in readings],
+        [_field(row, 'temperature_web') for row in readings],
+        [_field(row, 'temperature_api') for row in readings],
+        [_field(row, 'feels_like_web') for row in readings],
+        [_field(row, 'feels_like_api') for row in readings],
+        thresholds=thresholds,
+    )
+
+
+def write_json_report(summary, filename):
+    """Writes a summary as a JSON document."""
+    with open(filename, "w", encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+
+
+def write_csv_report(summary, filename):
+    """
+    Writes a summary as one tidy CSV table with section, threshold, city, statistic and value
+    columns. Sections are 'temperature' and 'feels_like' statistics, 'threshold_count' per
+    threshold and one 'breach' row per city above a threshold.
+    """
+    with open(filename, "w", encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerow({'section': 'readings', 'statistic': 'count', 'value': summary['readings']})
+        for section in ('temperature', 'feels_like'):
+            for statistic, value in summary[section].items():
+                writer.writerow({'section': section, 'statistic': statistic, 'value': value})
+        for entry in summary['thresholds']:
+            writer.writerow({'section': 'threshold_count', 'threshold': entry['threshold'],
+                             'statistic': 'count', 'value': entry['count']})
+            for breach in entry['breaches']:
+                writer.writerow({'section': 'breach', 'threshold': entry['threshold'], 'city': breach['city'],
+                                 'statistic': 'discrepancy', 'value': breach['discrepancy']})
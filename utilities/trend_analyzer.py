@@ -0,0 +1,102 @@
+import pandas as pd
+
+from helpers.logger import setup_logger
+from utilities.columnar_archive import ColumnarArchive
+
+
+class TrendAnalysis:
+    """
+    Computes windowed discrepancy trends per city from the reading history.
+
+    All statistics are computed with grouped, vectorized pandas operations over one
+    DataFrame sorted by city and time, so the cost does not grow with a Python loop
+    over cities.
+    """
+    SUMMARY_COLUMNS = ['city', 'readings', 'last_reading', 'discrepancy', 'rolling_mean', 'ewma', 'rolling_max',
+                       'drift']
+
+    def __init__(self, history, window='24h', ewma_halflife='6h'):
+        """
+        Args:
+            history (list of dict): Readings with 'city', 'recorded_at' (epoch seconds), 'temperature_web'
+                                    and 'temperature_api', e.g. DatabaseHelper.get_weather_history(),
+                                    or a dict of columns.
+            window (str): Time window of the rolling mean and rolling max, e.g. '6h' or '7d'.
+            ewma_halflife (str): Half-life of the exponentially weighted moving average.
+        """
+        self.logger = setup_logger(__name__)
+        self.window = window
+        self.ewma_halflife = ewma_halflife
+
+        df = pd.DataFrame(history, columns=['city', 'recorded_at', 'temperature_web', 'temperature_api'])
+        df = df.dropna(subset=['city', 'recorded_at', 'temperature_web', 'temperature_api'])
+        df['time'] = pd.to_datetime(df['recorded_at'].astype('int64'), unit='s')
+        df['discrepancy'] = (df['temperature_web'] - df['temperature_api']).abs()
+        self.df = df.sort_values(['city', 'time'], kind='stable').reset_index(drop=True)
+        self._trends = None
+
+    @classmethod
+    def from_archive(cls, path, **kwargs):
+        """Builds the trend analysis from a columnar archive written by DatabaseHelper.export_archive()."""
+        return cls(ColumnarArchive(path).to_frame_columns(), **kwargs)
+
+    def compute(self):
+        """
+        Adds the rolling mean, EWMA and rolling max of the discrepancy to every reading.
+
+        Returns:
+            DataFrame: One row per reading, sorted by city and time.
+        """
+        if self._trends is not None:
+            return self._trends
+
+        trends = self.df.copy()
+        if trends.empty:
+            for column in ('rolling_mean', 'ewma', 'rolling_max'):
+                trends[column] = pd.Series(dtype='float64')
+            self._trends = trends
+            return trends
+
+        groups = trends.groupby('city', sort=True)
+        rolling = groups.rolling(self.window, on='time')['discrepancy']
+        # Grouped results come back in (city, time) order, which is exactly the order of the sorted frame
+        trends['rolling_mean'] = rolling.mean().to_numpy()
+        trends['rolling_max'] = rolling.max().to_numpy()
+        trends['ewma'] = groups.ewm(halflife=self.ewma_halflife, times=trends['time'])['discrepancy'].mean().to_numpy()
+        self._trends = trends
+        self.logger.info(f"Computed discrepancy trends for {trends['city'].nunique()} cities "
+                         f"over {len(trends)} readings (window {self.window}, half-life {self.ewma_halflife}).")
+        return trends
+
+    def get_city_summary(self):
+        """
+        Summarizes the latest trend values per city.
+
+        'drift' is the EWMA minus the city's mean discrepancy over its whole history,
+        so a positive value means the gap between the two sources is currently growing.
+
+        Returns:
+            DataFrame: One row per city with the columns in SUMMARY_COLUMNS.
+        """
+        trends = self.compute()
+        if trends.empty:
+            return pd.DataFrame(columns=self.SUMMARY_COLUMNS)
+
+        groups = trends.groupby('city', sort=True)
+        summary = groups.tail(1).set_index('city')
+        summary['readings'] = groups.size()
+        summary['drift'] = summary['ewma'] - groups['discrepancy'].mean()
+        summary['last_reading'] = summary['time']
+        return summary.reset_index()[self.SUMMARY_COLUMNS]
+
+    def to_html(self, top=None):
+        """
+        Renders the per-city summary as an HTML table, sorted by the strongest upward drift.
+
+        Args:
+            top (int): Only include the given number of cities with the largest drift.
+        """
+        summary = self.get_city_summary().sort_values('drift', ascending=False)
+        if top is not None:
+            summary = summary.head(top)
+        return summary.to_html(index=False, classes='trend-table', float_format='%.2f')
@@ -1,7 +1,12 @@
 import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
 from playwright.async_api import async_playwright
 import re
-from helpers.logger import setup_logger
+from helpers.latency import HedgeBudget, LatencyTracker, hedged
+from helpers.logger import PER_CITY, setup_logger
+from helpers.metrics import get_metrics
 
 
 class WebScraper:
@@ -10,6 +15,9 @@ class WebScraper:
     BASE_URL = "https://www.timeanddate.com/weather/"
     PAGE_LOAD_TIMEOUT = 60000
     ELEMENT_WAIT_TIMEOUT = 15000
+    # Lowest adaptive timeouts, however fast the observed pages are
+    MIN_PAGE_LOAD_TIMEOUT = 10000
+    MIN_ELEMENT_WAIT_TIMEOUT = 5000
     SEARCH_INPUT_SELECTOR = 'input[placeholder="Search for city or place…"]'
     SEARCH_RESULTS_SELECTOR = 'div.tb-scroll'
     CITY_LINKS_SELECTOR = 'a[href*="/weather/"]'
@@ -18,36 +26,199 @@ class WebScraper:
     FEELS_LIKE_SELECTOR = 'p:has-text("Feels Like:")'
     TEMP_PATTERN = r'(-?\d+)\s*°C'
 
-    def __init__(self):
+    def __init__(self, hedge=False, hedge_budget_ratio=0.1, user_data_dir=None, disk_cache_mb=100):
+        """
+        Args:
+            hedge (bool): Start a second scrape when one runs longer than the observed p95.
+            hedge_budget_ratio (float): Maximum share of extra scrapes caused by hedging.
+            user_data_dir (str): Persistent browser profile shared by all scrapes, so the HTTP disk
+                                 cache, cookies and consent survive between runs. None launches a
+                                 fresh browser with an empty profile per scrape.
+            disk_cache_mb (int): Upper bound of the profile's disk cache, in megabytes.
+        """
         self.logger = setup_logger(__name__)
         self.base_url = self.BASE_URL
+        self.hedge = hedge
+        self.hedge_budget = HedgeBudget(ratio=hedge_budget_ratio)
+        self.user_data_dir = user_data_dir
+        self.disk_cache_mb = disk_cache_mb
+        self._playwright = None
+        self._context = None
+        # Created by the first coroutine that opens the context, so it belongs to the running loop
+        self._context_lock = None
+        self.cache_stats = {'responses': 0, 'cache_hits': 0, 'network_bytes': 0}
+        self._served_from_cache = set()
+        # Observed latencies in seconds, the timeouts and the hedging delay are derived from them
+        self.page_load_latency = LatencyTracker()
+        self.element_wait_latency = LatencyTracker()
+        self.scrape_latency = LatencyTracker()
 
-    async def _scrape_weather_data(self, city):
+    def _page_load_timeout(self):
+        """Page load timeout in milliseconds, derived from the observed page loads."""
+        return self.page_load_latency.timeout(self.PAGE_LOAD_TIMEOUT / 1000, self.MIN_PAGE_LOAD_TIMEOUT / 1000) * 1000
+
+    def _element_wait_timeout(self):
+        """Weather container wait timeout in milliseconds, derived from the observed waits."""
+        return self.element_wait_latency.timeout(self.ELEMENT_WAIT_TIMEOUT / 1000,
+                                                 self.MIN_ELEMENT_WAIT_TIMEOUT / 1000) * 1000
+
+    async def _scrape_weather_data(self, city, slot=None):
+        """
+        Scrapes weather data for a given city, hedged with a second scrape when enabled.
+
+        Args:
+            city (str): The city to scrape.
+            slot (asyncio.Semaphore): Concurrency limit the caller holds for this scrape, a hedged
+                                      scrape waits for a slot of its own.
+        """
+        async def backup_attempt():
+            if slot is None:
+                return await self._scrape_attempt(city)
+            async with slot:
+                return await self._scrape_attempt(city)
+
+        # Scrapes started together have no samples yet, they hedge once the first ones are recorded
+        delay = self.scrape_latency.hedge_delay_when_known() if self.hedge else None
+        return await hedged(lambda: self._scrape_attempt(city), delay, self.hedge_budget, 'scrape',
+                            is_success=lambda data: data['temperature_web'] is not None,
+                            backup_attempt=backup_attempt)
+
+    async def _scrape_attempt(self, city):
+        """Scrapes once and records how long it took, as a censored sample unless it succeeded."""
+        attempt_start = time.perf_counter()
+        data = None
+        try:
+            data = await self._scrape_page(city)
+            return data
+        finally:
+            self.scrape_latency.record(time.perf_counter() - attempt_start,
+                                       censored=data is None or data['temperature_web'] is None)
+
+    async def _scrape_page(self, city):
         """ Scrapes weather data for a given city from the Time and Date website."""
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
+        async with self._open_page() as page:
+            metrics = get_metrics()
             try:
-                self.logger.info(f"Scraping web data for {city.title()}")
-                await page.goto(self.base_url, timeout=self.PAGE_LOAD_TIMEOUT)
-                await page.fill(self.SEARCH_INPUT_SELECTOR, city)
-                await page.press(self.SEARCH_INPUT_SELECTOR, 'Enter')
-                try:
-                    await page.wait_for_selector(self.SEARCH_RESULTS_SELECTOR, timeout=5000)
-                    if not await self._select_city(page, city):
-                        return {"temperature_web": None, "feels_like_web": None}
-                except Exception:
-                    self.logger.info(f"Search results not found for '{city.title()}'. Assuming direct navigation.")
-                await page.wait_for_selector(self.WEATHER_CONTAINER_SELECTOR, timeout=self.ELEMENT_WAIT_TIMEOUT)
-                current_temp = await self._extract_current_temperature(page)
-                feels_like = await self._extract_feels_like_temperature(page)
-                self.logger.info(f"Successfully scraped web data for {city.title()}")
+                self.logger.info(f"Scraping web data for {city.title()}", extra=PER_CITY)
+                with metrics.timer('scrape_navigation'):
+                    with self.page_load_latency.measure():
+                        await page.goto(self.base_url, timeout=self._page_load_timeout())
+                    await page.fill(self.SEARCH_INPUT_SELECTOR, city)
+                    await page.press(self.SEARCH_INPUT_SELECTOR, 'Enter')
+                    try:
+                        await page.wait_for_selector(self.SEARCH_RESULTS_SELECTOR, timeout=5000)
+                        if not await self._select_city(page, city):
+                            metrics.increment('scrape', 'failure')
+                            return {"temperature_web": None, "feels_like_web": None}
+                    except Exception:
+                        self.logger.info(f"Search results not found for '{city.title()}'. Assuming direct navigation.",
+                                         extra=PER_CITY)
+                    with self.element_wait_latency.measure():
+                        await page.wait_for_selector(self.WEATHER_CONTAINER_SELECTOR,
+                                                     timeout=self._element_wait_timeout())
+                with metrics.timer('scrape_extraction'):
+                    current_temp = await self._extract_current_temperature(page)
+                    feels_like = await self._extract_feels_like_temperature(page)
+                self.logger.info(f"Successfully scraped web data for {city.title()}", extra=PER_CITY)
+                metrics.increment('scrape', 'success' if current_temp is not None else 'failure')
                 return {"temperature_web": current_temp, "feels_like_web": feels_like}
             except Exception as e:
                 self.logger.error(f"An error occurred while scraping data for {city.title()}: {e}")
+                metrics.increment('scrape', 'failure')
                 return {"temperature_web": None, "feels_like_web": None}
-            finally:
-                await browser.close()
+
+    @asynccontextmanager
+    async def _open_page(self):
+        """Yields a page, from the shared persistent context if configured, else from a fresh browser."""
+        if self.user_data_dir is None:
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=True)
+                try:
+                    yield await browser.new_page()
+                finally:
+                    await browser.close()
+            return
+
+        context = await self._persistent_context()
+        page = await context.new_page()
+        try:
+            await self._track_cache(context, page)
+            yield page
+        finally:
+            await page.close()
+
+    async def _persistent_context(self):
+        """Launches the persistent browser context on first use, a profile can only be opened once."""
+        if self._context_lock is None:
+            self._context_lock = asyncio.Lock()
+        async with self._context_lock:
+            if self._context is None:
+                os.makedirs(self.user_data_dir, exist_ok=True)
+                self._playwright = await async_playwright().start()
+                self._context = await self._playwright.chromium.launch_persistent_context(
+                    self.user_data_dir, headless=True,
+                    args=[f"--disk-cache-size={self.disk_cache_mb * 1024 * 1024}"])
+                self.logger.info(f"Using persistent browser profile at {self.user_data_dir}")
+            return self._context
+
+    async def _track_cache(self, context, page):
+        """Counts responses served from the browser cache through a CDP Network session on the page."""
+        cdp = await context.new_cdp_session(page)
+        cdp.on('Network.responseReceived', self._record_response)
+        cdp.on('Network.requestServedFromCache', self._record_memory_cache_hit)
+        cdp.on('Network.loadingFinished', self._record_transfer)
+        await cdp.send('Network.enable')
+
+    def _record_response(self, params):
+        response = params.get('response', {})
+        # Memory cache hits are announced by requestServedFromCache right before their response
+        cached = (params.get('requestId') in self._served_from_cache
+                  or response.get('fromDiskCache') or response.get('fromPrefetchCache'))
+        self._served_from_cache.discard(params.get('requestId'))
+        self.cache_stats['responses'] += 1
+        if cached:
+            self.cache_stats['cache_hits'] += 1
+        get_metrics().increment('browser_cache', 'hit' if cached else 'miss')
+
+    def _record_memory_cache_hit(self, params):
+        self._served_from_cache.add(params.get('requestId'))
+
+    def _record_transfer(self, params):
+        self.cache_stats['network_bytes'] += int(params.get('encodedDataLength', 0))
+
+    def cache_hit_ratio(self):
+        """Returns the share of responses served from the browser cache, None before any response."""
+        if not self.cache_stats['responses']:
+            return None
+        return self.cache_stats['cache_hits'] / self.cache_stats['responses']
+
+    async def warm_cache(self):
+        """
+        Loads the start page once in the persistent profile before the scrapes run in parallel, so
+        they share its cached scripts, styles and fonts instead of all downloading them at once.
+        """
+        if self.user_data_dir is None:
+            return
+        async with self._open_page() as page:
+            try:
+                await page.goto(self.base_url, wait_until='networkidle', timeout=self._page_load_timeout())
+            except Exception as e:
+                self.logger.warning(f"Cache warm-up of {self.base_url} failed: {e}")
+
+    async def close(self):
+        """Closes the persistent context and reports the cache hit ratio of the run."""
+        if self._context is None:
+            return
+        ratio = self.cache_hit_ratio()
+        self.logger.info(f"Browser cache: {self.cache_stats['cache_hits']}/{self.cache_stats['responses']} responses "
+                         f"from cache ({ratio or 0:.0%}), {self.cache_stats['network_bytes'] / 1024:.1f} KiB "
+                         f"transferred.")
+        await self._context.close()
+        await self._playwright.stop()
+        self._context = None
+        self._playwright = None
+        # A later run may use another event loop
+        self._context_lock = None
 
     async def _select_city(self, page, city):
         """ Selects the correct city from the search results."""